@@ -9,6 +9,7 @@ from app.schemas.token import LogoutSchema, TokenSchema
 from app.services.odoo.service import OdooService
 from app.services.otp.main import OTP
 from app.utils.main import verify_refresh_token
+from app.utils.rate_limit import limit_otp_send, limit_otp_verify
 
 router = APIRouter()
 refresh_routeur = APIRouter()
@@ -22,6 +23,7 @@ security = HTTPBearer()
     description="""This endpoint allows users to request an OTP (One-Time Password) to be
     sent to their phone number.
     The OTP is typically used for authentication or verification purposes.""",
+    dependencies=[Depends(limit_otp_send)],
     responses={
         200: {
             "model": OTPResponseSchema,
@@ -31,6 +33,7 @@ security = HTTPBearer()
             "model": ErrorSchema,
             "description": "otp_spam",
         },
+        429: {"model": ErrorSchema, "description": "too_many_requests"},
         500: {"model": ErrorSchema, "description": "Internal server error."},
     },
 )
@@ -58,6 +61,7 @@ def send_otp(
     summary="Verify OTP",
     description="""This endpoint verifies the OTP that was previously sent to the user's phone number.
     If the OTP is correct, an access token is returned.""",
+    dependencies=[Depends(limit_otp_verify)],
     responses={
         200: {
             "model": AuthSchema,
@@ -67,6 +71,7 @@ def send_otp(
             "model": ErrorSchema,
             "description": "otp_expired, otp_invalid",
         },
+        429: {"model": ErrorSchema, "description": "too_many_requests"},
         500: {"model": ErrorSchema, "description": "Internal server error."},
     },
 )
@@ -1,24 +1,42 @@
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import JSONResponse
 
 from app.schemas.error import ErrorSchema
-from app.schemas.global_schema import TaskSchema
+from app.schemas.global_schema import (
+    CardSchema,
+    TaskCardSchema,
+    TaskSchema,
+    TaskSyncSchema,
+    TeamTaskSchema,
+)
 from app.schemas.incentive_event import IncentiveEventSummarySchema
 from app.schemas.incentive_report import (
     IncentiveReportDetailsSchema,
+    IncentiveReportDetailsSyncSchema,
     IncentiveReportSimpleSchema,
+    IncentiveReportSyncSchema,
 )
 from app.schemas.screen import SummarySimpleSchema
 from app.schemas.user import UserSchema
-from app.services.odoo.exceptions import EmployeeNotFoundException
+from app.services.odoo.counters import TASK_HYPERCARE, TASK_SLOW_PAYER
+from app.services.odoo.exceptions import (
+    CardNotFoundException,
+    EmployeeNotFoundException,
+)
 from app.services.odoo.service import OdooService
+from app.services.sync import sync_report_details, sync_reports, sync_scope, sync_task
 from app.utils.main import verify_access_token
+from app.utils.responses import PydanticJSONResponse
 
 router = APIRouter()
 
 
+def _sync_scope(request: Request, user_context: dict) -> str:
+    return sync_scope(user_context, request.url.path, dict(request.query_params))
+
+
 @router.get(
     "/",
     summary="Get Employee Account Details",
@@ -42,7 +60,7 @@ async def get_employee_profile(
 ):
     try:
         service = OdooService(user_context)
-        return service.get_employee_profile()
+        return PydanticJSONResponse(service.get_employee_profile())
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except EmployeeNotFoundException as e:
@@ -62,8 +80,10 @@ async def get_employee_profile(
     Each report provides basic information like the report ID and relevant dates.""",
     responses={
         200: {
-            "model": List[IncentiveReportSimpleSchema],
-            "description": "List of validated reports for the employee.",
+            "model": Union[
+                List[IncentiveReportSimpleSchema], IncentiveReportSyncSchema
+            ],
+            "description": "List of validated reports for the employee, the changes with `since`.",
         },
         400: {
             "model": ErrorSchema,
@@ -77,12 +97,21 @@ async def get_employee_profile(
     },
 )
 async def get_custom_bonus_by_employee_id(
+    request: Request,
     user_context: dict = Depends(verify_access_token),
+    since: Optional[str] = Query(
+        None,
+        description="Token of the last sync, empty for the first one, to only get the changes",
+    ),
 ) -> List[IncentiveReportSimpleSchema]:
     try:
         service = OdooService(user_context)
         report_ids = service.search_validate_report_by_employee()
-        return report_ids
+        if since is not None:
+            report_ids = sync_reports(
+                _sync_scope(request, user_context), report_ids, since
+            )
+        return PydanticJSONResponse(report_ids)
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -120,7 +149,9 @@ async def get_bonus_report_by_id(
 ) -> SummarySimpleSchema:
     try:
         service = OdooService(user_context)
-        return service.fetch_bonuses_summary_by_report(report_id=report_id)
+        return PydanticJSONResponse(
+            service.fetch_bonuses_summary_by_report(report_id=report_id)
+        )
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -138,8 +169,10 @@ async def get_bonus_report_by_id(
     the information of the accounts that generated the bonus.""",
     responses={
         200: {
-            "model": IncentiveReportDetailsSchema,
-            "description": "List of incentive events for the given report ID.",
+            "model": Union[
+                IncentiveReportDetailsSchema, IncentiveReportDetailsSyncSchema
+            ],
+            "description": "List of incentive events for the given report ID, the changes with `since`.",
         },
         400: {
             "model": ErrorSchema,
@@ -153,20 +186,38 @@ async def get_bonus_report_by_id(
     },
 )
 async def get_bonuses_details(
+    request: Request,
     report_id: int,
     category: int = Query(None, description="ID of event type"),
     user_context: dict = Depends(verify_access_token),
     offset: int = Query(0, description="Offset for pagination", ge=0),
     limit: int = Query(10, description="Number of records to fetch", ge=10, le=100),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+    view: Literal["collapsed", "full"] = Query(
+        "full", description="'collapsed' to skip the expanded section of the cards"
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="Token of the last sync, empty for the first one, to only get the changes",
+    ),
 ) -> IncentiveReportDetailsSchema:
     try:
-        service = OdooService(user_context)
-        return service.fetch_bonuses_details_by_report(
+        service = OdooService(user_context, lang=lang)
+        details = service.fetch_bonuses_details_by_report(
             report_id=report_id,
             category=category,
             offset=offset,
             limit=limit,
+            view=view,
         )
+        if since is not None:
+            details = sync_report_details(
+                _sync_scope(request, user_context), details, since
+            )
+        return PydanticJSONResponse(details)
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -183,8 +234,8 @@ async def get_bonuses_details(
     description="""Returns a list of slow payers for the authenticated employee.""",
     responses={
         200: {
-            "model": TaskSchema,
-            "description": "List of Slow payer for the current user.",
+            "model": Union[TaskSchema, TaskSyncSchema],
+            "description": "List of Slow payer for the current user, the changes with `since`.",
         },
         400: {
             "model": ErrorSchema,
@@ -198,18 +249,33 @@ async def get_bonuses_details(
     },
 )
 async def get_slow_payer(
+    request: Request,
     user_context=Depends(verify_access_token),
     offset: int = Query(0, description="Offset for pagination", ge=0),
     limit: int = Query(10, description="Number of records to fetch", ge=10, le=100),
     day_late: Optional[Literal["new", "urgent"]] = Query(
         None, description="Filter by 'new' or 'urgent'"
     ),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+    view: Literal["collapsed", "full"] = Query(
+        "full", description="'collapsed' to skip the expanded section of the cards"
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="Token of the last sync, empty for the first one, to only get the changes",
+    ),
 ) -> TaskSchema:
     try:
-        service = OdooService(user_context)
-        return service.get_slower_payer_client_service(
-            limit=limit, offset=offset, day_late=day_late
+        service = OdooService(user_context, lang=lang)
+        task = service.get_slower_payer_client_service(
+            limit=limit, offset=offset, day_late=day_late, view=view
         )
+        if since is not None:
+            task = sync_task(_sync_scope(request, user_context), task, since)
+        return PydanticJSONResponse(task)
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -226,8 +292,8 @@ async def get_slow_payer(
     description="""Returns a list of hypercare at risk for the authenticated employee.""",
     responses={
         200: {
-            "model": TaskSchema,
-            "description": "List of hypercare at risk for the current user.",
+            "model": Union[TaskSchema, TaskSyncSchema],
+            "description": "List of hypercare at risk for the current user, the changes with `since`.",
         },
         400: {
             "model": ErrorSchema,
@@ -241,15 +307,233 @@ async def get_slow_payer(
     },
 )
 async def get_hypercare_at_risk(
+    request: Request,
     user_context=Depends(verify_access_token),
     offset: int = Query(0, description="Offset for pagination", ge=0),
     limit: int = Query(10, description="Number of records to fetch", ge=10, le=100),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+    view: Literal["collapsed", "full"] = Query(
+        "full", description="'collapsed' to skip the expanded section of the cards"
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="Token of the last sync, empty for the first one, to only get the changes",
+    ),
 ) -> TaskSchema:
     try:
-        service = OdooService(user_context)
-        return service.get_hypercare_at_risk_service(limit=limit, offset=offset)
+        service = OdooService(user_context, lang=lang)
+        task = service.get_hypercare_at_risk_service(
+            limit=limit, offset=offset, view=view
+        )
+        if since is not None:
+            task = sync_task(_sync_scope(request, user_context), task, since)
+        return PydanticJSONResponse(task)
+    except ValueError as e:
+        return JSONResponse(content=e.args[0], status_code=400)
+    except Exception as e:
+        err_value = {
+            "error": "internal_server_error",
+            "error_description": str(e),
+        }
+        return JSONResponse(content=err_value, status_code=500)
+
+
+TEAM_TASKS = {"slow-payers": TASK_SLOW_PAYER, "hypercare": TASK_HYPERCARE}
+
+
+@router.get(
+    "/team/tasks/{task}",
+    summary="Get Team Tasks",
+    description="""Returns the slow payers or hypercare at risk of several agents reporting to the
+    authenticated employee, paginated per agent. Agents who do not report to them are listed apart.""",
+    responses={
+        200: {
+            "model": TeamTaskSchema,
+            "description": "Tasks of each agent requested.",
+        },
+        400: {
+            "model": ErrorSchema,
+            "description": "Invalid request or missing parameters.",
+        },
+        401: {
+            "model": ErrorSchema,
+            "description": "Unauthorized access. Please provide a valid access token.",
+        },
+        500: {"model": ErrorSchema, "description": "Internal server error."},
+    },
+)
+async def get_team_tasks(
+    task: Literal["slow-payers", "hypercare"],
+    user_context=Depends(verify_access_token),
+    employee_ids: List[int] = Query(
+        ..., description="Ids of the agents", min_length=1, max_length=100
+    ),
+    offset: int = Query(0, description="Offset for pagination of each agent", ge=0),
+    limit: int = Query(
+        10, description="Number of records to fetch per agent", ge=1, le=100
+    ),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+    view: Literal["collapsed", "full"] = Query(
+        "full", description="'collapsed' to skip the expanded section of the cards"
+    ),
+) -> TeamTaskSchema:
+    try:
+        service = OdooService(user_context, lang=lang)
+        return PydanticJSONResponse(
+            service.get_team_tasks_service(
+                employee_ids, TEAM_TASKS[task], offset=offset, limit=limit, view=view
+            )
+        )
+    except ValueError as e:
+        return JSONResponse(content=e.args[0], status_code=400)
+    except Exception as e:
+        err_value = {
+            "error": "internal_server_error",
+            "error_description": str(e),
+        }
+        return JSONResponse(content=err_value, status_code=500)
+
+
+@router.get(
+    "/report/{report_id}/details/{event_id}",
+    summary="Get Bonus Card",
+    description="""Fetch a single incentive event card of a report with its expanded view.""",
+    responses={
+        200: {
+            "model": CardSchema,
+            "description": "The card with its expanded view.",
+        },
+        400: {
+            "model": ErrorSchema,
+            "description": "Invalid request or missing parameters.",
+        },
+        401: {
+            "model": ErrorSchema,
+            "description": "Unauthorized access. Please provide a valid access token.",
+        },
+        404: {"model": ErrorSchema, "description": "Card not found."},
+        500: {"model": ErrorSchema, "description": "Internal server error."},
+    },
+)
+async def get_bonus_card(
+    report_id: int,
+    event_id: int,
+    user_context: dict = Depends(verify_access_token),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+) -> CardSchema:
+    try:
+        service = OdooService(user_context, lang=lang)
+        return PydanticJSONResponse(service.get_bonus_card(report_id, event_id))
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
+    except CardNotFoundException as e:
+        return JSONResponse(
+            content={"error": e.message, "error_description": e.details},
+            status_code=404,
+        )
+    except Exception as e:
+        err_value = {
+            "error": "internal_server_error",
+            "error_description": str(e),
+        }
+        return JSONResponse(content=err_value, status_code=500)
+
+
+@router.get(
+    "/tasks/slow-payers/{account_id}",
+    summary="Get Slow Payer Card",
+    description="""Fetch a single slow payer card with its expanded view.""",
+    responses={
+        200: {
+            "model": TaskCardSchema,
+            "description": "The card with its expanded view.",
+        },
+        400: {
+            "model": ErrorSchema,
+            "description": "Invalid request or missing parameters.",
+        },
+        401: {
+            "model": ErrorSchema,
+            "description": "Unauthorized access. Please provide a valid access token.",
+        },
+        404: {"model": ErrorSchema, "description": "Card not found."},
+        500: {"model": ErrorSchema, "description": "Internal server error."},
+    },
+)
+async def get_slow_payer_card(
+    account_id: int,
+    user_context: dict = Depends(verify_access_token),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+) -> TaskCardSchema:
+    try:
+        service = OdooService(user_context, lang=lang)
+        return PydanticJSONResponse(service.get_slow_payer_card(account_id))
+    except ValueError as e:
+        return JSONResponse(content=e.args[0], status_code=400)
+    except CardNotFoundException as e:
+        return JSONResponse(
+            content={"error": e.message, "error_description": e.details},
+            status_code=404,
+        )
+    except Exception as e:
+        err_value = {
+            "error": "internal_server_error",
+            "error_description": str(e),
+        }
+        return JSONResponse(content=err_value, status_code=500)
+
+
+@router.get(
+    "/tasks/hypercare/{account_id}",
+    summary="Get Hypercare Card",
+    description="""Fetch a single hypercare at risk card with its expanded view.""",
+    responses={
+        200: {
+            "model": TaskCardSchema,
+            "description": "The card with its expanded view.",
+        },
+        400: {
+            "model": ErrorSchema,
+            "description": "Invalid request or missing parameters.",
+        },
+        401: {
+            "model": ErrorSchema,
+            "description": "Unauthorized access. Please provide a valid access token.",
+        },
+        404: {"model": ErrorSchema, "description": "Card not found."},
+        500: {"model": ErrorSchema, "description": "Internal server error."},
+    },
+)
+async def get_hypercare_card(
+    account_id: int,
+    user_context: dict = Depends(verify_access_token),
+    lang: Optional[str] = Query(
+        None,
+        description="Only return texts in this language, 'auto' for the employee's one",
+    ),
+) -> TaskCardSchema:
+    try:
+        service = OdooService(user_context, lang=lang)
+        return PydanticJSONResponse(service.get_hypercare_card(account_id))
+    except ValueError as e:
+        return JSONResponse(content=e.args[0], status_code=400)
+    except CardNotFoundException as e:
+        return JSONResponse(
+            content={"error": e.message, "error_description": e.details},
+            status_code=404,
+        )
     except Exception as e:
         err_value = {
             "error": "internal_server_error",
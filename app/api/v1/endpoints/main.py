@@ -1,11 +1,15 @@
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 
 from app.schemas.country import CountrySchema
 from app.schemas.error import ErrorSchema
+from app.schemas.screen import BootstrapSchema
+from app.services.main import fetch_bootstrap
 from app.services.main import get_available_country as fetch_available_country
+from app.utils.main import verify_access_token
+from app.utils.responses import PydanticJSONResponse
 
 router = APIRouter()
 
@@ -47,3 +51,32 @@ def get_available_country() -> List[CountrySchema]:
             "error_description": str(e),
         }
         return JSONResponse(content=err_value, status_code=500)
+
+
+@router.get(
+    "/bootstrap",
+    summary="Get Application Bootstrap",
+    description="""Returns everything the application loads on launch in a single call: the
+    employee profile, the homepage earnings and tasks, and the validated reports.
+    A section which cannot be built is null and described in `errors`.""",
+    responses={
+        200: {
+            "model": BootstrapSchema,
+        },
+        401: {
+            "model": ErrorSchema,
+            "description": "Unauthorized access. Please provide a valid access token.",
+        },
+    },
+)
+async def get_bootstrap(user_context=Depends(verify_access_token)):
+    try:
+        return PydanticJSONResponse(await fetch_bootstrap(user_context))
+    except ValueError as e:
+        return JSONResponse(content=e.args[0], status_code=400)
+    except Exception as e:
+        err_value = {
+            "error": "internal_server_error",
+            "error_description": str(e),
+        }
+        return JSONResponse(content=err_value, status_code=500)
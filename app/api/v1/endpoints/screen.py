@@ -8,6 +8,7 @@ from app.schemas.screen import SummarySchema, TasksSchema
 from app.services.main import fetch_homepage
 from app.services.main import get_homepage_tasks as fetch_homepage_tasks
 from app.utils.main import verify_access_token
+from app.utils.responses import PydanticJSONResponse
 
 router = APIRouter()
 
@@ -28,7 +29,7 @@ router = APIRouter()
 )
 async def get_homepage(user_context=Depends(verify_access_token)):
     try:
-        return fetch_homepage(user_context)
+        return PydanticJSONResponse(fetch_homepage(user_context))
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -57,7 +58,7 @@ async def get_homepage(user_context=Depends(verify_access_token)):
 )
 async def get_homepage_tasks(user_context=Depends(verify_access_token)):
     try:
-        return fetch_homepage_tasks(user_context)
+        return PydanticJSONResponse(fetch_homepage_tasks(user_context))
     except ValueError as e:
         return JSONResponse(content=e.args[0], status_code=400)
     except Exception as e:
@@ -0,0 +1,64 @@
+"""
+Maintenance commands of the service.
+
+    python -m app.cli openapi [OUTPUT]       Write the OpenAPI document, to serve
+                                             it pre-generated with OPENAPI_FILE.
+    python -m app.cli importtime [--top N]   Show the slowest imports of the app.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+def openapi(output: str = None) -> None:
+    from app.main import build_openapi
+
+    document = json.dumps(build_openapi(), indent=2)
+    if output:
+        with open(output, "w") as openapi_file:
+            openapi_file.write(document)
+    else:
+        print(document)
+
+
+def importtime(module: str = "app.main", top: int = 25) -> None:
+    """Print the imports of `module` taking the most cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        sys.exit(result.stderr)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if own.strip().isdigit():
+            imports.append((int(cumulative), int(own), name.rstrip()))
+    imports.sort(reverse=True)
+    print(f"{'cumulative (ms)':>15}  {'self (ms)':>9}  module")
+    for cumulative, own, name in imports[:top]:
+        print(f"{cumulative / 1000:>15.1f}  {own / 1000:>9.1f}  {name}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    openapi_parser = commands.add_parser("openapi", help="write the OpenAPI document")
+    openapi_parser.add_argument("output", nargs="?", help="file to write to")
+    importtime_parser = commands.add_parser("importtime", help="profile the imports")
+    importtime_parser.add_argument("--module", default="app.main")
+    importtime_parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+    if args.command == "openapi":
+        openapi(args.output)
+    else:
+        importtime(args.module, args.top)
+
+
+if __name__ == "__main__":
+    main()
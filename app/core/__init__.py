@@ -1,14 +1,3 @@
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from app.core.config import Settings, settings
 
-
-class Settings(BaseSettings):
-    service_env: str = Field("LOCAL", alias="ENV")
-
-    class Config:
-        env_file = ".env"
-        extra = "allow"
-        populate_by_name = True
-
-
-settings = Settings()
+__all__ = ["Settings", "settings"]
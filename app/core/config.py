@@ -0,0 +1,141 @@
+from typing import Literal, Optional, Union
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    Settings of the whole service, read once from the environment and `.env`.
+
+    `app.core.settings`, `app.core.odoo_config.settings` and
+    `app.core.otp_config.settings` are all this object.
+    """
+
+    service_env: str = Field("LOCAL", alias="ENV")
+    shared_store_url: Optional[str] = Field(None, alias="SHARED_STORE_URL")
+    # OpenAPI document generated at build time by `python -m app.cli openapi`.
+    openapi_file: Optional[str] = Field(None, alias="OPENAPI_FILE")
+    # Reference data shared by the workers of a host, see app/utils/shared_cache.py
+    shared_cache_dir: str = Field("/dev/shm/baobab-cache", alias="SHARED_CACHE_DIR")
+    reference_cache_ttl: int = Field(300, alias="REFERENCE_CACHE_TTL")
+    # Seconds an expired entry is still served while it is reloaded.
+    reference_cache_stale_ttl: int = Field(60, alias="REFERENCE_CACHE_STALE_TTL")
+    # Entries kept in the directory, the ones closest to expiry are swept first.
+    shared_cache_max_entries: int = Field(10000, alias="SHARED_CACHE_MAX_ENTRIES")
+    homepage_cache_ttl: int = Field(60, alias="HOMEPAGE_CACHE_TTL")
+    # Per-employee cache of GET responses, see app/utils/response_cache.py. The
+    # routes are "<path template>=<TTL in seconds>", comma-separated.
+    response_cache_enabled: bool = Field(False, alias="RESPONSE_CACHE_ENABLED")
+    response_cache_routes: str = Field(
+        "/api/v1/employee/tasks/slow-payers=30,"
+        "/api/v1/employee/report/{report_id}/details=60,"
+        "/api/v1/screen/homepage/earnings=30",
+        alias="RESPONSE_CACHE_ROUTES",
+    )
+    response_cache_stale_ttl: int = Field(30, alias="RESPONSE_CACHE_STALE_TTL")
+    response_cache_size: int = Field(5000, alias="RESPONSE_CACHE_SIZE")
+    response_cache_compress: bool = Field(True, alias="RESPONSE_CACHE_COMPRESS")
+    # Incremental feed of the Odoo changes, see app/services/odoo/changes.py
+    change_feed_enabled: bool = Field(False, alias="CHANGE_FEED_ENABLED")
+    change_feed_interval: int = Field(30, alias="CHANGE_FEED_INTERVAL")
+    change_feed_batch_size: int = Field(500, alias="CHANGE_FEED_BATCH_SIZE")
+    # Seconds before the watermark read again for the records committed late.
+    change_feed_lookback: int = Field(60, alias="CHANGE_FEED_LOOKBACK")
+    change_feed_state_file: str = Field(
+        "/tmp/baobab-change-feed.json", alias="CHANGE_FEED_STATE_FILE"
+    )
+    # Local replica of the accounts, see app/services/odoo/replica.py
+    replica_enabled: bool = Field(False, alias="REPLICA_ENABLED")
+    replica_path: str = Field("/tmp/baobab-replica.sqlite3", alias="REPLICA_PATH")
+    replica_max_lag: int = Field(120, alias="REPLICA_MAX_LAG")
+    replica_sync_interval: int = Field(15, alias="REPLICA_SYNC_INTERVAL")
+    # Seconds between two removals of the accounts deleted in Odoo.
+    replica_reconcile_interval: int = Field(3600, alias="REPLICA_RECONCILE_INTERVAL")
+    # Background refresh of the hot datasets, see app/services/warmer.py
+    cache_warmer_enabled: bool = Field(True, alias="CACHE_WARMER_ENABLED")
+    cache_warmer_concurrency: int = Field(4, alias="CACHE_WARMER_CONCURRENCY")
+    cache_warmer_active_window: int = Field(1800, alias="CACHE_WARMER_ACTIVE_WINDOW")
+    cache_warmer_max_agents: int = Field(1000, alias="CACHE_WARMER_MAX_AGENTS")
+
+    # Server, see app/server.py
+    port: int = Field(8080, alias="PORT")
+    web_concurrency: Optional[int] = Field(None, alias="WEB_CONCURRENCY")
+    worker_memory_mb: int = Field(256, alias="WORKER_MEMORY_MB")
+    max_requests: int = Field(10000, alias="MAX_REQUESTS")
+    max_requests_jitter: int = Field(1000, alias="MAX_REQUESTS_JITTER")
+    keepalive: int = Field(650, alias="KEEPALIVE")
+    worker_timeout: int = Field(120, alias="WORKER_TIMEOUT")
+    graceful_timeout: int = Field(30, alias="GRACEFUL_TIMEOUT")
+
+    # Odoo and tokens
+    odoo_url: str = Field(..., alias="ODOO_URL")
+    odoo_db: str = Field(..., alias="ODOO_DB")
+    odoo_username: str = Field(..., alias="ODOO_USERNAME")
+    odoo_password: str = Field(..., alias="ODOO_PASSWORD")
+    odoo_uuid: Union[int, bool] = Field(..., alias="ODOO_UUID")
+    odoo_account_segmentation_slow_payer: str = Field(
+        ..., alias="ODOO_SLOW_PAYER_SEGMENTATION_LIST"
+    )
+    odoo_account_segmentation_hypercare: str = Field(
+        ..., alias="ODOO_HYPERCARE_SEGMENTATION_LIST"
+    )
+    access_token_secret: str = Field(..., alias="ACCESS_TOKEN_SECRET")
+    refresh_token_secret: str = Field(..., alias="REFRESH_TOKEN_SECRET")
+    access_token_expire: int = Field(..., alias="ACCESS_TOKEN_EXPIRE")
+    refresh_token_expire: int = Field(..., alias="REFRESH_TOKEN_EXPIRE")
+    task_counter_ttl: int = Field(120, alias="TASK_COUNTER_TTL")
+    # Hypercare lasts this many days after the registration. Accounts with
+    # fewer days left than the low threshold, or more than the high one, get
+    # an alert color.
+    hypercare_window_days: int = Field(75, alias="HYPERCARE_WINDOW_DAYS")
+    hypercare_alert_low_days: int = Field(17, alias="HYPERCARE_ALERT_LOW_DAYS")
+    hypercare_alert_high_days: int = Field(20, alias="HYPERCARE_ALERT_HIGH_DAYS")
+    # Slow payers ranked by priority, see app/services/odoo/priority.py
+    slow_payer_worklist_size: int = Field(500, alias="SLOW_PAYER_WORKLIST_SIZE")
+    slow_payer_worklist_ttl: int = Field(300, alias="SLOW_PAYER_WORKLIST_TTL")
+    # Delta sync of the card lists, see app/services/sync.py
+    sync_token_ttl: int = Field(86400, alias="SYNC_TOKEN_TTL")
+    jwt_backend: Literal["jose", "pyjwt"] = Field("jose", alias="JWT_BACKEND")
+    token_cache_size: int = Field(10000, alias="TOKEN_CACHE_SIZE")
+    access_token_format: Literal["full", "compact"] = Field(
+        "full", alias="ACCESS_TOKEN_FORMAT"
+    )
+    claims_cache_ttl: int = Field(300, alias="CLAIMS_CACHE_TTL")
+
+    # OTP and SMS
+    otp_secret: str = Field(..., alias="OTP_SECRET")
+    otp_interval: int = Field(..., alias="OTP_INTERVAL")
+    otp_valid_window: int = Field(..., alias="OTP_VALID_WINDOW")
+    otp_store_backend: Literal["odoo", "memory", "shared"] = Field(
+        "odoo", alias="OTP_STORE_BACKEND"
+    )
+    otp_store_ttl: int = Field(600, alias="OTP_STORE_TTL")
+    otp_audit_mirror: bool = Field(True, alias="OTP_AUDIT_MIRROR")
+    # Rate limits, as "<requests>/<seconds>".
+    otp_send_phone_limit: str = Field("5/3600", alias="OTP_SEND_PHONE_LIMIT")
+    otp_send_ip_limit: str = Field("30/3600", alias="OTP_SEND_IP_LIMIT")
+    otp_verify_phone_limit: str = Field("5/300", alias="OTP_VERIFY_PHONE_LIMIT")
+    otp_verify_ip_limit: str = Field("60/300", alias="OTP_VERIFY_IP_LIMIT")
+    rate_limit_backend: Literal["memory", "shared"] = Field(
+        "memory", alias="RATE_LIMIT_BACKEND"
+    )
+    # Proxies appending to X-Forwarded-For in front of the app: the Google
+    # front end and API Gateway.
+    trusted_proxy_hops: int = Field(2, alias="TRUSTED_PROXY_HOPS")
+    # Comma-separated regions whose phone numbers are accepted, all when empty.
+    phone_regions: str = Field("NG,CI,MG,SN", alias="PHONE_REGIONS")
+    sms_url: Optional[str] = Field(None, alias="SMS_URL")
+    sms_api_key: Optional[str] = Field(None, alias="API_KEY_SMS_REQUEST")
+    sms_concurrency: int = Field(8, alias="SMS_CONCURRENCY")
+    sms_queue_size: int = Field(1000, alias="SMS_QUEUE_SIZE")
+    sms_max_retries: int = Field(3, alias="SMS_MAX_RETRIES")
+    sms_timeout: float = Field(5.0, alias="SMS_TIMEOUT")
+
+    class Config:
+        env_file = ".env"
+        extra = "allow"
+        populate_by_name = True
+
+
+settings = Settings()
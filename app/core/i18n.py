@@ -0,0 +1,124 @@
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Optional, Union
+
+from app.schemas.global_schema import TextTranslationSchema
+
+DEFAULT_LANGUAGE = "en"
+AUTO_LANGUAGE = "auto"
+
+
+class TranslationCatalog:
+    """
+    Immutable catalog of the texts displayed by the mobile application.
+
+    The catalog is compiled once from a `{key: {lang: text}}` mapping: strings are
+    interned, missing translations fall back to the default language and one shared
+    `TextTranslationSchema` is prebuilt per key, so building a card row allocates
+    nothing for its labels. Adding a language only requires adding its texts to
+    `translations.json`.
+    """
+
+    def __init__(
+        self,
+        messages: Dict[str, Dict[str, str]],
+        default_language: str = DEFAULT_LANGUAGE,
+    ):
+        self.default_language = default_language
+        self.languages = tuple(
+            sys.intern(lang)
+            for lang in sorted({lang for texts in messages.values() for lang in texts})
+        )
+        self._messages = MappingProxyType(
+            {
+                sys.intern(key): MappingProxyType(
+                    {
+                        lang: sys.intern(texts.get(lang, texts[default_language]))
+                        for lang in self.languages
+                    }
+                )
+                for key, texts in messages.items()
+            }
+        )
+        self._translations = MappingProxyType(
+            {
+                key: TextTranslationSchema.model_construct(**texts)
+                for key, texts in self._messages.items()
+            }
+        )
+        self._literal = lru_cache(maxsize=4096)(self._build_literal)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "TranslationCatalog":
+        with open(path, encoding="utf-8") as catalog_file:
+            return cls(json.load(catalog_file))
+
+    def resolve_language(self, lang: Optional[str], default: str) -> Optional[str]:
+        """
+        Resolve the `lang` requested by a client.
+
+        Args:
+            lang (Optional[str]): The requested language code, `auto` for the
+                employee's language, or None to emit every language.
+            default (str): The employee's language, used for `auto`.
+
+        Returns:
+            Optional[str]: The language to emit, or None for every language.
+        """
+        if lang is None:
+            return None
+        if lang == AUTO_LANGUAGE:
+            lang = default
+        if lang not in self.languages:
+            raise ValueError(
+                {
+                    "error": "invalid_lang",
+                    "error_description": f"Unsupported language '{lang}'. Use one of: "
+                    f"{', '.join((AUTO_LANGUAGE, *self.languages))}",
+                }
+            )
+        return lang
+
+    def gettext(self, key: str, lang: str) -> str:
+        texts = self._messages[key]
+        return texts.get(lang) or texts[self.default_language]
+
+    def text(
+        self, key: str, lang: Optional[str] = None
+    ) -> Union[TextTranslationSchema, str]:
+        """Return the text for `key` in `lang`, or the shared translation of all languages."""
+        if lang:
+            return self.gettext(key, lang)
+        return self._translations[key]
+
+    def format(
+        self, key: str, lang: Optional[str] = None, **params
+    ) -> Union[TextTranslationSchema, str]:
+        """Same as `text` for a message with `str.format` placeholders."""
+        if lang:
+            return self.gettext(key, lang).format(**params)
+        return TextTranslationSchema.model_construct(
+            **{
+                lang: text.format(**params)
+                for lang, text in self._messages[key].items()
+            }
+        )
+
+    def literal(
+        self, value: str, lang: Optional[str] = None
+    ) -> Union[TextTranslationSchema, str]:
+        """Wrap a value which reads the same in every language (name, amount, date)."""
+        if lang:
+            return value
+        return self._literal(value)
+
+    def _build_literal(self, value: str) -> TextTranslationSchema:
+        return TextTranslationSchema.model_construct(
+            **dict.fromkeys(self.languages, value)
+        )
+
+
+catalog = TranslationCatalog.from_file(Path(__file__).with_name("translations.json"))
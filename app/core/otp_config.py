@@ -1,16 +1,3 @@
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from app.core.config import Settings, settings
 
-
-class Settings(BaseSettings):
-    otp_secret: str = Field(..., alias="OTP_SECRET")
-    otp_interval: int = Field(..., alias="OTP_INTERVAL")
-    otp_valid_window: int = Field(..., alias="OTP_VALID_WINDOW")
-
-    class Config:
-        env_file = ".env"
-        extra = "allow"
-        populate_by_name = True
-
-
-settings = Settings()
+__all__ = ["Settings", "settings"]
@@ -1,3 +1,7 @@
+import json
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.utils import get_openapi
@@ -5,15 +9,17 @@ from fastapi.responses import JSONResponse
 from starlette.status import (
     HTTP_403_FORBIDDEN,
     HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_429_TOO_MANY_REQUESTS,
     HTTP_500_INTERNAL_SERVER_ERROR,
 )
 
 from app.api.v1 import router as api_v1_router
+from app.core import settings
+from app.services.sms.dispatcher import sms_dispatcher
+from app.utils.responses import PydanticJSONResponse
 
 
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
+def build_openapi() -> dict:
     openapi_schema = get_openapi(
         title="Baobab API",
         version="1.0.0",
@@ -35,11 +41,63 @@ def custom_openapi():
                         }
                     },
                 }
-    app.openapi_schema = openapi_schema
+    return openapi_schema
+
+
+def custom_openapi():
+    if app.openapi_schema:
+        return app.openapi_schema
+    # Serve the document generated at build time when there is one, instead of
+    # walking every route on the first docs request.
+    if settings.openapi_file and os.path.exists(settings.openapi_file):
+        with open(settings.openapi_file) as openapi_file:
+            app.openapi_schema = json.load(openapi_file)
+    else:
+        app.openapi_schema = build_openapi()
     return app.openapi_schema
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await sms_dispatcher.start()
+    if settings.cache_warmer_enabled:
+        from app.services.warmer import cache_warmer
+
+        cache_warmer.start()
+    if settings.change_feed_enabled:
+        from app.services.invalidation import subscribe_cache_invalidation
+        from app.services.odoo.changes import get_change_feed
+
+        subscribe_cache_invalidation(get_change_feed())
+        get_change_feed().start(settings.change_feed_interval)
+    if settings.replica_enabled:
+        from app.services.odoo.replica import get_account_replica
+
+        get_account_replica().start(settings.replica_sync_interval)
+    yield
+    if settings.replica_enabled:
+        await get_account_replica().stop()
+    if settings.change_feed_enabled:
+        await get_change_feed().stop()
+    if settings.cache_warmer_enabled:
+        await cache_warmer.stop()
+    await sms_dispatcher.stop()
+
+
+app = FastAPI(default_response_class=PydanticJSONResponse, lifespan=lifespan)
+
+if settings.response_cache_enabled:
+    from app.utils.pubsub import get_pubsub
+    from app.utils.response_cache import ResponseCacheMiddleware, parse_routes
+
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        routes=parse_routes(settings.response_cache_routes),
+        stale_ttl=settings.response_cache_stale_ttl,
+        maxsize=settings.response_cache_size,
+        compress=settings.response_cache_compress,
+        pubsub=get_pubsub(),
+    )
 
 
 @app.exception_handler(RequestValidationError)
@@ -73,6 +131,15 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 or "You do not have permission to access this resource.",
             },
         )
+    elif exc.status_code == HTTP_429_TOO_MANY_REQUESTS:
+        return JSONResponse(
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "error": "too_many_requests",
+                "error_description": exc.detail or "Too many requests.",
+            },
+            headers=exc.headers,
+        )
     raise exc
 
 
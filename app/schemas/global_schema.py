@@ -1,12 +1,30 @@
-from typing import List, Optional
+from typing import Annotated, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, GetPydanticSchema
+from pydantic_core import core_schema
 
 
 class TextTranslationSchema(BaseModel):
     en: str = Field(..., description="The English translation.", example="Sales")
     fr: str = Field(..., description="The French translation.", example="Ventes")
 
+    class Config:
+        extra = "allow"
+        frozen = True
+
+
+def _serialize_by_runtime_type(source, handler):
+    # Serializing by the runtime type avoids pydantic trying each union member in turn
+    schema = handler(source)
+    schema["serialization"] = core_schema.simple_ser_schema("any")
+    return schema
+
+
+# Texts are plain strings when the client asks for a single language.
+Translatable = Annotated[
+    Union[TextTranslationSchema, str], GetPydanticSchema(_serialize_by_runtime_type)
+]
+
 
 class PaginationSchema(BaseModel):
     offset: int = Field(0, description="The number of records to skip.", example=0)
@@ -26,9 +44,7 @@ class FilterSchema(BaseModel):
     param: str = Field(
         ..., description="The parameter to filter the data.", example="sales"
     )
-    label: TextTranslationSchema = Field(
-        ..., description="The label to display in the filter."
-    )
+    label: Translatable = Field(..., description="The label to display in the filter.")
 
     def __eq__(self, other):
         return self.value == other.value and self.param == other.param
@@ -89,10 +105,10 @@ class CardComponentSchema(BaseModel):
 
 
 class RowSchema(BaseModel):
-    label: TextTranslationSchema = Field(
+    label: Translatable = Field(
         ..., description="The label for the row.", example="Incentive Type"
     )
-    value: Optional[TextTranslationSchema] = Field(
+    value: Optional[Translatable] = Field(
         ..., description="The value for the row.", example="New Customer bonus"
     )
 
@@ -112,7 +128,10 @@ class CardSchema(BaseModel):
     collapsed: CollapsedCardSchema = Field(
         ..., description="The collapsed view of the card."
     )
-    expanded: ExpandedSchema = Field(..., description="The expanded view of the card.")
+    expanded: Optional[ExpandedSchema] = Field(
+        None,
+        description="The expanded view of the card, null in the collapsed view.",
+    )
 
 
 class TaskCollapsedCardSchema(BaseModel):
@@ -149,14 +168,18 @@ class TaskExpandedCardSchema(BaseModel):
 
 
 class TaskCardSchema(BaseModel):
+    id: Optional[str] = Field(
+        None, description="Identifier for the card.", example="payg_account_1"
+    )
     filters: List[FilterSchema] = Field(
         [], description="The list of filters for the slow payer."
     )
     collapsed: TaskCollapsedCardSchema = Field(
         ..., description="The collapsed view of the card."
     )
-    expanded: TaskExpandedCardSchema = Field(
-        ..., description="The expanded view of the card."
+    expanded: Optional[TaskExpandedCardSchema] = Field(
+        None,
+        description="The expanded view of the card, null in the collapsed view.",
     )
 
 
@@ -180,3 +203,49 @@ class TaskSchema(BaseModel):
     component_cards: List[CardComponentSchema] = Field(
         [], description="The list of cards for the tasks."
     )
+
+
+class AgentTaskSchema(BaseModel):
+    employee_id: int = Field(..., description="The id of the agent.", example=42)
+    name: str = Field(..., description="The name of the agent.", example="Jane Doe")
+    task: TaskSchema = Field(..., description="The tasks of the agent.")
+
+
+class TeamTaskSchema(BaseModel):
+    agents: List[AgentTaskSchema] = Field(
+        [], description="The tasks of each agent of the team requested."
+    )
+    unauthorized_employee_ids: List[int] = Field(
+        [],
+        description="The employees requested who do not report to the current user.",
+        example=[7],
+    )
+
+
+class SyncSchema(BaseModel):
+    token: str = Field(
+        ...,
+        description="The token to send as `since` in the next sync.",
+        example="3f786850e387550fdab8",
+    )
+    full: bool = Field(
+        ...,
+        description="Whether every item is sent, the `since` token being unknown or expired.",
+        example=False,
+    )
+    removed: List[str] = Field(
+        [],
+        description="The ids of the items no longer on this page since the `since` token.",
+        example=["payg_account_12"],
+    )
+    order: List[str] = Field(
+        [],
+        description="The ids of every item of this page, in order, sent or not.",
+        example=["payg_account_7", "payg_account_3"],
+    )
+
+
+class TaskSyncSchema(TaskSchema):
+    sync: SyncSchema = Field(
+        ..., description="The sync state, `cards` only lists the cards changed."
+    )
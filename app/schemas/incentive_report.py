@@ -4,7 +4,12 @@ from typing import List
 
 from pydantic import BaseModel, Field, field_validator
 
-from app.schemas.global_schema import CardSchema, FilterSchema, PaginationSchema
+from app.schemas.global_schema import (
+    CardSchema,
+    FilterSchema,
+    PaginationSchema,
+    SyncSchema,
+)
 from app.schemas.odoo_record import Many2One
 
 
@@ -80,3 +85,18 @@ class IncentiveReportDetailsSchema(BaseModel):
     cards: List[CardSchema] = Field(
         ..., description="The list of incentive event cards."
     )
+
+
+class IncentiveReportDetailsSyncSchema(IncentiveReportDetailsSchema):
+    sync: SyncSchema = Field(
+        ..., description="The sync state, `cards` only lists the cards changed."
+    )
+
+
+class IncentiveReportSyncSchema(BaseModel):
+    reports: List[IncentiveReportSimpleSchema] = Field(
+        [], description="The reports added or changed."
+    )
+    sync: SyncSchema = Field(
+        ..., description="The sync state, removed reports are `incentive_report_<id>`."
+    )
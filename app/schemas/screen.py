@@ -3,7 +3,10 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.schemas.error import ErrorSchema
 from app.schemas.incentive_event import EventCategorySchema
+from app.schemas.incentive_report import IncentiveReportSimpleSchema
+from app.schemas.user import UserSchema
 
 
 class DateRangeSchema(BaseModel):
@@ -54,3 +57,27 @@ class SummarySimpleSchema(BaseModel):
 class SummarySchema(SummarySimpleSchema):
     current_report_id: int = Field(..., description="The Current report ID", example=70)
     last_report_id: int = Field(..., description="The last report ID", example=69)
+
+
+class SectionErrorSchema(ErrorSchema):
+    section: str = Field(
+        ..., description="The section which could not be built.", example="earnings"
+    )
+
+
+class BootstrapSchema(BaseModel):
+    user: Optional[UserSchema] = Field(
+        None, description="The employee profile, null if it could not be fetched."
+    )
+    earnings: Optional[SummarySchema] = Field(
+        None, description="The homepage earnings, null if they could not be fetched."
+    )
+    tasks: Optional[List[TasksSchema]] = Field(
+        None, description="The homepage tasks, null if they could not be fetched."
+    )
+    reports: Optional[List[IncentiveReportSimpleSchema]] = Field(
+        None, description="The validated reports, null if they could not be fetched."
+    )
+    errors: List[SectionErrorSchema] = Field(
+        [], description="The errors of the sections which could not be built."
+    )
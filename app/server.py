@@ -0,0 +1,134 @@
+"""
+Production entrypoint: `python -m app.server`.
+
+Runs gunicorn with uvicorn workers on uvloop and httptools. The app is imported
+once in the master before forking (`preload_app`), so the workers share the
+imported modules copy-on-write. The worker count follows the CPUs and memory the
+container may use unless `WEB_CONCURRENCY` is set; with a single worker uvicorn
+is run directly, without a gunicorn master, and exits after `MAX_REQUESTS` for
+the container to be restarted.
+
+The auth state (revoked tokens, verified-token and claims caches, refresh
+tokens) and the response cache are only shared between workers through the
+`SHARED_STORE_URL` store, so without one a single worker is run.
+"""
+
+import math
+import os
+import random
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+from app.core import settings
+
+
+class UvicornWorker(BaseUvicornWorker):
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+def _read_cgroup(path: str) -> str:
+    try:
+        with open(path) as cgroup_file:
+            return cgroup_file.read().strip()
+    except OSError:
+        return ""
+
+
+def available_cpus() -> float:
+    """CPUs usable by the process, honouring the cgroup quota of the container."""
+    cpus = len(os.sched_getaffinity(0))
+    quota = _read_cgroup("/sys/fs/cgroup/cpu.max").split()
+    if len(quota) == 2 and quota[0] != "max":
+        cpus = min(cpus, int(quota[0]) / int(quota[1]))
+    else:
+        quota_us = _read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period_us = _read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota_us.lstrip("-").isdigit() and int(quota_us) > 0 and period_us:
+            cpus = min(cpus, int(quota_us) / int(period_us))
+    return cpus
+
+
+def available_memory() -> int:
+    """Bytes of memory usable by the process, from the cgroup limit if any."""
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        limit = _read_cgroup(path)
+        if limit.isdigit():
+            memory = min(memory, int(limit))
+    return memory
+
+
+def worker_count() -> int:
+    if not settings.shared_store_url:
+        if (settings.web_concurrency or 1) > 1:
+            raise SystemExit(
+                "WEB_CONCURRENCY > 1 needs SHARED_STORE_URL: a logout on one worker "
+                "would not reach the others"
+            )
+        return 1
+    if settings.web_concurrency:
+        return settings.web_concurrency
+    by_cpu = max(1, math.ceil(available_cpus()))
+    by_memory = available_memory() // (settings.worker_memory_mb * 1024 * 1024)
+    return max(1, min(by_cpu, by_memory))
+
+
+def gunicorn_options(workers: int) -> dict:
+    return {
+        "bind": f"0.0.0.0:{settings.port}",
+        "workers": workers,
+        "worker_class": "app.server.UvicornWorker",
+        "preload_app": True,
+        # Recycle workers after a number of requests to cap memory growth; the
+        # jitter keeps them from all restarting at once.
+        "max_requests": settings.max_requests,
+        "max_requests_jitter": settings.max_requests_jitter,
+        # Longer than the idle timeout of the load balancer in front, so that it
+        # closes idle connections and never reuses one we already closed.
+        "keepalive": settings.keepalive,
+        "timeout": settings.worker_timeout,
+        "graceful_timeout": settings.graceful_timeout,
+        "accesslog": "-",
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    workers = worker_count()
+    if workers == 1:
+        import uvicorn
+
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=settings.port,
+            loop="uvloop",
+            http="httptools",
+            timeout_keep_alive=settings.keepalive,
+            limit_max_requests=settings.max_requests
+            + random.randint(0, settings.max_requests_jitter),
+        )
+    else:
+        Server(gunicorn_options(workers)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from typing import List
+
+from app.core import settings
+from app.utils.cache import TTLCache
+
+# Agents who made a request recently, by employee id, with the claims of their
+# last request. The cache warmer keeps their data fresh.
+active_agents = TTLCache(
+    maxsize=settings.cache_warmer_max_agents, ttl=settings.cache_warmer_active_window
+)
+
+
+def record_activity(user_context: dict) -> None:
+    if user_context.get("can_use_application_agent"):
+        active_agents.set(str(user_context["sub"]), user_context)
+
+
+def recently_active_agents() -> List[dict]:
+    """The claims of the agents active within `CACHE_WARMER_ACTIVE_WINDOW`."""
+    contexts = (active_agents.get(sub) for sub in active_agents.keys())
+    return [context for context in contexts if context is not None]
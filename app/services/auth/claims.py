@@ -0,0 +1,44 @@
+from app.core.odoo_config import settings
+from app.utils.cache import TTLCache
+
+# Version of the `user_context` shape. Compact tokens carry it as `cv`; bump it
+# when the context changes so that older tokens are refused and refreshed.
+CLAIMS_VERSION = 1
+
+# `user_context` of the employees with a compact access token, by `sub`.
+claims_cache = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.claims_cache_ttl
+)
+
+
+def build_user_context(employee: dict) -> dict:
+    """Build the `user_context` of an `hr.employee` record."""
+    context = {key: value for key, value in employee.items() if key != "id"}
+    context["sub"] = str(employee.get("id", employee.get("sub")))
+    return context
+
+
+def cache_user_context(context: dict) -> None:
+    claims_cache.set(str(context["sub"]), build_user_context(context))
+
+
+def compact_claims(context: dict) -> dict:
+    """Keep only the claims of a compact access token, besides `exp`."""
+    return {"sub": str(context["sub"]), "cv": CLAIMS_VERSION}
+
+
+def get_user_context(sub: str) -> dict:
+    """
+    Return the `user_context` of the employee `sub`, from the claims cache or
+    else from Odoo.
+
+    Raises:
+        LookupError: If the employee does not exist.
+    """
+    context = claims_cache.get(sub)
+    if context is None:
+        from app.services.odoo.service import OdooService
+
+        context = build_user_context(OdooService().search_employee_by_id(int(sub)))
+        claims_cache.set(sub, context)
+    return dict(context)
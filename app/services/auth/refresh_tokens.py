@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from app.core.odoo_config import settings
+from app.services.auth.claims import claims_cache
+from app.services.auth.revocation import revocation_denylist
+from app.utils.concurrency import executor
+from app.utils.store import LocalSharedStore, SharedStore, get_shared_store
+
+# Rotated-out tokens remembered per employee to detect their reuse.
+MAX_PREVIOUS_TOKENS = 5
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenRegistry:
+    """
+    Track the refresh token of each employee by hash in the shared store.
+
+    Refreshing rotates the token, and the rotated-out hashes are remembered: a
+    client presenting one of them again means the token leaked, so the employee
+    is logged out everywhere. Every change is written through to the
+    `refresh_token` field of `hr.employee` in the background. Odoo is only
+    queried when the registry has no entry for the employee, e.g. for tokens
+    issued before it existed.
+
+    Without a `SHARED_STORE_URL` the registry only lives in this process, and
+    other processes would still accept a token rotated out or revoked here.
+    Odoo then stays the reference: it is written synchronously and every check
+    is made against it, the local entries only serving to detect reuse.
+    """
+
+    key_prefix = "refresh:"
+
+    def __init__(self, odoo_service, store: Optional[SharedStore] = None):
+        self.odoo_service = odoo_service
+        self.store = store or get_shared_store()
+        self.shared = not isinstance(self.store, LocalSharedStore)
+        self.ttl = settings.refresh_token_expire * 24 * 3600
+
+    def _get(self, employee_id: int) -> Optional[dict]:
+        value = self.store.get(f"{self.key_prefix}{employee_id}")
+        return json.loads(value) if value else None
+
+    def _set(self, employee_id: int, entry: dict) -> None:
+        self.store.set(f"{self.key_prefix}{employee_id}", json.dumps(entry), self.ttl)
+
+    def _write_through(self, employee_id: int, token: str) -> None:
+        if not self.shared:
+            self.odoo_service.set_refresh_token(employee_id, token)
+            return
+        future = executor.submit(
+            self.odoo_service.set_refresh_token, employee_id, token
+        )
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        if future.exception():
+            logging.error(f"Refresh token write-through failed: {future.exception()}")
+
+    @staticmethod
+    def _invalid(error: str, description: str) -> ValueError:
+        return ValueError({"error": error, "error_description": description})
+
+    def check(self, employee_id: int, token: str) -> None:
+        """
+        Check that `token` is the current refresh token of the employee.
+
+        Raises:
+            ValueError: If the token is unknown, revoked or reused.
+        """
+        token_hash = hash_token(token)
+        entry = self._get(employee_id)
+        if entry is None:
+            self.odoo_service.check_refresh_token(employee_id, token)
+            self._set(employee_id, {"current": token_hash, "previous": []})
+            return
+        if entry["current"] and entry["current"] == token_hash:
+            if not self.shared:
+                self.odoo_service.check_refresh_token(employee_id, token)
+            return
+        if token_hash in entry["previous"]:
+            logging.warning(f"Refresh token reused for employee {employee_id}")
+            self.revoke(employee_id)
+            raise self._invalid(
+                "Invalid Refresh Token",
+                "The refresh token was already used, please log in again",
+            )
+        if not self.shared:
+            # Issued by another process, which wrote it to Odoo first.
+            self.odoo_service.check_refresh_token(employee_id, token)
+            self._set(
+                employee_id, {"current": token_hash, "previous": entry["previous"]}
+            )
+            return
+        raise self._invalid(
+            "Invalid Refresh Token", "The refresh token provided is invalid"
+        )
+
+    def _replace(self, employee_id: int, token_hash: Optional[str], rotate: bool):
+        entry = self._get(employee_id) or {"current": None, "previous": []}
+        previous = entry["previous"]
+        if rotate and entry["current"]:
+            previous = [entry["current"]] + previous
+        self._set(
+            employee_id,
+            {"current": token_hash, "previous": previous[:MAX_PREVIOUS_TOKENS]},
+        )
+
+    def issue(self, employee_id: int, token: str, rotate: bool = False) -> None:
+        """
+        Make `token` the current refresh token of the employee.
+
+        Args:
+            employee_id (int): The employee the token was issued to.
+            token (str): The new refresh token.
+            rotate (bool): Whether `token` replaces the current one on refresh,
+                in which case presenting the current one again counts as reuse.
+                A new login supersedes the current token without that.
+        """
+        self._replace(employee_id, hash_token(token), rotate)
+        self._write_through(employee_id, token)
+
+    def revoke(self, employee_id: int) -> None:
+        """
+        Log the employee out: no refresh token is valid until the next login, and
+        the access tokens issued so far are denied.
+        """
+        self._replace(employee_id, None, rotate=True)
+        revocation_denylist.revoke(str(employee_id))
+        claims_cache.pop(str(employee_id))
+        self._write_through(employee_id, "")
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from typing import Optional
+
+from app.core.odoo_config import settings
+from app.utils.bloom import BloomFilter
+from app.utils.cache import TTLCache
+from app.utils.pubsub import PubSub, get_pubsub
+
+REVOCATION_CHANNEL = "auth:revocations"
+
+
+class RevocationDenylist:
+    """
+    Employees logged out recently, whose older access tokens are refused.
+
+    Each entry is `sub -> revoked_at` and lives as long as an access token, after
+    which every token it could deny has expired anyway. A Bloom filter answers
+    the common "never revoked" case without touching the entries. Revocations
+    are broadcast over pub/sub so every instance denies the same tokens.
+    """
+
+    def __init__(
+        self, ttl: float, pubsub: Optional[PubSub] = None, capacity: int = 100_000
+    ):
+        self.ttl = ttl
+        self._entries = TTLCache(maxsize=capacity, ttl=ttl)
+        # Twice the entries: a rebuild keeps at most `capacity` live subs, so the
+        # next one is at least `capacity` revocations away.
+        self._filter = BloomFilter(2 * capacity)
+        self._lock = threading.Lock()
+        self.pubsub = pubsub
+        if pubsub is not None:
+            pubsub.subscribe(REVOCATION_CHANNEL, self._receive)
+
+    def _add(self, sub: str, revoked_at: float) -> None:
+        with self._lock:
+            if self._filter.count >= self._filter.capacity:
+                self._rebuild()
+            self._entries.set(sub, max(revoked_at, self._entries.get(sub, 0)))
+            self._filter.add(sub)
+
+    def _rebuild(self) -> None:
+        # Expired subs stay in the filter until it is rebuilt from live entries.
+        self._filter.clear()
+        for sub in self._entries.keys():
+            if sub in self._entries:
+                self._filter.add(sub)
+
+    def _receive(self, message: str) -> None:
+        data = json.loads(message)
+        self._add(data["sub"], data["revoked_at"])
+
+    def revoke(self, sub: str) -> None:
+        """Deny every access token of `sub` issued until now."""
+        revoked_at = time.time()
+        self._add(str(sub), revoked_at)
+        if self.pubsub is not None:
+            self.pubsub.publish(
+                REVOCATION_CHANNEL,
+                json.dumps({"sub": str(sub), "revoked_at": revoked_at}),
+            )
+
+    def is_revoked(self, payload: dict) -> bool:
+        sub = str(payload.get("sub"))
+        if sub not in self._filter:
+            return False
+        revoked_at = self._entries.get(sub)
+        if revoked_at is None:
+            return False
+        issued_at = payload.get("iat")
+        if issued_at is None:
+            # Tokens issued before `iat` was added: derive it from `exp`.
+            issued_at = payload.get("exp", 0) - self.ttl
+        # `iat` is in whole seconds: a token issued in the second of the logout
+        # is let through, rather than denying the next login for its lifetime.
+        return issued_at < int(revoked_at)
+
+
+revocation_denylist = RevocationDenylist(
+    ttl=settings.access_token_expire * 60, pubsub=get_pubsub()
+)
@@ -0,0 +1,80 @@
+"""
+Drop the cached data an Odoo change makes stale, as the change feed reports it.
+
+Changes are mapped to the employee whose data they touch: the responsible agent
+of an account, the beneficiary of an incentive event. The cache warmer or the
+next request then reloads only that data.
+
+The responsible agent last seen for each account is kept in a cache store,
+so that a reassigned account also drops the data of its previous agent. An
+account reassigned before the feed ever saw it only drops the new agent's.
+"""
+
+from typing import Optional
+
+from app.services.main import homepage_key
+from app.services.odoo.changes import ChangeEvent, ChangeFeed
+from app.services.odoo.counters import (
+    TASK_HYPERCARE,
+    TASK_SLOW_PAYER,
+    task_counter_cache,
+)
+from app.services.odoo.priority import worklist_key
+from app.services.odoo.service import incentive_reports_key
+from app.utils.response_cache import invalidate_responses
+from app.utils.shared_cache import reference_cache
+from app.utils.store import get_cache_store
+
+# Seconds the responsible agent of an account is remembered.
+ACCOUNT_AGENT_TTL = 30 * 24 * 3600
+
+
+def _record_id(value) -> Optional[int]:
+    # Many2one fields read as `[id, name]`, or False when empty.
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value or None
+
+
+def _agent_tasks_changed(employee_id: int) -> None:
+    for task in (TASK_SLOW_PAYER, TASK_HYPERCARE):
+        task_counter_cache.pop((employee_id, task))
+    reference_cache.delete(worklist_key(employee_id))
+    invalidate_responses(sub=employee_id, path="/api/v1/employee/tasks")
+
+
+def _account_changed(event: ChangeEvent) -> None:
+    employee_id = _record_id(event.values.get("responsible_agent_employee_id"))
+    store = get_cache_store("account_agent")
+    key = f"account_agent:{event.record_id}"
+    previous = store.get(key)
+    if previous and int(previous) != employee_id:
+        _agent_tasks_changed(int(previous))
+    if employee_id is None:
+        if previous:
+            store.delete(key)
+        return
+    store.set(key, str(employee_id), ACCOUNT_AGENT_TTL)
+    _agent_tasks_changed(employee_id)
+
+
+def _event_changed(event: ChangeEvent) -> None:
+    employee_id = _record_id(event.values.get("beneficiary_employee_id"))
+    if employee_id is None:
+        return
+    reference_cache.delete(homepage_key(employee_id))
+    invalidate_responses(sub=employee_id, path="/api/v1/employee/report")
+    invalidate_responses(sub=employee_id, path="/api/v1/screen/homepage")
+
+
+def _report_changed(event: ChangeEvent) -> None:
+    generic_job_id = _record_id(event.values.get("generic_job_id"))
+    company_id = _record_id(event.values.get("company_id"))
+    if generic_job_id is not None and company_id is not None:
+        reference_cache.delete(incentive_reports_key(generic_job_id, company_id))
+
+
+def subscribe_cache_invalidation(feed: ChangeFeed) -> None:
+    feed.subscribe("payg.account", _account_changed)
+    feed.subscribe("incentive.event", _event_changed)
+    feed.subscribe("incentive.report", _report_changed)
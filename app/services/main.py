@@ -1,9 +1,23 @@
+import asyncio
+import logging
 from collections import defaultdict
-from typing import List
+from functools import partial
+from typing import List, Optional
 
+from starlette.concurrency import run_in_threadpool
+
+from app.core import settings
 from app.schemas.incentive_event import IncentiveEventMinimalSchema
-from app.schemas.screen import DateRangeSchema, SummarySchema, TasksSchema
+from app.schemas.screen import (
+    BootstrapSchema,
+    DateRangeSchema,
+    SectionErrorSchema,
+    SummarySchema,
+    TasksSchema,
+)
+from app.services.odoo.exceptions import UnauthorizedEmployeeException
 from app.services.odoo.service import OdooService
+from app.utils.shared_cache import reference_cache
 
 # Constants for country data
 AVAILABLE_COUNTRIES = [
@@ -56,8 +70,7 @@ def _group_incentive_events_by_category(records):
     ]
 
 
-def fetch_homepage(user_context: dict) -> SummarySchema:
-    odoo_service = OdooService(user_context)
+def _query_homepage(user_context: dict, odoo_service: OdooService) -> SummarySchema:
     status = "in_progress"
     latest_report_ids = odoo_service.search_latest_report_by_employee()
     if not latest_report_ids:
@@ -90,16 +103,105 @@ def fetch_homepage(user_context: dict) -> SummarySchema:
     )
 
 
-def get_homepage_tasks(user_context: dict) -> List[TasksSchema]:
+def homepage_key(employee_id) -> str:
+    """Key of the homepage summary of an employee in the reference cache."""
+    return f"homepage:{employee_id}"
+
+
+def _build_homepage(user_context: dict, odoo_service: OdooService) -> dict:
+    return _query_homepage(user_context, odoo_service).model_dump(mode="json")
+
+
+def fetch_homepage(
+    user_context: dict, odoo_service: Optional[OdooService] = None
+) -> SummarySchema:
+    """
+    Summarize the earnings of the current report of the employee.
+
+    The summary is kept in the shared cache for `HOMEPAGE_CACHE_TTL` seconds, and
+    the cache warmer reloads it ahead of expiry for the agents who are active.
+    """
+    odoo_service = odoo_service or OdooService(user_context)
+    summary = reference_cache.get_or_load(
+        homepage_key(user_context["sub"]),
+        partial(_build_homepage, user_context, odoo_service),
+        ttl=settings.homepage_cache_ttl,
+    )
+    return SummarySchema.model_validate(summary)
+
+
+def refresh_homepage(user_context: dict, min_age: float = 0) -> bool:
+    """Reload the cached homepage summary of the employee, see `fetch_homepage`."""
+    return reference_cache.refresh(
+        homepage_key(user_context["sub"]),
+        partial(_build_homepage, user_context, OdooService(user_context)),
+        ttl=settings.homepage_cache_ttl,
+        min_age=min_age,
+    )
+
+
+def get_homepage_tasks(
+    user_context: dict, odoo_service: Optional[OdooService] = None
+) -> List[TasksSchema]:
     """
     Build a list of dashboard components based on data retrieved from Odoo.
 
     Args:
+        user_context (dict): The claims of the authenticated employee.
         odoo_service (OdooService): Instance of OdooService to fetch data.
-        employee_id (int): The employee's unique ID.
 
     Returns:
         list: A list of TasksSchema objects for the dashboard.
     """
-    odoo_service = OdooService(user_context)
+    odoo_service = odoo_service or OdooService(user_context)
     return odoo_service.get_employee_tasks()
+
+
+def _section_error(section: str, exc: Exception) -> SectionErrorSchema:
+    if isinstance(exc, ValueError) and exc.args and isinstance(exc.args[0], dict):
+        return SectionErrorSchema(section=section, **exc.args[0])
+    if isinstance(exc, UnauthorizedEmployeeException):
+        return SectionErrorSchema(
+            section=section, error=exc.message, error_description=exc.details
+        )
+    return SectionErrorSchema(
+        section=section, error="internal_server_error", error_description=str(exc)
+    )
+
+
+async def fetch_bootstrap(user_context: dict) -> BootstrapSchema:
+    """
+    Build every section the application loads on launch as a single plan.
+
+    The sections share one OdooService, so the lookups they have in common (the
+    employee, the incentive reports) are fetched once, and they run concurrently
+    in the thread pool. A section which fails is reported in `errors` and left
+    null without failing the others.
+
+    Args:
+        user_context (dict): The claims of the authenticated employee.
+
+    Returns:
+        BootstrapSchema: The profile, earnings, tasks and reports of the employee.
+    """
+    odoo_service = OdooService(user_context)
+    sections = {
+        "user": odoo_service.get_employee_profile,
+        "earnings": partial(fetch_homepage, user_context, odoo_service),
+        "tasks": partial(get_homepage_tasks, user_context, odoo_service),
+        "reports": odoo_service.search_validate_report_by_employee,
+    }
+    results = await asyncio.gather(
+        *(run_in_threadpool(section) for section in sections.values()),
+        return_exceptions=True,
+    )
+    payload = {"errors": []}
+    for section, result in zip(sections, results):
+        if isinstance(result, Exception):
+            logging.error(f"Bootstrap section {section} failed: {result}")
+            payload["errors"].append(_section_error(section, result))
+            result = None
+        elif isinstance(result, BaseException):
+            raise result
+        payload[section] = result
+    return BootstrapSchema.model_construct(**payload)
@@ -0,0 +1,387 @@
+"""
+Incremental change feed of Odoo records, driven by `write_date`.
+
+`ChangeFeed` pulls the records of each model written since its watermark, in
+batches ordered by (`write_date`, `id`), and hands each one to the in-process
+subscribers of the model as a `ChangeEvent`, at least once. The watermark is persisted after
+every batch, so a restarted feed resumes where it stopped. The first poll of a
+model without a watermark starts from its latest record instead of replaying
+the whole history, unless the feed is given another `initial` watermark.
+
+Odoo stamps `write_date` when the transaction starts, so a record may only be
+committed after records with a later stamp were read. Each poll thus reads
+again the `lookback` seconds before the watermark, and skips the records it
+already published with the same `write_date`.
+
+The feed only needs `search_records` from its client, so it runs as well
+against `OdooAPI` as against an in-memory fake.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import settings
+
+# Last record seen of a model: its `write_date` and id.
+Watermark = Tuple[str, int]
+# Watermark before every record.
+EPOCH: Watermark = ("1970-01-01 00:00:00", 0)
+# Domain clause reading archived records too, as `active_test=False` does.
+WITH_ARCHIVED = ["active", "in", [True, False]]
+ODOO_DATETIME = "%Y-%m-%d %H:%M:%S"
+
+FEED_FIELDS: Dict[str, List[str]] = {
+    "payg.account": [
+        "id",
+        "write_date",
+        "account_ext_id",
+        "active",
+        "create_date",
+        "registration_date",
+        "client_id",
+        "nb_days_overdue",
+        "account_status",
+        "account_segmentation_id",
+        "responsible_agent_employee_id",
+    ],
+    "incentive.event": [
+        "id",
+        "write_date",
+        "beneficiary_employee_id",
+        "report_id",
+        "event_status",
+        "event_date",
+        "value",
+    ],
+    "incentive.report": [
+        "id",
+        "write_date",
+        "generic_job_id",
+        "company_id",
+        "status",
+        "start_date",
+        "end_date",
+    ],
+}
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    model: str
+    record_id: int
+    write_date: str
+    values: dict
+
+
+Handler = Callable[[ChangeEvent], None]
+
+
+class WatermarkStore(ABC):
+    @abstractmethod
+    def load(self, model: str) -> Optional[Watermark]:
+        """Return the persisted watermark of `model`, None if there is none."""
+
+    @abstractmethod
+    def save(self, model: str, watermark: Watermark) -> None:
+        """Persist the watermark of `model`."""
+
+
+class MemoryWatermarkStore(WatermarkStore):
+    def __init__(self):
+        self._watermarks: Dict[str, Watermark] = {}
+
+    def load(self, model: str) -> Optional[Watermark]:
+        return self._watermarks.get(model)
+
+    def save(self, model: str, watermark: Watermark) -> None:
+        self._watermarks[model] = watermark
+
+
+class FileWatermarkStore(WatermarkStore):
+    """
+    Watermarks kept in a JSON file. Feeds of several processes may share the
+    file: it is updated under `flock` and only ever moves forward.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, model: str) -> Optional[Watermark]:
+        watermark = self._read().get(model)
+        return tuple(watermark) if watermark else None
+
+    def save(self, model: str, watermark: Watermark) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                if tuple(state.get(model) or ("", 0)) >= tuple(watermark):
+                    return
+                state[model] = list(watermark)
+                temporary_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temporary_path, "w") as state_file:
+                    json.dump(state, state_file)
+                os.replace(temporary_path, self.path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ChangeFeed:
+    def __init__(
+        self,
+        client,
+        models: Dict[str, List[str]],
+        watermarks: Optional[WatermarkStore] = None,
+        batch_size: int = 500,
+        max_batches: int = 20,
+        initial: Optional[Watermark] = None,
+        lookback: float = 60,
+        archived: Iterable[str] = ("payg.account",),
+    ):
+        """
+        Args:
+            client: The Odoo client, anything with `OdooAPI.search_records`.
+            models (dict): The fields to read by model name, `id` and
+                `write_date` included.
+            watermarks (WatermarkStore): Where the watermarks are persisted, in
+                memory by default.
+            batch_size (int): The records read per query.
+            max_batches (int): The queries per model and poll at most, the rest
+                is left to the next poll.
+            initial (Watermark): Where to start when no watermark is persisted,
+                `EPOCH` to replay every record. The latest record by default.
+            lookback (float): The seconds before the watermark read again for
+                the records committed late.
+            archived (Iterable[str]): The models whose archived records are
+                read too, so that archiving a record is a change.
+        """
+        self.client = client
+        self.models = models
+        self.watermarks = watermarks or MemoryWatermarkStore()
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.initial = initial
+        self.lookback = lookback
+        self.archived = set(archived)
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._current: Dict[str, Watermark] = {}
+        # `write_date` of the records published within the look-back, by id.
+        self._published: Dict[str, Dict[int, str]] = defaultdict(dict)
+        self._caught_up: Dict[str, bool] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, model: str, handler: Handler) -> None:
+        """Call `handler` with each change of `model`, on the polling thread."""
+        self._handlers[model].append(handler)
+
+    def _publish(self, event: ChangeEvent) -> None:
+        for handler in list(self._handlers[event.model]):
+            try:
+                handler(event)
+            except Exception as e:
+                logging.error(f"Subscriber of {event.model} changes failed: {e}")
+
+    def _domain(self, model: str, domain: list) -> list:
+        return domain + [WITH_ARCHIVED] if model in self.archived else domain
+
+    def _latest(self, model: str) -> Watermark:
+        records = self.client.search_records(
+            model,
+            self._domain(model, []),
+            ["id", "write_date"],
+            0,
+            1,
+            "write_date desc, id desc",
+        )
+        if not records:
+            return EPOCH
+        return (records[0]["write_date"], records[0]["id"])
+
+    def watermark(self, model: str) -> Watermark:
+        if model not in self._current:
+            self._current[model] = (
+                self.watermarks.load(model) or self.initial or self._latest(model)
+            )
+        return self._current[model]
+
+    def _read(
+        self,
+        model: str,
+        after: Watermark,
+        until: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[List[dict]]:
+        """
+        Read the batches of records of `model` after `after`, in (`write_date`,
+        `id`) order: at most `max_batches` of them, or every one up to the
+        `write_date` `until` when given.
+        """
+        write_date, record_id = after
+        batches = 0
+        while until is not None or batches < self.max_batches:
+            domain = [
+                "|",
+                ["write_date", ">", write_date],
+                "&",
+                ["write_date", "=", write_date],
+                ["id", ">", record_id],
+            ]
+            if until is not None:
+                domain.append(["write_date", "<=", until])
+            records = self.client.search_records(
+                model,
+                self._domain(model, domain),
+                fields or self.models[model],
+                0,
+                self.batch_size,
+                "write_date asc, id asc",
+            )
+            batches += 1
+            if records:
+                yield records
+                write_date, record_id = records[-1]["write_date"], records[-1]["id"]
+            if len(records) < self.batch_size:
+                return
+
+    def _publish_new(self, model: str, records: List[dict]) -> int:
+        published = self._published[model]
+        count = 0
+        for record in records:
+            if published.get(record["id"]) == record["write_date"]:
+                continue
+            published[record["id"]] = record["write_date"]
+            self._publish(
+                ChangeEvent(model, record["id"], record["write_date"], record)
+            )
+            count += 1
+        return count
+
+    def _look_back(self, model: str, watermark: Watermark) -> int:
+        """
+        Publish the records of the `lookback` seconds before `watermark` that
+        were not published yet. The window is scanned on `id` and `write_date`
+        only, the records themselves are read for the new ones alone.
+        """
+        since = (
+            datetime.strptime(watermark[0], ODOO_DATETIME)
+            - timedelta(seconds=self.lookback)
+        ).strftime(ODOO_DATETIME)
+        published = self._published[model]
+        for record_id in [
+            record_id
+            for record_id, write_date in published.items()
+            if write_date < since
+        ]:
+            del published[record_id]
+        count = 0
+        for stamps in self._read(
+            model, (since, 0), until=watermark[0], fields=["id", "write_date"]
+        ):
+            new_ids = [
+                stamp["id"]
+                for stamp in stamps
+                if published.get(stamp["id"]) != stamp["write_date"]
+            ]
+            if new_ids:
+                records = self.client.search_records(
+                    model,
+                    self._domain(model, [["id", "in", new_ids]]),
+                    self.models[model],
+                    0,
+                    False,
+                    "write_date asc, id asc",
+                )
+                count += self._publish_new(model, records)
+        return count
+
+    def reload_watermark(self, model: str) -> None:
+        """Read the watermark of `model` from the store again on the next poll."""
+        self._current.pop(model, None)
+
+    def poll(self, model: str) -> int:
+        """
+        Publish the changes of `model` since its watermark, and the ones
+        committed late within the look-back.
+
+        A record may still be published more than once, e.g. after a restart:
+        subscribers must be idempotent.
+
+        Returns:
+            int: The number of changes published.
+        """
+        watermark = self.watermark(model)
+        count = 0
+        if watermark != EPOCH and self.lookback > 0:
+            count += self._look_back(model, watermark)
+        batches = 0
+        caught_up = True
+        for records in self._read(model, watermark):
+            count += self._publish_new(model, records)
+            watermark = (records[-1]["write_date"], records[-1]["id"])
+            self.watermarks.save(model, watermark)
+            self._current[model] = watermark
+            batches += 1
+            caught_up = len(records) < self.batch_size
+        self._caught_up[model] = caught_up or batches < self.max_batches
+        return count
+
+    def caught_up(self, model: str) -> bool:
+        """Whether the last poll of `model` read every change up to its time."""
+        return self._caught_up.get(model, False)
+
+    def poll_all(self) -> Dict[str, int]:
+        published = {}
+        for model in self.models:
+            try:
+                published[model] = self.poll(model)
+            except Exception as e:
+                logging.error(f"Change feed of {model} failed: {e}")
+        return published
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            published = await run_in_threadpool(self.poll_all)
+            logging.debug(f"Change feed published {published}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        """Poll every model every `interval` seconds from the event loop."""
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+@lru_cache(maxsize=None)
+def get_change_feed() -> ChangeFeed:
+    from .client import OdooAPI
+
+    return ChangeFeed(
+        OdooAPI(),
+        FEED_FIELDS,
+        FileWatermarkStore(settings.change_feed_state_file),
+        batch_size=settings.change_feed_batch_size,
+        lookback=settings.change_feed_lookback,
+    )
@@ -1,20 +1,45 @@
+import threading
 import xmlrpc.client
+from functools import lru_cache
 
 from app.core.odoo_config import settings
 
 
+@lru_cache(maxsize=None)
+def _authenticate(url: str, db: str, username: str, password: str) -> int:
+    common = xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common")
+    return common.authenticate(db, username, password, {})
+
+
 class OdooAPI:
     def __init__(self, uuid=None):
         self.url = settings.odoo_url
         self.db = settings.odoo_db
         self.username = settings.odoo_username
         self.password = settings.odoo_password
-        self.common = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/common")
-        self.uid = settings.odoo_uuid or self._get_uuid()
-        self.models = self._get_models()
+        # ServerProxy keeps one HTTP connection and is not thread-safe, so every
+        # thread running queries for this client gets its own proxy. Proxies and
+        # the handshake are deferred to the first query.
+        self._local = threading.local()
+
+    @property
+    def uid(self):
+        # Authenticated once per process, and only when ODOO_UUID is not set.
+        return settings.odoo_uuid or self._get_uuid()
+
+    @property
+    def models(self):
+        models = getattr(self._local, "models", None)
+        if models is None:
+            models = self._local.models = self._get_models()
+        return models
 
     def _get_uuid(self):
-        return self.common.authenticate(self.db, self.username, self.password, {})
+        uid = _authenticate(self.url, self.db, self.username, self.password)
+        if not uid:
+            # Do not remember a failed login.
+            _authenticate.cache_clear()
+        return uid
 
     def _get_models(self):
         if self.uid:
@@ -44,6 +69,13 @@ class OdooAPI:
             attributes,
         )
 
+    def count_records(self, model, domain):
+        if not self.models:
+            raise Exception("Please connect to Odoo first.")
+        return self.models.execute_kw(
+            self.db, self.uid, self.password, model, "search_count", [domain]
+        )
+
     def create_record(self, model, values, context=None):
         if context is None:
             context = {}
@@ -56,8 +88,9 @@ class OdooAPI:
     def update_record(self, model, record_id, values):
         if not self.models:
             raise Exception("Please connect to Odoo first.")
+        record_ids = record_id if isinstance(record_id, list) else [record_id]
         return self.models.execute_kw(
-            self.db, self.uid, self.password, model, "write", [[record_id], values]
+            self.db, self.uid, self.password, model, "write", [record_ids, values]
         )
 
     def delete_record(self, model, record_ids):
@@ -0,0 +1,66 @@
+import logging
+from typing import Callable, Dict
+
+from app.core.odoo_config import settings
+from app.utils.cache import TTLCache
+from app.utils.concurrency import run_concurrently
+
+TASK_REPOSSESSION = "repossession"
+TASK_TODO = "todo"
+TASK_SLOW_PAYER = "slow_payer"
+TASK_HYPERCARE = "hypercare"
+
+# Open task counts by (employee id, task). The task lists refresh their counter
+# whenever an agent opens them, so the homepage stays in step with the lists.
+task_counter_cache = TTLCache(maxsize=10000, ttl=settings.task_counter_ttl)
+
+
+def refresh_task_counter(employee_id: int, task: str, count: int) -> None:
+    task_counter_cache.set((employee_id, task), count)
+
+
+class TaskCounterService:
+    """
+    Count the open tasks of an agent for the homepage.
+
+    Counts are cached per employee for `TASK_COUNTER_TTL` seconds. The counts
+    missing from the cache are queried concurrently, so the homepage waits on the
+    slowest count instead of on every count in sequence.
+    """
+
+    def __init__(self, odoo_service):
+        self.odoo_service = odoo_service
+        self.employee_id = int(odoo_service.user_context["sub"])
+
+    def _count_queries(self) -> Dict[str, Callable[[], int]]:
+        # Repossessions and to-dos have no Odoo source yet and always count 0.
+        return {
+            TASK_SLOW_PAYER: self.odoo_service.count_slow_payers,
+            TASK_HYPERCARE: self.odoo_service.count_hypercare_at_risk,
+        }
+
+    def get_counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys((TASK_REPOSSESSION, TASK_TODO), 0)
+        queries = {}
+        for task, query in self._count_queries().items():
+            count = task_counter_cache.get((self.employee_id, task))
+            if count is None:
+                queries[task] = query
+            else:
+                counts[task] = count
+        for task, count in run_concurrently(queries).items():
+            if isinstance(count, Exception):
+                logging.error(f"Task counter {task} failed: {count}")
+                counts[task] = 0
+                continue
+            refresh_task_counter(self.employee_id, task, count)
+            counts[task] = count
+        return counts
+
+    def refresh(self) -> None:
+        """Query every count again, replacing the cached ones."""
+        for task, count in run_concurrently(self._count_queries()).items():
+            if isinstance(count, Exception):
+                logging.error(f"Task counter {task} failed: {count}")
+                continue
+            refresh_task_counter(self.employee_id, task, count)
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.i18n import catalog
+from app.schemas.global_schema import FilterSchema
+from app.utils.shared_cache import reference_cache
+
+from .models import Models
+
+EVENT_CATALOG_KEY = "event_catalog"
+CATEGORY_FIELDS = ["id", "code", "name", "color", "icon"]
+# Fields of `event.type` that may hold its category, in order of preference.
+CATEGORY_REF_FIELDS = ["type_id", "type"]
+# Seconds a process serves its current catalog after a failed load.
+FAILURE_TTL = 30
+
+# How a row of `get_event_details` refers to its category: the embedded
+# category, or only its id or code.
+CategoryRef = Union[dict, int, str]
+
+
+@dataclass(frozen=True)
+class EventCategory:
+    id: int
+    code: str
+    name: str
+    color: str
+    icon: str
+
+
+@dataclass(frozen=True)
+class EventType:
+    id: int
+    name: str
+    category_id: Optional[int]
+
+
+class EventCatalog:
+    """
+    The event types and their categories, indexed by id and code.
+
+    Built from the payload loaded by `load_event_catalog`; `version` is a digest
+    of that payload, so an unchanged reload keeps the current catalog and the
+    filters it built. A row that embeds its category keeps its own name, color
+    and icon, on the id of the catalog entry of its code; a category the catalog
+    does not know yet is taken from the row, and marks the catalog `stale`.
+    """
+
+    def __init__(self, payload: dict):
+        self.version = hashlib.sha1(
+            json.dumps(payload, sort_keys=True).encode()
+        ).hexdigest()
+        self.categories: Dict[int, EventCategory] = {}
+        self.categories_by_code: Dict[str, EventCategory] = {}
+        for values in payload.get("categories", []):
+            self._index(EventCategory(**values))
+        self.types: Dict[int, EventType] = {
+            values["id"]: EventType(**values) for values in payload.get("types", [])
+        }
+        self.stale = False
+        # Categories embedded in rows, by their values, merged with the catalog.
+        self._embedded: Dict[tuple, EventCategory] = {}
+        self._filters: Dict[Tuple[int, Optional[str]], FilterSchema] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, category: EventCategory) -> None:
+        self.categories[category.id] = category
+        self.categories_by_code[category.code] = category
+
+    def category(self, ref: CategoryRef) -> Optional[EventCategory]:
+        if isinstance(ref, int):
+            return self.categories.get(ref)
+        if isinstance(ref, str):
+            return self.categories_by_code.get(ref)
+        if not ref or not ref.get("code"):
+            return None
+        key = tuple(ref.get(field) or "" for field in CATEGORY_FIELDS[1:])
+        category = self._embedded.get(key)
+        if category is None:
+            category = self._embed(ref, key)
+        return category
+
+    def _embed(self, values: dict, key: tuple) -> EventCategory:
+        with self._lock:
+            category = self.categories_by_code.get(values["code"])
+            if category is None:
+                # Negative ids cannot collide with the ids of Odoo records.
+                category = EventCategory(
+                    id=values.get("id") or -len(self.categories) - 1,
+                    **{field: values.get(field) or "" for field in CATEGORY_FIELDS[1:]},
+                )
+                self._index(category)
+                self.stale = True
+            category = replace(
+                category,
+                **{
+                    field: values[field]
+                    for field in ("name", "color", "icon")
+                    if values.get(field)
+                },
+            )
+            self._embedded[key] = category
+            return category
+
+    def filter(self, category: EventCategory, lang: Optional[str]) -> FilterSchema:
+        """The `event_category` filter of `category`, built once per language."""
+        key = (category.id, lang)
+        filter_id = self._filters.get(key)
+        if filter_id is None:
+            filter_id = self._filters[key] = FilterSchema.model_construct(
+                value=category.code,
+                param="event_category",
+                label=catalog.literal(category.name, lang),
+            )
+        return filter_id
+
+
+def load_event_catalog(client) -> dict:
+    """
+    Fetch the event types and their categories from Odoo as a JSON payload.
+
+    The category of a type is read from the first of `CATEGORY_REF_FIELDS`
+    `event.type` has, as `fields_get` reports it: a many2one to the category
+    model, or a selection or char whose values are the category codes. The
+    latter get negative ids, which cannot collide with the ids of records.
+    """
+    event_type = Models(client=client, model_name="event.type")
+    existing = event_type.model_method(
+        "fields_get",
+        {
+            "allfields": CATEGORY_REF_FIELDS,
+            "attributes": ["type", "relation", "selection"],
+        },
+    )
+    ref_field = next(
+        (field for field in CATEGORY_REF_FIELDS if field in existing), None
+    )
+    if ref_field is None:
+        raise ValueError(f"event.type has none of the fields {CATEGORY_REF_FIELDS}")
+    definition = existing[ref_field]
+    types = event_type.search([], fields=["id", "name", ref_field], limit=False)
+    if definition["type"] == "many2one":
+        categories = [
+            {field: category[field] or "" for field in CATEGORY_FIELDS}
+            for category in Models(
+                client=client, model_name=definition["relation"]
+            ).search([], fields=CATEGORY_FIELDS, limit=False)
+        ]
+        category_ids = {
+            values["id"]: values[ref_field][0] if values[ref_field] else None
+            for values in types
+        }
+    else:
+        labels = dict(definition.get("selection") or [])
+        codes = sorted({values[ref_field] for values in types if values[ref_field]})
+        categories = [
+            {
+                "id": -index,
+                "code": code,
+                "name": labels.get(code, code),
+                "color": "",
+                "icon": "",
+            }
+            for index, code in enumerate(codes, start=1)
+        ]
+        by_code = {category["code"]: category["id"] for category in categories}
+        category_ids = {
+            values["id"]: by_code.get(values[ref_field]) for values in types
+        }
+    return {
+        "categories": categories,
+        "types": [
+            {
+                "id": values["id"],
+                "name": values["name"],
+                "category_id": category_ids[values["id"]],
+            }
+            for values in types
+        ],
+    }
+
+
+# The cached payload last seen and the catalog built from it, and the time
+# until which a failed load is not retried.
+_current: List = [None, EventCatalog({})]
+_current_lock = threading.Lock()
+_failed_until = [0.0]
+
+
+def get_event_catalog(client) -> EventCatalog:
+    """
+    The current catalog, from the shared reference cache.
+
+    The catalog is rebuilt when the cached payload changes and reloaded in the
+    background when a row referred to a category it did not know. When Odoo
+    cannot be reached, the categories embedded in the rows are used, and the
+    load is not retried for `FAILURE_TTL` seconds.
+    """
+
+    def loader() -> dict:
+        return load_event_catalog(client)
+
+    if time.time() < _failed_until[0]:
+        return _current[1]
+    try:
+        payload = reference_cache.get_or_load(EVENT_CATALOG_KEY, loader)
+    except Exception as e:
+        logging.error(f"Event catalog could not be loaded: {e}")
+        _failed_until[0] = time.time() + FAILURE_TTL
+        return _current[1]
+    with _current_lock:
+        if payload is not _current[0]:
+            event_catalog = EventCatalog(payload)
+            if event_catalog.version != _current[1].version:
+                _current[1] = event_catalog
+            _current[0] = payload
+        event_catalog = _current[1]
+    if event_catalog.stale:
+        event_catalog.stale = False
+        reference_cache.revalidate(EVENT_CATALOG_KEY, loader)
+    return event_catalog
+
+
+def refresh_event_catalog(client, min_age: float = 0) -> bool:
+    return reference_cache.refresh(
+        EVENT_CATALOG_KEY, lambda: load_event_catalog(client), min_age=min_age
+    )
@@ -10,3 +10,10 @@ class EmployeeNotFoundException(Exception):
         self.message = message
         self.details = details
         super().__init__(self.message)
+
+
+class CardNotFoundException(Exception):
+    def __init__(self, message: str, details: str):
+        self.message = message
+        self.details = details
+        super().__init__(self.message)
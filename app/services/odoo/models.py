@@ -24,6 +24,9 @@ class Models:
             self.model_name, domain, fields, offset, limit, order
         )
 
+    def search_count(self, domain) -> int:
+        return self.client.count_records(self.model_name, domain)
+
     def create(self, payload, context=None):
         if context is None:
             context = {}
@@ -0,0 +1,151 @@
+"""
+Priority worklist of the slow payers of an agent.
+
+Each account of the portfolio is scored in [0, 1] from its overdue days, the
+amount it owes, the commission at stake and its age, each relative to the
+largest of the portfolio, its `scale`. The worklist cached per agent keeps the
+`k` accounts to call first, picked with a heap, so that a page of them is a
+slice, and the ids and scores of the accounts ranked after them, so that a
+later page only reads its own accounts.
+A single account is scored against the scale alone.
+
+The amount and commission fields are not on every Odoo database: the ones
+`payg.account` lacks, as `fields_get` reports it, are left out of the score.
+"""
+
+import heapq
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.utils.shared_cache import reference_cache
+
+from .models import Models
+
+# Weight of each feature in the score. The age favours the most recent
+# accounts, whose first delays are the likeliest to be recovered.
+SCORE_WEIGHTS: Dict[str, float] = {
+    "nb_days_overdue": 0.4,
+    "amount_overdue": 0.3,
+    "next_commission": 0.2,
+    "registration_date": 0.1,
+}
+SCORE_FIELDS_KEY = "payg_account_score_fields"
+
+# Alert colors of the slow-payer cards by priority score.
+PRIORITY_THRESHOLDS = (1 / 3, 2 / 3)
+PRIORITY_COLORS = ("#e0ce00", "#bf7404", "#d12300")
+
+
+def worklist_key(employee_id: int) -> str:
+    """Key of the slow-payer worklist of an employee in the reference cache."""
+    # Versioned with the shape of the worklist, see `build_worklist`.
+    return f"slow_payer_worklist:v3:{employee_id}"
+
+
+def load_score_fields(client) -> List[str]:
+    """The `SCORE_WEIGHTS` fields `payg.account` has in Odoo."""
+    existing = Models(client=client, model_name="payg.account").model_method(
+        "fields_get", {"allfields": list(SCORE_WEIGHTS), "attributes": ["type"]}
+    )
+    return [field for field in SCORE_WEIGHTS if field in existing]
+
+
+def get_score_fields(client) -> List[str]:
+    return reference_cache.get_or_load(
+        SCORE_FIELDS_KEY, lambda: load_score_fields(client)
+    )
+
+
+def _age(account: dict, now: datetime) -> int:
+    registration_date = account.get("registration_date")
+    return (
+        (now - datetime.fromisoformat(registration_date)).days
+        if registration_date
+        else 0
+    )
+
+
+def portfolio_scale(accounts: List[dict], fields: List[str]) -> Dict[str, Any]:
+    """
+    The largest value of each of `fields` in a portfolio, the earliest date for
+    `registration_date`.
+    """
+    scale = {}
+    for field in fields:
+        if field == "registration_date":
+            dates = [account[field] for account in accounts if account.get(field)]
+            scale[field] = min(dates, default=None)
+        else:
+            scale[field] = max(
+                (float(account.get(field) or 0) for account in accounts), default=0
+            )
+    return scale
+
+
+def score_account(
+    account: dict, fields: List[str], scale: Dict[str, Any], now: datetime
+) -> float:
+    """Score an account, from 0 to 1, against the `scale` of its portfolio."""
+    total = 0.0
+    for field in fields:
+        if field == "registration_date":
+            oldest = _age({field: scale[field]}, now) or 1
+            value = 1 - _age(account, now) / oldest
+        else:
+            value = float(account.get(field) or 0) / (scale[field] or 1)
+        total += SCORE_WEIGHTS[field] * value
+    return total / (sum(SCORE_WEIGHTS[field] for field in fields) or 1)
+
+
+def score_accounts(
+    accounts: List[dict], fields: List[str], now: datetime
+) -> List[float]:
+    """
+    Score every account of a portfolio.
+
+    Args:
+        accounts (List[dict]): The accounts, with the `fields` read.
+        fields (List[str]): The `SCORE_WEIGHTS` fields to score on.
+        now (datetime): The reference time of the account ages.
+
+    Returns:
+        List[float]: The score of each account, from 0 to 1.
+    """
+    scale = portfolio_scale(accounts, fields)
+    return [score_account(account, fields, scale, now) for account in accounts]
+
+
+def build_worklist(
+    accounts: List[dict], fields: List[str], k: int, now: datetime
+) -> dict:
+    """
+    The worklist of a portfolio: its size and scale, the `k` best scored
+    accounts with their `priority_score`, and the `[id, score]` of the accounts
+    past them, best first.
+    """
+    scores = score_accounts(accounts, fields, now)
+    top = heapq.nlargest(k, range(len(accounts)), key=scores.__getitem__)
+    rest = []
+    if len(accounts) > k:
+        # Only portfolios larger than the worklist are sorted whole, for the
+        # pages past it.
+        kept = set(top)
+        rest = sorted(
+            (i for i in range(len(accounts)) if i not in kept),
+            key=lambda i: -scores[i],
+        )
+    return {
+        "total": len(accounts),
+        "scale": portfolio_scale(accounts, fields),
+        "accounts": [
+            {**accounts[i], "priority_score": round(scores[i], 4)} for i in top
+        ],
+        "ranking": [[accounts[i]["id"], round(scores[i], 4)] for i in rest],
+    }
+
+
+def priority_color(score: Optional[float]) -> str:
+    if score is None:
+        return "#000000"
+    return PRIORITY_COLORS[bisect_right(PRIORITY_THRESHOLDS, score)]
@@ -0,0 +1,414 @@
+"""
+Local read replica of the `payg.account` records behind the task lists.
+
+`AccountReplica` mirrors the accounts into an indexed SQLite database on the
+host, kept current by its own change feed, which replays every account on the
+first sync and then follows `write_date`. One process of the host syncs at a
+time, elected with `flock`; every worker reads the database.
+
+The slow-payer and hypercare lists and counts are answered from the replica
+while its last complete sync is more recent than `max_lag`, and from Odoo
+otherwise. Archived accounts are mirrored with their `active` flag and left out
+of the lists, as Odoo does. Accounts deleted in Odoo are not seen by the feed:
+every `reconcile_interval` seconds the sync reads the ids of every account and
+deletes the other rows of the replica.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import settings
+
+from .changes import (
+    EPOCH,
+    FEED_FIELDS,
+    WITH_ARCHIVED,
+    ChangeEvent,
+    ChangeFeed,
+    Watermark,
+    WatermarkStore,
+)
+
+MODEL = "payg.account"
+# Account ids read per query when reconciling the replica with Odoo.
+RECONCILE_PAGE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY,
+    account_ext_id TEXT,
+    active INTEGER,
+    create_date TEXT,
+    registration_date TEXT,
+    client_id INTEGER,
+    client_name TEXT,
+    nb_days_overdue INTEGER,
+    account_status TEXT,
+    account_segmentation_id INTEGER,
+    responsible_agent_employee_id INTEGER,
+    write_date TEXT
+);
+CREATE INDEX IF NOT EXISTS account_responsible_agent
+    ON account (responsible_agent_employee_id, account_segmentation_id, account_status);
+CREATE INDEX IF NOT EXISTS account_segmentation ON account (account_segmentation_id);
+CREATE INDEX IF NOT EXISTS account_status ON account (account_status);
+CREATE INDEX IF NOT EXISTS account_days_overdue ON account (nb_days_overdue);
+CREATE INDEX IF NOT EXISTS account_registration_date ON account (registration_date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+COLUMNS = [
+    "id",
+    "account_ext_id",
+    "active",
+    "create_date",
+    "registration_date",
+    "client_id",
+    "client_name",
+    "nb_days_overdue",
+    "account_status",
+    "account_segmentation_id",
+    "responsible_agent_employee_id",
+    "write_date",
+]
+# Columns the lists may be ordered by.
+ORDER_COLUMNS = {
+    "id",
+    "account_ext_id",
+    "create_date",
+    "registration_date",
+    "nb_days_overdue",
+    "account_status",
+}
+
+
+def _many2one_id(value) -> Optional[int]:
+    return value[0] if value else None
+
+
+class ReplicaWatermarkStore(WatermarkStore):
+    """Watermarks kept in the replica, committed with the records they cover."""
+
+    def __init__(self, replica: "AccountReplica"):
+        self.replica = replica
+
+    def load(self, model: str) -> Optional[Watermark]:
+        write_date = self.replica.meta(f"watermark:{model}:write_date")
+        record_id = self.replica.meta(f"watermark:{model}:id")
+        if write_date is None or record_id is None:
+            return None
+        return write_date, int(record_id)
+
+    def save(self, model: str, watermark: Watermark) -> None:
+        connection = self.replica.connection()
+        connection.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                (f"watermark:{model}:write_date", watermark[0]),
+                (f"watermark:{model}:id", str(watermark[1])),
+            ],
+        )
+        connection.commit()
+
+
+class AccountReplica:
+    def __init__(
+        self,
+        path: str,
+        client,
+        max_lag: float = 120,
+        batch_size: int = 500,
+        lookback: float = 60,
+        reconcile_interval: float = 3600,
+    ):
+        self.path = path
+        self.client = client
+        self.max_lag = max_lag
+        self.reconcile_interval = reconcile_interval
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._migrate()
+        self.connection().executescript(SCHEMA)
+        self.feed = ChangeFeed(
+            client,
+            {MODEL: FEED_FIELDS[MODEL]},
+            ReplicaWatermarkStore(self),
+            batch_size=batch_size,
+            initial=EPOCH,
+            lookback=lookback,
+        )
+        self.feed.subscribe(MODEL, self._upsert)
+        self._task: Optional[asyncio.Task] = None
+
+    def connection(self) -> sqlite3.Connection:
+        """The connection of the current thread, SQLite connections are not shared."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _migrate(self) -> None:
+        connection = self.connection()
+        columns = {
+            row["name"] for row in connection.execute("PRAGMA table_info(account)")
+        }
+        if columns and set(COLUMNS) - columns:
+            # Built by an older version: replay every account into the new schema.
+            logging.info("Rebuilding the account replica for its new columns")
+            connection.executescript(
+                "DROP TABLE account; DELETE FROM meta WHERE key LIKE 'watermark:%' "
+                "OR key IN ('synced_at', 'reconciled_at');"
+            )
+
+    def meta(self, key: str) -> Optional[str]:
+        row = (
+            self.connection()
+            .execute("SELECT value FROM meta WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def _upsert(self, event: ChangeEvent) -> None:
+        # Committed with the watermark at the end of the batch.
+        values = event.values
+        client_id = values.get("client_id") or None
+        self.connection().execute(
+            f"INSERT OR REPLACE INTO account ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})",
+            (
+                values["id"],
+                values.get("account_ext_id") or None,
+                values.get("active") is not False,
+                values.get("create_date") or None,
+                values.get("registration_date") or None,
+                client_id[0] if client_id else None,
+                client_id[1] if client_id else None,
+                values.get("nb_days_overdue") or 0,
+                values.get("account_status") or None,
+                _many2one_id(values.get("account_segmentation_id")),
+                _many2one_id(values.get("responsible_agent_employee_id")),
+                values["write_date"],
+            ),
+        )
+
+    def sync(self) -> bool:
+        """
+        Pull the account changes unless another process of the host is already
+        doing it.
+
+        Returns:
+            bool: Whether this process synced.
+        """
+        with open(self.path + ".lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            connection = self.connection()
+            try:
+                # Another process may have synced since this one last did.
+                self.feed.reload_watermark(MODEL)
+                self.feed.poll(MODEL)
+                connection.commit()
+                if self.feed.caught_up(MODEL):
+                    connection.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        ("synced_at", str(time.time())),
+                    )
+                    connection.commit()
+                    reconciled_at = self.meta("reconciled_at")
+                    if (
+                        reconciled_at is None
+                        or time.time() - float(reconciled_at) > self.reconcile_interval
+                    ):
+                        self.reconcile()
+                return True
+            finally:
+                if connection.in_transaction:
+                    connection.rollback()
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def reconcile(self) -> int:
+        """
+        Delete the accounts of the replica that no longer exist in Odoo. Runs
+        under the sync lock, after a poll: every row was then read from Odoo
+        before the ids are.
+
+        Returns:
+            int: The number of accounts deleted.
+        """
+        connection = self.connection()
+        connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS odoo_account (id INTEGER PRIMARY KEY)"
+        )
+        connection.execute("DELETE FROM odoo_account")
+        last_id = 0
+        while True:
+            records = self.client.search_records(
+                MODEL,
+                [["id", ">", last_id], WITH_ARCHIVED],
+                ["id"],
+                0,
+                RECONCILE_PAGE,
+                "id asc",
+            )
+            connection.executemany(
+                "INSERT INTO odoo_account (id) VALUES (?)",
+                [(record["id"],) for record in records],
+            )
+            if len(records) < RECONCILE_PAGE:
+                break
+            last_id = records[-1]["id"]
+        deleted = connection.execute(
+            "DELETE FROM account WHERE id NOT IN (SELECT id FROM odoo_account)"
+        ).rowcount
+        connection.execute("DELETE FROM odoo_account")
+        connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            ("reconciled_at", str(time.time())),
+        )
+        connection.commit()
+        if deleted:
+            logging.info(f"Removed {deleted} deleted accounts from the replica")
+        return deleted
+
+    def is_fresh(self) -> bool:
+        synced_at = self.meta("synced_at")
+        return synced_at is not None and time.time() - float(synced_at) <= self.max_lag
+
+    def _domain(
+        self,
+        employee_id: int,
+        segmentation_ids: List[int],
+        account_status: Optional[str],
+        account_ids: Optional[List[int]],
+        registered_after: Optional[str],
+    ) -> Tuple[str, list]:
+        clauses = [
+            "active = 1",
+            "responsible_agent_employee_id = ?",
+            f"account_segmentation_id IN ({', '.join('?' * len(segmentation_ids))})",
+        ]
+        params = [employee_id, *segmentation_ids]
+        if account_status:
+            clauses.append("account_status = ?")
+            params.append(account_status)
+        if account_ids:
+            clauses.append(f"id IN ({', '.join('?' * len(account_ids))})")
+            params.extend(account_ids)
+        if registered_after:
+            clauses.append("registration_date > ?")
+            params.append(registered_after)
+        return " AND ".join(clauses), params
+
+    def search(
+        self,
+        employee_id: int,
+        segmentation_ids: List[int],
+        offset: int,
+        limit: int,
+        order: str,
+        fields: List[str],
+        account_status: Optional[str] = None,
+        account_ids: Optional[List[int]] = None,
+        registered_after: Optional[str] = None,
+    ) -> Optional[Tuple[List[dict], int]]:
+        """
+        Search the accounts like `OdooService._account_domain` does, returning
+        the records shaped as Odoo reads them and the total count, or None when
+        the replica cannot answer.
+        """
+        column, _, direction = order.partition(" ")
+        if (
+            not self.is_fresh()
+            or column not in ORDER_COLUMNS
+            or direction.lower() not in ("asc", "desc")
+        ):
+            return None
+        where, params = self._domain(
+            employee_id, segmentation_ids, account_status, account_ids, registered_after
+        )
+        connection = self.connection()
+        count = connection.execute(
+            f"SELECT COUNT(*) FROM account WHERE {where}", params
+        ).fetchone()[0]
+        page = "" if limit in (-1, None, False) else " LIMIT ? OFFSET ?"
+        page_params = [] if not page else [limit, offset]
+        rows = connection.execute(
+            f"SELECT * FROM account WHERE {where} ORDER BY {column} {direction}, id"
+            + page,
+            params + page_params,
+        ).fetchall()
+        records = []
+        for row in rows:
+            record = dict(row)
+            client_id = record.pop("client_id")
+            client_name = record.pop("client_name")
+            record["client_id"] = [client_id, client_name] if client_id else False
+            records.append({field: record.get(field, False) for field in fields})
+        return records, count
+
+    def count(
+        self,
+        employee_id: int,
+        segmentation_ids: List[int],
+        account_status: Optional[str] = None,
+        registered_after: Optional[str] = None,
+    ) -> Optional[int]:
+        if not self.is_fresh():
+            return None
+        where, params = self._domain(
+            employee_id, segmentation_ids, account_status, None, registered_after
+        )
+        return (
+            self.connection()
+            .execute(f"SELECT COUNT(*) FROM account WHERE {where}", params)
+            .fetchone()[0]
+        )
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.sync)
+            except Exception as e:
+                logging.error(f"Account replica sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+@lru_cache(maxsize=None)
+def get_account_replica() -> Optional[AccountReplica]:
+    """The replica of the host, None when `REPLICA_ENABLED` is off."""
+    if not settings.replica_enabled:
+        return None
+    from .client import OdooAPI
+
+    return AccountReplica(
+        settings.replica_path,
+        OdooAPI(),
+        max_lag=settings.replica_max_lag,
+        batch_size=settings.change_feed_batch_size,
+        lookback=settings.change_feed_lookback,
+        reconcile_interval=settings.replica_reconcile_interval,
+    )
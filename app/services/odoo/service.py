@@ -1,12 +1,19 @@
+import copy
 import logging
-import random
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import Future
 from datetime import date, datetime, timedelta
-from functools import wraps
-from typing import List, Optional
+from functools import partial, wraps
+from typing import Callable, Dict, List, Optional, Tuple
 
+from app.core.i18n import catalog
 from app.core.odoo_config import settings
 from app.schemas.employee import EmployeeSchema
 from app.schemas.global_schema import (
+    AgentTaskSchema,
     CardSchema,
     CollapsedCardSchema,
     ExpandedSchema,
@@ -17,7 +24,8 @@ from app.schemas.global_schema import (
     TaskCollapsedCardSchema,
     TaskExpandedCardSchema,
     TaskSchema,
-    TextTranslationSchema,
+    TeamTaskSchema,
+    Translatable,
 )
 from app.schemas.incentive_event import (
     EventCategorySchema,
@@ -34,7 +42,21 @@ from app.schemas.payg_account import PaygAccountSchema
 from app.schemas.screen import DateRangeSchema, SummarySimpleSchema, TasksSchema
 from app.schemas.token import TokenSchema
 from app.schemas.user import UserSchema
-from app.services.odoo.exceptions import UnauthorizedEmployeeException
+from app.services.auth.claims import get_user_context
+from app.services.auth.refresh_tokens import RefreshTokenRegistry
+from app.services.odoo.counters import (
+    TASK_HYPERCARE,
+    TASK_REPOSSESSION,
+    TASK_SLOW_PAYER,
+    TASK_TODO,
+    TaskCounterService,
+    refresh_task_counter,
+)
+from app.services.odoo.exceptions import (
+    CardNotFoundException,
+    UnauthorizedEmployeeException,
+)
+from app.utils.concurrency import run_concurrently
 from app.utils.main import (
     create_access_token,
     create_refresh_token,
@@ -43,9 +65,29 @@ from app.utils.main import (
     get_lang_from_company,
     validate_and_extract_country,
 )
+from app.utils.shared_cache import reference_cache
 
 from .client import OdooAPI
+from .event_catalog import EventCatalog, EventCategory, get_event_catalog
 from .models import Models
+from .priority import (
+    build_worklist,
+    get_score_fields,
+    portfolio_scale,
+    priority_color,
+    score_account,
+    worklist_key,
+)
+from .replica import get_account_replica
+
+VIEW_COLLAPSED = "collapsed"
+VIEW_FULL = "full"
+
+# Odoo fields only read to build the expanded section of the cards
+EXPANDED_ONLY_FIELDS = {
+    "incentive.event": {"event_date"},
+    "payg.account": {"account_ext_id", "create_date"},
+}
 
 STATIC_COLOR_MAPPING = {
     "sales": "#F2BA11",
@@ -56,14 +98,62 @@ STATIC_COLOR_MAPPING = {
 }
 
 
+# Alert colors of the hypercare cards: fewer days left than
+# `hypercare_alert_low_days`, in between, more than `hypercare_alert_high_days`.
+HYPERCARE_ALERT_COLORS = ("#bf7404", "#000000", "#d12300")
+
+
+def incentive_reports_key(generic_job_id: int, company_id: int) -> str:
+    """Key of the incentive reports of a job and company in the reference cache."""
+    return f"incentive_reports:{generic_job_id}:{company_id}"
+
+
+def hypercare_start(now: datetime) -> datetime:
+    """Registration date of the accounts whose hypercare ends at `now`."""
+    return now - timedelta(days=settings.hypercare_window_days)
+
+
+def hypercare_days_left(
+    registration_dates: List[str], now: datetime
+) -> List[Tuple[int, str]]:
+    """
+    Days left to the hypercare end of each registration date, with the alert
+    color of the card.
+
+    Args:
+        registration_dates (List[str]): Odoo datetimes, `%Y-%m-%d %H:%M:%S`.
+        now (datetime): The reference time, shared by the whole page.
+
+    Returns:
+        List[Tuple[int, str]]: The days left and alert color of each date.
+    """
+    start = hypercare_start(now)
+    thresholds = (
+        settings.hypercare_alert_low_days,
+        settings.hypercare_alert_high_days + 1,
+    )
+    days_left = [
+        (datetime.fromisoformat(registration_date) - start).days
+        for registration_date in registration_dates
+    ]
+    return [
+        (days, HYPERCARE_ALERT_COLORS[bisect_right(thresholds, days)])
+        for days in days_left
+    ]
+
+
 class OdooService:
-    def __init__(self, user_context: dict = None) -> None:
+    def __init__(self, user_context: dict = None, lang: Optional[str] = None) -> None:
         self.user_context = user_context or {}
         self.lang = (
             get_lang_from_company(self.user_context["company_id"][0])
             if user_context
             else "en"
         )
+        # Language of the texts sent back, None to send every translation
+        self.text_lang = catalog.resolve_language(lang, self.lang)
+        self._request_cache = {}
+        self._request_cache_lock = threading.Lock()
         self.odoo_client = OdooAPI()
         self.model_hr_employee = Models(
             client=self.odoo_client, model_name="hr.employee"
@@ -96,6 +186,35 @@ class OdooService:
 
         return wrapper
 
+    def request_cache(method):
+        """
+        Memoize a lookup for the lifetime of the service, i.e. of one request.
+
+        Concurrent callers of the same lookup wait for the first one instead of
+        repeating the Odoo query. Each caller gets its own copy of the result so
+        it can be mutated freely.
+        """
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            with self._request_cache_lock:
+                future = self._request_cache.get(key)
+                is_owner = future is None
+                if is_owner:
+                    future = self._request_cache[key] = Future()
+            if is_owner:
+                try:
+                    future.set_result(method(self, *args, **kwargs))
+                except Exception as e:
+                    with self._request_cache_lock:
+                        self._request_cache.pop(key, None)
+                    future.set_exception(e)
+            return copy.deepcopy(future.result())
+
+        return wrapper
+
+    @request_cache
     def search_employee_by_id(self, employee_id: int):
         fields = list(EmployeeSchema.model_fields.keys())
         employee_id = self.model_hr_employee.search(
@@ -126,26 +245,208 @@ class OdooService:
             )
         return employee_id
 
+    def _segmentation_ids(self, segmentations: str) -> List[int]:
+        return [
+            int(segmentation_id)
+            for segmentation_id in segmentations.split(",")
+            if segmentation_id.isdigit()
+        ]
+
+    def _fields(self, schema, model_name: str, view: str = VIEW_FULL) -> List[str]:
+        """List the Odoo fields of `schema` the requested view needs."""
+        fields = list(schema.model_fields.keys())
+        if view == VIEW_COLLAPSED:
+            expanded_only = EXPANDED_ONLY_FIELDS.get(model_name, ())
+            fields = [field for field in fields if field not in expanded_only]
+        return fields
+
+    def score_fields(self) -> List[str]:
+        return get_score_fields(self.odoo_client)
+
+    def _slow_payer_fields(self) -> List[str]:
+        return list(
+            dict.fromkeys([*PaygAccountSchema.model_fields, *self.score_fields()])
+        )
+
+    def _rank_slow_payers(self, k: int, employee_id: Optional[int] = None) -> dict:
+        account_ids = self.model_payg_account.search(
+            self._account_domain(
+                self._segmentation_ids(settings.odoo_account_segmentation_slow_payer),
+                employee_ids=None if employee_id is None else [employee_id],
+            ),
+            fields=self._slow_payer_fields(),
+            limit=False,
+        )
+        return build_worklist(account_ids, self.score_fields(), k, datetime.now())
+
+    def slow_payer_worklist(self) -> dict:
+        """
+        The worklist of the slow payers of the employee, from the reference
+        cache: its `slow_payer_worklist_size` best scored accounts and the
+        ranking of the others, see `build_worklist`.
+        """
+        return reference_cache.get_or_load(
+            worklist_key(int(self.user_context["sub"])),
+            partial(self._rank_slow_payers, settings.slow_payer_worklist_size),
+            ttl=settings.slow_payer_worklist_ttl,
+        )
+
+    def _team_worklists(self, employee_ids: List[int]) -> Dict[int, dict]:
+        """
+        The worklists of several employees, from the reference cache. The ones
+        missing are built from a single query and cached, the stale ones are
+        served while they are reloaded in the background.
+        """
+        worklists = {}
+        now = time.time()
+        for employee_id in employee_ids:
+            entry = reference_cache.read(worklist_key(employee_id))
+            if entry is None or entry.expires_at + reference_cache.stale_ttl <= now:
+                continue
+            worklists[employee_id] = entry.value
+            if entry.expires_at <= now:
+                reference_cache.revalidate(
+                    worklist_key(employee_id),
+                    partial(
+                        self._rank_slow_payers,
+                        settings.slow_payer_worklist_size,
+                        employee_id,
+                    ),
+                    ttl=settings.slow_payer_worklist_ttl,
+                )
+        missing = [
+            employee_id for employee_id in employee_ids if employee_id not in worklists
+        ]
+        if not missing:
+            return worklists
+        portfolios = defaultdict(list)
+        for account_id in self.model_payg_account.search(
+            self._account_domain(
+                self._segmentation_ids(settings.odoo_account_segmentation_slow_payer),
+                employee_ids=missing,
+            ),
+            fields=list(
+                dict.fromkeys(
+                    [*self._slow_payer_fields(), "responsible_agent_employee_id"]
+                )
+            ),
+            limit=False,
+        ):
+            portfolios[account_id["responsible_agent_employee_id"][0]].append(
+                account_id
+            )
+        for employee_id in missing:
+            worklists[employee_id] = reference_cache.write(
+                worklist_key(employee_id),
+                build_worklist(
+                    portfolios[employee_id],
+                    self.score_fields(),
+                    settings.slow_payer_worklist_size,
+                    datetime.now(),
+                ),
+                ttl=settings.slow_payer_worklist_ttl,
+            ).value
+        return worklists
+
+    def _worklist_page(
+        self, worklist: dict, offset: int, limit: int
+    ) -> Tuple[list, int]:
+        top = worklist["accounts"][offset : offset + limit]
+        # Past the cached accounts, only the accounts of the page are read, in
+        # the order of the cached ranking.
+        ranking = worklist["ranking"][
+            max(0, offset - len(worklist["accounts"])) : max(
+                0, offset + limit - len(worklist["accounts"])
+            )
+        ]
+        if not ranking:
+            return top, worklist["total"]
+        account_ids = {
+            account_id["id"]: account_id
+            for account_id in self.model_payg_account.search(
+                [["id", "in", [account_id for account_id, _ in ranking]]],
+                fields=self._slow_payer_fields(),
+                limit=False,
+            )
+        }
+        return (
+            top
+            + [
+                {**account_ids[account_id], "priority_score": score}
+                for account_id, score in ranking
+                if account_id in account_ids
+            ],
+            worklist["total"],
+        )
+
+    def _slow_payer_worklist_page(self, offset: int, limit: int) -> Tuple[list, int]:
+        return self._worklist_page(self.slow_payer_worklist(), offset, limit)
+
+    def _slow_payer_scale(self) -> dict:
+        """
+        The scale of the slow-payer portfolio of the employee, from its cached
+        worklist or else from one single-account query per score field.
+        """
+        entry = reference_cache.read(worklist_key(int(self.user_context["sub"])))
+        if entry is not None and "scale" in entry.value:
+            return entry.value["scale"]
+        domain = self._account_domain(
+            self._segmentation_ids(settings.odoo_account_segmentation_slow_payer)
+        )
+        results = run_concurrently(
+            {
+                field: partial(
+                    self.model_payg_account.search,
+                    domain=domain + [[field, "!=", False]],
+                    fields=[field],
+                    limit=1,
+                    order=(
+                        f"{field} asc"
+                        if field == "registration_date"
+                        else f"{field} desc"
+                    ),
+                )
+                for field in self.score_fields()
+            }
+        )
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return portfolio_scale(
+            [account_id for result in results.values() for account_id in result],
+            self.score_fields(),
+        )
+
     @check_can_use_application_agent
     def get_slower_payer_client_service(
         self,
         offset: int,
         limit: int,
-        order: str = "nb_days_overdue asc",
+        order: str = "priority",
         day_late: Optional[str] = None,
+        view: str = VIEW_FULL,
     ) -> TaskSchema:
-        segmentations = settings.odoo_account_segmentation_slow_payer.split(",")
-        segmentation_ids = [
-            int(segmentation_id)
-            for segmentation_id in segmentations
-            if segmentation_id.isdigit()
-        ]
-        account_ids, total_count = self.search_account_by_segmentation_and_responsible(
-            offset, limit, order, segmentation_ids=segmentation_ids
+        """
+        List the slow payers of the employee, the ones to call first by default.
+        Any order but "priority" is passed on to Odoo.
+        """
+        if order == "priority":
+            account_ids, total_count = self._slow_payer_worklist_page(offset, limit)
+        else:
+            account_ids, total_count = (
+                self.search_account_by_segmentation_and_responsible(
+                    offset,
+                    limit,
+                    order,
+                    segmentation_ids=self._segmentation_ids(
+                        settings.odoo_account_segmentation_slow_payer
+                    ),
+                    fields=self._fields(PaygAccountSchema, "payg.account", view),
+                )
+            )
+        refresh_task_counter(
+            int(self.user_context["sub"]), TASK_SLOW_PAYER, total_count
         )
-        cards = []
-        filter_day_late_new = get_filter("day_late", "new", self.lang)
-        filter_day_late_urgent = get_filter("day_late", "urgent", self.lang)
         if day_late and day_late == "new":
             account_ids = list(
                 filter(
@@ -160,82 +461,26 @@ class OdooService:
             )
         else:
             account_ids = account_ids
-        for account_id in account_ids:
-            filters = []
-            if account_id["nb_days_overdue"] <= 15:
-                filters.append(filter_day_late_new)
-            elif account_id["nb_days_overdue"] > 15:
-                filters.append(filter_day_late_urgent)
-            sp_count = random.randint(1, 30)
-            if sp_count < 10:
-                alert_color = "#e0ce00"
-            elif sp_count > 30 and sp_count < 60:
-                alert_color = "#bf7404"
-            elif sp_count > 60:
-                alert_color = "#d12300"
-            else:
-                alert_color = "#000000"
-            collapsed_item = TaskCollapsedCardSchema(
-                icon="slow-payer-icon",
-                icon_color="#F2BA11",
-                title="Jane Doe",
-                rows=[
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Nex commission", fr="Prochaine commission"
-                        ),
-                        value=TextTranslationSchema(en="500 Ar", fr="500 Ar"),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(en="Product", fr="Produit"),
-                        value=TextTranslationSchema(
-                            en="Solar Home System", fr="Solar Home System"
-                        ),
-                    ),
-                ],
-                alert_text=f"{account_id['nb_days_overdue']} days late in payment",
-                alert_text_color=alert_color,
-            )
-            Expanded_item = TaskExpandedCardSchema(
-                rows=[
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Client phone number", fr="Numéro de téléphone du client"
-                        ),
-                        value=TextTranslationSchema(
-                            en="+261 32 68 510 46", fr="+261 32 68 510 46"
-                        ),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Product name", fr="Nom du produit"
-                        ),
-                        value=TextTranslationSchema(
-                            en="Solar Home System", fr="Solar Home System"
-                        ),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Account age", fr="Age du compte"
-                        ),
-                        value=TextTranslationSchema(en="12 days", fr="12 jours"),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(en="Village", fr="Village"),
-                        value=TextTranslationSchema(en="Ivato", fr="Ivato"),
-                    ),
-                ]
-            )
-            cards.append(
-                TaskCardSchema(
-                    filters=filters, collapsed=collapsed_item, expanded=Expanded_item
-                )
-            )
-        return TaskSchema(
+        return self._slow_payer_task(account_ids, offset, limit, total_count, view)
+
+    def _slow_payer_task(
+        self,
+        account_ids: List[dict],
+        offset: int,
+        limit: int,
+        total_count: int,
+        view: str,
+    ) -> TaskSchema:
+        filter_day_late_new = get_filter("day_late", "new", self.text_lang)
+        filter_day_late_urgent = get_filter("day_late", "urgent", self.text_lang)
+        cards = [
+            self._build_slow_payer_card(account_id, view) for account_id in account_ids
+        ]
+        return TaskSchema.model_construct(
             icon="slow-payer-icon",
             title="Slow Payers",
-            total_value=len(account_ids),
-            pagination=PaginationSchema(
+            total_value=float(len(account_ids)),
+            pagination=PaginationSchema.model_construct(
                 offset=offset,
                 limit=limit,
                 current_records=len(account_ids),
@@ -248,86 +493,145 @@ class OdooService:
             cards=cards,
         )
 
+    def count_slow_payers(self) -> int:
+        return self.count_account_by_segmentation_and_responsible(
+            self._segmentation_ids(settings.odoo_account_segmentation_slow_payer)
+        )
+
+    def count_hypercare_at_risk(self) -> int:
+        return self.count_account_by_segmentation_and_responsible(
+            self._segmentation_ids(settings.odoo_account_segmentation_hypercare),
+            account_status="disabled",
+            registered_after=self._hypercare_start(),
+        )
+
+    @check_can_use_application_agent
+    def get_slow_payer_card(self, account_id: int) -> TaskCardSchema:
+        segmentation_ids = self._segmentation_ids(
+            settings.odoo_account_segmentation_slow_payer
+        )
+        # Read from Odoo, as the worklist is: the replica lacks some score fields.
+        account_ids = self.model_payg_account.search(
+            self._account_domain(segmentation_ids, account_ids=[account_id]),
+            fields=self._slow_payer_fields(),
+            limit=1,
+        )
+        if not account_ids:
+            raise CardNotFoundException(
+                "Card not found", f"Slow payer account ({account_id}) not found"
+            )
+        account_ids[0]["priority_score"] = round(
+            score_account(
+                account_ids[0],
+                self.score_fields(),
+                self._slow_payer_scale(),
+                datetime.now(),
+            ),
+            4,
+        )
+        return self._build_slow_payer_card(account_ids[0], VIEW_FULL)
+
+    def _build_slow_payer_card(self, account_id: dict, view: str) -> TaskCardSchema:
+        filters = []
+        if account_id["nb_days_overdue"] <= 15:
+            filters.append(get_filter("day_late", "new", self.text_lang))
+        elif account_id["nb_days_overdue"] > 15:
+            filters.append(get_filter("day_late", "urgent", self.text_lang))
+        alert_color = priority_color(account_id.get("priority_score"))
+        collapsed_item = TaskCollapsedCardSchema.model_construct(
+            icon="slow-payer-icon",
+            icon_color="#F2BA11",
+            title="Jane Doe",
+            rows=[
+                self._row("next_commission", self._literal("500 Ar")),
+                self._row("product", self._literal("Solar Home System")),
+            ],
+            alert_text=f"{account_id['nb_days_overdue']} days late in payment",
+            alert_text_color=alert_color,
+        )
+        expanded_item = None
+        if view == VIEW_FULL:
+            expanded_item = TaskExpandedCardSchema.model_construct(
+                rows=[
+                    self._row(
+                        "client_phone_number", self._literal("+261 32 68 510 46")
+                    ),
+                    self._row("product_name", self._literal("Solar Home System")),
+                    self._row(
+                        "account_age",
+                        catalog.format("x_days", self.text_lang, days=12),
+                    ),
+                    self._row("village", self._literal("Ivato")),
+                ]
+            )
+        return TaskCardSchema.model_construct(
+            id=f"payg_account_{account_id['id']}",
+            filters=filters,
+            collapsed=collapsed_item,
+            expanded=expanded_item,
+        )
+
+    def _hypercare_start(self) -> str:
+        return hypercare_start(datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _build_hypercare_cards(
+        self, account_ids: List[dict], view: str
+    ) -> List[TaskCardSchema]:
+        days_left = hypercare_days_left(
+            [account_id["registration_date"] for account_id in account_ids],
+            datetime.now(),
+        )
+        return [
+            self._build_hypercare_card(account_id, days, alert_color, view)
+            for account_id, (days, alert_color) in zip(account_ids, days_left)
+        ]
+
     def get_hypercare_at_risk_service(
-        self, offset: int, limit: int, order: str = "registration_date desc"
+        self,
+        offset: int,
+        limit: int,
+        order: str = "registration_date asc",
+        view: str = VIEW_FULL,
     ) -> TaskSchema:
-        segmentations = settings.odoo_account_segmentation_hypercare.split(",")
-        segmentation_ids = [
-            int(segmentation_id)
-            for segmentation_id in segmentations
-            if segmentation_id.isdigit()
-        ]
+        """
+        List the accounts still in hypercare, the ones with the fewest days left
+        first by default: the oldest registrations.
+        """
+        segmentation_ids = self._segmentation_ids(
+            settings.odoo_account_segmentation_hypercare
+        )
         account_ids, total_count = self.search_account_by_segmentation_and_responsible(
             offset,
             limit,
             order,
             segmentation_ids=segmentation_ids,
             account_status="disabled",
+            fields=self._fields(PaygAccountSchema, "payg.account", view),
+            registered_after=self._hypercare_start(),
         )
+        refresh_task_counter(int(self.user_context["sub"]), TASK_HYPERCARE, total_count)
+        return self._hypercare_task(account_ids, offset, limit, total_count, view)
 
-        filter_category_sav = get_filter("category", "sav", self.lang)
-        filter_category_unreachable = get_filter("category", "unreachable", self.lang)
+    def _hypercare_task(
+        self,
+        account_ids: List[dict],
+        offset: int,
+        limit: int,
+        total_count: int,
+        view: str,
+    ) -> TaskSchema:
+        filter_category_sav = get_filter("category", "sav", self.text_lang)
+        filter_category_unreachable = get_filter(
+            "category", "unreachable", self.text_lang
+        )
 
-        cards = []
-        for account_id in account_ids:
-            registration_date = datetime.strptime(
-                account_id["registration_date"], "%Y-%m-%d %H:%M:%S"
-            )
-            hypercare_end = registration_date + timedelta(days=75)
-            hypercare_date_left = hypercare_end - datetime.now()
-            if hypercare_date_left.days < 17:
-                alert_color = "#bf7404"
-            elif hypercare_date_left.days > 20:
-                alert_color = "#d12300"
-            else:
-                alert_color = "#000000"
-            filters = []
-            cards.append(
-                TaskCardSchema(
-                    filters=filters,
-                    collapsed=TaskCollapsedCardSchema(
-                        icon="hypercare-icon",
-                        icon_color="#F2BA11",
-                        title=account_id["client_id"][1],
-                        rows=[],
-                        alert_text=f"{hypercare_date_left.days} days to hypercare end",
-                        alert_text_color=alert_color,
-                    ),
-                    expanded=TaskExpandedCardSchema(
-                        rows=[
-                            RowSchema(
-                                label=TextTranslationSchema(
-                                    en="Client phone number",
-                                    fr="Numéro de téléphone du client",
-                                ),
-                                value=TextTranslationSchema(
-                                    en="+261 32 68 510 46", fr="+261 32 68 510 46"
-                                ),
-                            ),
-                            RowSchema(
-                                label=TextTranslationSchema(
-                                    en="Product name", fr="Nom du produit"
-                                ),
-                                value=TextTranslationSchema(
-                                    en="Solar Home System", fr="Solar Home System"
-                                ),
-                            ),
-                            RowSchema(
-                                label=TextTranslationSchema(en="Village", fr="Village"),
-                                value=TextTranslationSchema(
-                                    en="Ambohidratrimo", fr="Ambohidratrimo"
-                                ),
-                            ),
-                        ],
-                    ),
-                )
-            )
+        cards = self._build_hypercare_cards(account_ids, view)
 
-        return TaskSchema(
+        return TaskSchema.model_construct(
             icon="hypercare-icon",
             title="Hypercare at risk",
-            total_value=len(account_ids),
-            pagination=PaginationSchema(
+            total_value=float(len(account_ids)),
+            pagination=PaginationSchema.model_construct(
                 offset=offset,
                 limit=limit,
                 current_records=limit,
@@ -337,6 +641,54 @@ class OdooService:
             cards=cards,
         )
 
+    def get_hypercare_card(self, account_id: int) -> TaskCardSchema:
+        segmentation_ids = self._segmentation_ids(
+            settings.odoo_account_segmentation_hypercare
+        )
+        account_ids, _ = self.search_account_by_segmentation_and_responsible(
+            0,
+            1,
+            "id asc",
+            segmentation_ids=segmentation_ids,
+            account_status="disabled",
+            account_ids=[account_id],
+            registered_after=self._hypercare_start(),
+        )
+        if not account_ids:
+            raise CardNotFoundException(
+                "Card not found", f"Hypercare account ({account_id}) not found"
+            )
+        return self._build_hypercare_cards(account_ids[:1], VIEW_FULL)[0]
+
+    def _build_hypercare_card(
+        self, account_id: dict, days_left: int, alert_color: str, view: str
+    ) -> TaskCardSchema:
+        expanded_item = None
+        if view == VIEW_FULL:
+            expanded_item = TaskExpandedCardSchema.model_construct(
+                rows=[
+                    self._row(
+                        "client_phone_number",
+                        self._literal("+261 32 68 510 46"),
+                    ),
+                    self._row("product_name", self._literal("Solar Home System")),
+                    self._row("village", self._literal("Ambohidratrimo")),
+                ],
+            )
+        return TaskCardSchema.model_construct(
+            id=f"payg_account_{account_id['id']}",
+            filters=[],
+            collapsed=TaskCollapsedCardSchema.model_construct(
+                icon="hypercare-icon",
+                icon_color="#F2BA11",
+                title=account_id["client_id"][1],
+                rows=[],
+                alert_text=f"{days_left} days to hypercare end",
+                alert_text_color=alert_color,
+            ),
+            expanded=expanded_item,
+        )
+
     def set_refresh_token(self, employee_id: int, refresh_token: str):
         self.model_hr_employee.write(employee_id, {"refresh_token": refresh_token})
 
@@ -371,37 +723,188 @@ class OdooService:
         )
 
     def get_employee_tasks(self) -> List[TasksSchema]:
+        counts = TaskCounterService(self).get_counts()
         return [
             TasksSchema(
                 icon="units-repossess-icon",
                 label="Units to Repossess",
-                count=12,
+                count=counts[TASK_REPOSSESSION],
                 action="/api/v1/employee/unit-repossess",
                 color="#F2BA11",
             ),
             TasksSchema(
                 icon="to-do-icon",
                 label="Actions to do",
-                count=18,
+                count=counts[TASK_TODO],
                 action="/api/v1/employee/todo",
                 color="#AA54CC",
             ),
             TasksSchema(
                 icon="slow-payer-icon",
                 label="Slow Payer",
-                count=30,
+                count=counts[TASK_SLOW_PAYER],
                 action="/api/v1/employee/tasks/slower-payer",
                 color="#F26522",
             ),
             TasksSchema(
                 icon="hypercare-icon",
                 label="Hypercare at Risk",
-                count=0,
+                count=counts[TASK_HYPERCARE],
                 action="/api/v1/employee/hypercare",
                 color="#72cc1f",
             ),
         ]
 
+    # Team methods
+
+    def _team_members(self, employee_ids: List[int]) -> List[dict]:
+        """The employees among `employee_ids` who report to the current user."""
+        return self.model_hr_employee.search(
+            domain=[
+                ["id", "in", employee_ids],
+                ["parent_id", "=", int(self.user_context["sub"])],
+            ],
+            fields=["id", "name"],
+            limit=False,
+            order="name asc",
+        )
+
+    def _team_hypercare(
+        self, employee_ids: List[int], offset: int, limit: int, fields: List[str]
+    ) -> Dict[int, Tuple[List[dict], int]]:
+        """
+        The page and count of the hypercare accounts of several employees: from
+        the replica when it is fresh, else with two queries whatever the number
+        of employees: one ranking all their accounts, on the id and agent only,
+        and one reading the accounts on the pages.
+        """
+        segmentation_ids = self._segmentation_ids(
+            settings.odoo_account_segmentation_hypercare
+        )
+        registered_after = self._hypercare_start()
+        order = "registration_date asc"
+        replica = get_account_replica()
+        if replica is not None:
+            results = {
+                employee_id: replica.search(
+                    employee_id,
+                    segmentation_ids,
+                    offset,
+                    limit,
+                    order,
+                    fields,
+                    account_status="disabled",
+                    registered_after=registered_after,
+                )
+                for employee_id in employee_ids
+            }
+            if all(result is not None for result in results.values()):
+                return results
+        # One query ranks the accounts of the whole team, reading only their id
+        # and agent, and a second reads the accounts on the pages.
+        ranking = defaultdict(list)
+        for account in self.model_payg_account.search(
+            self._account_domain(
+                segmentation_ids,
+                "disabled",
+                registered_after=registered_after,
+                employee_ids=employee_ids,
+            ),
+            fields=["id", "responsible_agent_employee_id"],
+            limit=False,
+            order=f"responsible_agent_employee_id asc, {order}",
+        ):
+            ranking[account["responsible_agent_employee_id"][0]].append(account["id"])
+        page_ids = {
+            employee_id: ranking[employee_id][offset : offset + limit]
+            for employee_id in employee_ids
+        }
+        ids = [account_id for page in page_ids.values() for account_id in page]
+        accounts = {}
+        if ids:
+            accounts = {
+                account["id"]: account
+                for account in self.model_payg_account.search(
+                    [["id", "in", ids]], fields=fields, limit=False
+                )
+            }
+        return {
+            employee_id: (
+                [accounts[account_id] for account_id in page if account_id in accounts],
+                len(ranking[employee_id]),
+            )
+            for employee_id, page in page_ids.items()
+        }
+
+    def get_team_tasks_service(
+        self,
+        employee_ids: List[int],
+        task: str,
+        offset: int,
+        limit: int,
+        view: str = VIEW_FULL,
+    ) -> TeamTaskSchema:
+        """
+        List the slow payers or hypercare accounts of several agents reporting
+        to the current user, paginated per agent.
+
+        The slow payers come from the cached worklist of each agent, the ones
+        not cached being ranked from a single query. The hypercare accounts of
+        the whole team are ranked with one query and their pages read with
+        another.
+
+        Args:
+            employee_ids (List[int]): The agents requested.
+            task (str): `TASK_SLOW_PAYER` or `TASK_HYPERCARE`.
+            offset (int): The offset in the list of each agent.
+            limit (int): The accounts per agent at most.
+            view (str): The view of the cards.
+
+        Returns:
+            TeamTaskSchema: The tasks of each agent of the team, and the agents
+                requested who are not in it.
+        """
+        members = self._team_members(employee_ids)
+        member_ids = [member["id"] for member in members]
+        if task == TASK_SLOW_PAYER:
+            worklists = self._team_worklists(member_ids) if member_ids else {}
+        else:
+            hypercare = (
+                self._team_hypercare(
+                    member_ids,
+                    offset,
+                    limit,
+                    self._fields(PaygAccountSchema, "payg.account", view),
+                )
+                if member_ids
+                else {}
+            )
+
+        agents = []
+        for member in members:
+            if task == TASK_SLOW_PAYER:
+                page, total = self._worklist_page(
+                    worklists[member["id"]], offset, limit
+                )
+                agent_task = self._slow_payer_task(page, offset, limit, total, view)
+            else:
+                page, total = hypercare[member["id"]]
+                agent_task = self._hypercare_task(page, offset, limit, total, view)
+            refresh_task_counter(member["id"], task, total)
+            agents.append(
+                AgentTaskSchema.model_construct(
+                    employee_id=member["id"], name=member["name"], task=agent_task
+                )
+            )
+        return TeamTaskSchema.model_construct(
+            agents=agents,
+            unauthorized_employee_ids=[
+                employee_id
+                for employee_id in dict.fromkeys(employee_ids)
+                if employee_id not in member_ids
+            ],
+        )
+
     # sms_otp methods
 
     def search_last_otp_by_phone(self, phone_number: str):
@@ -431,8 +934,10 @@ class OdooService:
     def deactive_otp_by_phone(self, phonenumber: str):
         domain = [["phone_number", "=", phonenumber], ["active", "=", True]]
         otp_ids = self.model_sms_otp.search(domain=domain, fields=["id"])
-        for otp_id in otp_ids:
-            self.model_sms_otp.write(otp_id["id"], {"active": False})
+        if otp_ids:
+            self.model_sms_otp.write(
+                [otp_id["id"] for otp_id in otp_ids], {"active": False}
+            )
 
     # payg_account methods
     @check_can_use_application_agent
@@ -443,21 +948,98 @@ class OdooService:
         order: str,
         segmentation_ids: List[int],
         account_status: str = None,
+        fields: Optional[List[str]] = None,
+        account_ids: Optional[List[int]] = None,
+        registered_after: Optional[str] = None,
     ):
-        employee_id = int(self.user_context["sub"])
-        domain = [
-            ["account_segmentation_id", "in", segmentation_ids],
-            ["responsible_agent_employee_id", "=", employee_id],
-        ]
-        if account_status:
-            domain.append(["account_status", "=", account_status])
-        fields = list(PaygAccountSchema.model_fields.keys())
-        all_account_ids = self.model_payg_account.search(domain=domain, fields=["id"])
-        account_ids = self.model_payg_account.search(
-            domain=domain, fields=fields, limit=limit, offset=offset, order=order
+        fields = fields or list(PaygAccountSchema.model_fields.keys())
+        replica = get_account_replica()
+        if replica is not None:
+            result = replica.search(
+                int(self.user_context["sub"]),
+                segmentation_ids,
+                offset,
+                limit,
+                order,
+                fields,
+                account_status=account_status,
+                account_ids=account_ids,
+                registered_after=registered_after,
+            )
+            if result is not None:
+                return result
+        domain = self._account_domain(
+            segmentation_ids, account_status, account_ids, registered_after
+        )
+        results = run_concurrently(
+            {
+                "count": partial(self.model_payg_account.search_count, domain),
+                "records": partial(
+                    self.model_payg_account.search,
+                    domain=domain,
+                    fields=fields,
+                    limit=limit,
+                    offset=offset,
+                    order=order,
+                ),
+            }
         )
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return results["records"], results["count"]
 
-        return account_ids, len(all_account_ids)
+    @check_can_use_application_agent
+    def count_account_by_segmentation_and_responsible(
+        self,
+        segmentation_ids: List[int],
+        account_status: str = None,
+        registered_after: Optional[str] = None,
+    ) -> int:
+        replica = get_account_replica()
+        if replica is not None:
+            count = replica.count(
+                int(self.user_context["sub"]),
+                segmentation_ids,
+                account_status,
+                registered_after=registered_after,
+            )
+            if count is not None:
+                return count
+        return self.model_payg_account.search_count(
+            self._account_domain(
+                segmentation_ids, account_status, registered_after=registered_after
+            )
+        )
+
+    def _account_domain(
+        self,
+        segmentation_ids: List[int],
+        account_status: str = None,
+        account_ids: Optional[List[int]] = None,
+        registered_after: Optional[str] = None,
+        employee_ids: Optional[List[int]] = None,
+    ) -> List:
+        """
+        Domain of the accounts of the current user, or of `employee_ids` when
+        given.
+        """
+        if employee_ids is None:
+            responsible = [
+                "responsible_agent_employee_id",
+                "=",
+                int(self.user_context["sub"]),
+            ]
+        else:
+            responsible = ["responsible_agent_employee_id", "in", employee_ids]
+        domain = [["account_segmentation_id", "in", segmentation_ids], responsible]
+        if account_status:
+            domain.append(["account_status", "=", account_status])
+        if account_ids:
+            domain.append(["id", "in", account_ids])
+        if registered_after:
+            domain.append(["registration_date", ">", registered_after])
+        return domain
 
     # incentive.report methods
 
@@ -491,24 +1073,48 @@ class OdooService:
             [["id", "=", report_id]], fields=fields
         )
 
-    def search_incentive_report_by_employee(
-        self,
-    ) -> List[IncentiveReportSchema]:
+    def _incentive_reports_loader(self) -> Tuple[str, Callable[[], list]]:
         fields = list(IncentiveReportSchema.model_fields.keys())
         generic_job_id = self.user_context["generic_job_id"][0]
         company_id = self.user_context["company_id"][0]
-        incentive_report_ids = self.model_incentive_report.search(
-            [["generic_job_id", "=", generic_job_id], ["company_id", "=", company_id]],
+        return incentive_reports_key(generic_job_id, company_id), partial(
+            self.model_incentive_report.search,
+            [
+                ["generic_job_id", "=", generic_job_id],
+                ["company_id", "=", company_id],
+            ],
             fields=fields,
         )
-        return incentive_report_ids
+
+    @request_cache
+    def search_incentive_report_by_employee(
+        self,
+    ) -> List[IncentiveReportSchema]:
+        return reference_cache.get_or_load(*self._incentive_reports_loader())
+
+    def refresh_incentive_reports(self, min_age: float = 0) -> bool:
+        """Reload the cached reports of the job and company of the employee."""
+        key, loader = self._incentive_reports_loader()
+        return reference_cache.refresh(key, loader, min_age=min_age)
 
     # incentive.event methods
 
-    def search_event_type(self):
+    def _event_types_loader(self) -> Tuple[str, Callable[[], list]]:
         fields = list(EventTypeSchema.model_fields.keys())
-        event_type_ids = self.move_event_type.search(domain=[], fields=fields)
-        return event_type_ids
+        return "event_types", partial(
+            self.move_event_type.search, domain=[], fields=fields
+        )
+
+    @request_cache
+    def search_event_type(self):
+        return reference_cache.get_or_load(*self._event_types_loader())
+
+    def refresh_event_types(self, min_age: float = 0) -> bool:
+        key, loader = self._event_types_loader()
+        return reference_cache.refresh(key, loader, min_age=min_age)
+
+    def event_catalog(self) -> EventCatalog:
+        return get_event_catalog(self.odoo_client)
 
     @check_can_use_application_agent
     def search_bonuses(
@@ -560,6 +1166,14 @@ class OdooService:
             event_categories=enriched_records, total_value=total_value
         )
 
+    def _row(self, label_key: str, value: Translatable) -> RowSchema:
+        return RowSchema.model_construct(
+            label=catalog.text(label_key, self.text_lang), value=value
+        )
+
+    def _literal(self, value: str) -> Translatable:
+        return catalog.literal(value, self.text_lang)
+
     def _extract_color(self, value):
         red = "#e3350e"
         green = "#17871b"
@@ -572,6 +1186,7 @@ class OdooService:
         offset: Optional[int] = 0,
         order: Optional[str] = "event_date desc",
         category: Optional[str] = None,
+        view: str = VIEW_FULL,
     ) -> IncentiveReportDetailsSchema:
         employee_id = self.user_context["sub"]
         domain = self._build_bonus_domain(
@@ -579,7 +1194,7 @@ class OdooService:
             category=category,
             report_id=report_id,
         )
-        fields = list(IncentiveEventSchema.model_fields.keys())
+        fields = self._fields(IncentiveEventSchema, "incentive.event", view)
         record_ids, total_count = self.model_incentive_event.model_method(
             "get_event_details",
             {
@@ -592,88 +1207,100 @@ class OdooService:
         )
         events = []
         currency = self.user_context["currency_id"][1]
-        filter_value: List[FilterSchema] = []
+        event_catalog = self.event_catalog()
+        filters: Dict[int, FilterSchema] = {}
         total_value = 0
         for record_id in record_ids:
-            filter_id = FilterSchema(
-                value=record_id["event_category"]["code"],
-                param="event_category",
-                label=record_id["event_category"]["name"],
-            )
-            if filter_id not in filter_value:
-                filter_value.append(filter_id)
-
-            value = record_id["value"]
-            value_color = self._extract_color(value)
-            client_id = record_id["client_id"]
-            client_name = client_id["name"] if client_id.get("name") else "Unknown"
-            category = record_id["event_category"]
-            collapsed = CollapsedCardSchema(
-                icon=category["icon"],
-                icon_color=category["color"],
-                title=client_name,
-                value=value,
-                currency=currency,
-                value_color=value_color,
-                subtitle=category["name"],
-            )
-            expanded = ExpandedSchema(
-                rows=[
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Incentive type", fr="Type d'évènement"
-                        ),
-                        value=TextTranslationSchema(
-                            en="New customer bonus", fr="Nouveau bonus client"
-                        ),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Incentive criteria", fr="Critères de l'évènements"
-                        ),
-                        value=TextTranslationSchema(
-                            en=record_id["event_date"], fr=record_id["event_date"]
-                        ),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(en="Account", fr="Compte"),
-                        value=TextTranslationSchema(
-                            en="First time product purchase",
-                            fr="Premier achat de produit",
-                        ),
-                    ),
-                    RowSchema(
-                        label=TextTranslationSchema(
-                            en="Commission amount", fr="Montant de la commission"
-                        ),
-                        value=TextTranslationSchema(
-                            en=f"{value} {currency}", fr=f"{value} {currency}"
-                        ),
-                    ),
-                ]
-            )
-            events.append(
-                CardSchema(
-                    id=f"incentive_event_{record_id['event_id']}",
-                    expanded=expanded,
-                    collapsed=collapsed,
-                )
-            )
-            total_value += value
-        return IncentiveReportDetailsSchema(
+            category = event_catalog.category(record_id.get("event_category"))
+            if category is not None and category.id not in filters:
+                filters[category.id] = event_catalog.filter(category, self.text_lang)
+            events.append(self._build_bonus_card(record_id, category, currency, view))
+            total_value += record_id["value"]
+        return IncentiveReportDetailsSchema.model_construct(
             list_id=f"incentive_report_{report_id}",
-            total_value=total_value,
+            total_value=float(total_value),
             currency=currency,
-            pagination=PaginationSchema(
+            pagination=PaginationSchema.model_construct(
                 offset=offset,
                 limit=limit,
                 current_records=len(record_ids),
                 total_records=total_count,
             ),
-            filters=filter_value,
+            filters=list(filters.values()),
             cards=events,
         )
 
+    def get_bonus_card(self, report_id: int, event_id: int) -> CardSchema:
+        domain = self._build_bonus_domain(
+            employee_id=int(self.user_context["sub"]),
+            report_id=report_id,
+        )
+        domain.append(["id", "=", event_id])
+        record_ids, _ = self.model_incentive_event.model_method(
+            "get_event_details",
+            {
+                "domain": domain,
+                "fields": list(IncentiveEventSchema.model_fields.keys()),
+                "limit": 1,
+                "offset": 0,
+                "order": "event_date desc",
+            },
+        )
+        if not record_ids:
+            raise CardNotFoundException(
+                "Card not found",
+                f"Incentive event ({event_id}) not found in report ({report_id})",
+            )
+        currency = self.user_context["currency_id"][1]
+        category = self.event_catalog().category(record_ids[0].get("event_category"))
+        return self._build_bonus_card(record_ids[0], category, currency, VIEW_FULL)
+
+    def _build_bonus_card(
+        self,
+        record_id: dict,
+        category: Optional[EventCategory],
+        currency: str,
+        view: str,
+    ) -> CardSchema:
+        value = record_id["value"]
+        value_color = self._extract_color(value)
+        client_id = record_id["client_id"]
+        client_name = client_id["name"] if client_id.get("name") else "Unknown"
+        collapsed = CollapsedCardSchema.model_construct(
+            icon=category.icon if category else "",
+            icon_color=category.color if category else "",
+            title=client_name,
+            value=float(value),
+            currency=currency,
+            value_color=value_color,
+            subtitle=category.name if category else "",
+        )
+        expanded = None
+        if view == VIEW_FULL:
+            expanded = ExpandedSchema.model_construct(
+                rows=[
+                    self._row(
+                        "incentive_type",
+                        catalog.text("new_customer_bonus", self.text_lang),
+                    ),
+                    self._row(
+                        "incentive_criteria", self._literal(record_id["event_date"])
+                    ),
+                    self._row(
+                        "account",
+                        catalog.text("first_time_product_purchase", self.text_lang),
+                    ),
+                    self._row(
+                        "commission_amount", self._literal(f"{value} {currency}")
+                    ),
+                ]
+            )
+        return CardSchema.model_construct(
+            id=f"incentive_event_{record_id['event_id']}",
+            expanded=expanded,
+            collapsed=collapsed,
+        )
+
     def fetch_bonuses_summary_by_report(self, report_id) -> SummarySimpleSchema:
         vals_report_id, bonuses = self.search_bonuses(report_id=report_id)
         return SummarySimpleSchema(
@@ -714,33 +1341,28 @@ class OdooService:
         return domain
 
     def _enrich_records(self, record_ids: List[dict]) -> tuple:
-        """Enrich records with event type and account details."""
-        enriched_records = []
+        """Sum the values of the records by category."""
+        event_catalog = self.event_catalog()
         total_value = 0
-        event_type_value = dict()
+        category_value: Dict[int, float] = {}
+        categories: Dict[int, EventCategory] = {}
         for record in record_ids:
-            if record.get("event_category"):
-                event_type = record["event_category"]
-                event_type_name = event_type["name"]
-                event_type_color = event_type["color"]
-                event_type_code = event_type["code"]
-                if event_type_name not in event_type_value:
-                    event_type_value[event_type_name] = {
-                        "value": 0,
-                        "color": event_type_color,
-                        "code": event_type_code,
-                    }
-                event_type_value[event_type_name]["value"] += record["value"]
+            category = event_catalog.category(record.get("event_category"))
+            if category is not None:
+                if category.id not in category_value:
+                    category_value[category.id] = 0
+                    categories[category.id] = category
+                category_value[category.id] += record["value"]
             total_value += record["value"]
-        for item in event_type_value:
-            enriched_records.append(
-                EventCategorySchema(
-                    name=item,
-                    color=event_type_value[item]["color"],
-                    value=event_type_value[item]["value"],
-                    code=event_type_value[item]["code"],
-                )
+        enriched_records = [
+            EventCategorySchema(
+                name=categories[category_id].name,
+                color=categories[category_id].color,
+                value=value,
+                code=categories[category_id].code,
             )
+            for category_id, value in category_value.items()
+        ]
         sorted_records = sorted(enriched_records, key=lambda x: x.value, reverse=True)
         return (sorted_records, total_value)
 
@@ -759,14 +1381,12 @@ class OdooService:
         logging.info(f"refresh_token Payload: {payload}")
         token = data["token"]
         employee_id = int(payload["sub"])
-        self.check_refresh_token(employee_id, token)
-        employee_details = self.search_employee_by_id(employee_id)
-        employee_details.pop("id")
-        employee_details["sub"] = employee_id
-        access_token = create_access_token(employee_details)
+        registry = RefreshTokenRegistry(self)
+        registry.check(employee_id, token)
+        access_token = create_access_token(get_user_context(str(employee_id)))
         expire_in = settings.access_token_expire * 60
         refresh_token = create_refresh_token({"sub": employee_id})
-        self.set_refresh_token(employee_id, refresh_token)
+        registry.issue(employee_id, refresh_token, rotate=True)
         return TokenSchema(
             access_token=access_token,
             token_type="Bearer",
@@ -778,5 +1398,6 @@ class OdooService:
         payload = data["payload"]
         token = data["token"]
         employee_id = int(payload["sub"])
-        self.check_refresh_token(employee_id, token)
-        self.revoke_refresh_token(employee_id)
+        registry = RefreshTokenRegistry(self)
+        registry.check(employee_id, token)
+        registry.revoke(employee_id)
@@ -1,18 +1,17 @@
-import json
-import logging
-import os
 from datetime import datetime, timezone
 
-import requests
-
 from app.core import settings as main_settings
+from app.core.i18n import catalog
 from app.core.odoo_config import settings as odoo_settings
 from app.core.otp_config import settings
 from app.schemas.auth import AuthSchema
 from app.schemas.otp import OTPResponseSchema
 from app.schemas.token import TokenSchema
 from app.schemas.user import UserSchema
+from app.services.auth.refresh_tokens import RefreshTokenRegistry
 from app.services.odoo.service import OdooService
+from app.services.otp.store import get_otp_store
+from app.services.sms.dispatcher import sms_dispatcher
 from app.utils.main import (
     create_access_token,
     create_refresh_token,
@@ -30,20 +29,15 @@ class OTP:
         self.phone_number = extracted_data["formatted_number"]
         self.country = extracted_data["country"]
         self.odoo_service = OdooService()
+        self.store = get_otp_store(self.odoo_service)
 
     def can_generate_new_otp(self):
-        otp_id = self.odoo_service.search_last_otp_by_phone(
-            self.phone_number,
-        )
-        if otp_id:
-            create_date = otp_id[0]["create_date"]
-            create_date = datetime.strptime(create_date, "%Y-%m-%d %H:%M:%S").replace(
-                tzinfo=timezone.utc
-            )
+        create_date = self.store.last_created_at(self.phone_number)
+        if create_date:
             current_date = datetime.now(timezone.utc)
-            time_diff = current_date - create_date
-            if time_diff.seconds < settings.otp_interval:
-                second_left = settings.otp_interval - time_diff.seconds
+            time_diff = int((current_date - create_date).total_seconds())
+            if time_diff < settings.otp_interval:
+                second_left = settings.otp_interval - time_diff
                 raise ValueError(
                     {
                         "error": "otp_spam",
@@ -62,14 +56,7 @@ class OTP:
             self.can_generate_new_otp()
             company_id = employee_id[0]["company_id"][0]
             employee_id = employee_id[0]["id"]
-            self.odoo_service.model_sms_otp.create(
-                {
-                    "name": otp,
-                    "phone_number": self.phone_number,
-                    "res_id": employee_id,
-                    "res_model": "hr.employee",
-                }
-            )
+            self.store.create(self.phone_number, otp, employee_id)
             is_prod = main_settings.service_env.upper() not in ["LOCAL", "PREPROD"]
             message = f"OTP Sent to {self.phone_number}"
             lang = get_lang_from_company(company_id)
@@ -93,30 +80,30 @@ class OTP:
         secret = self._generate_secret()
         is_valid = validate_totp(secret, otp)
         if not is_valid:
-            self.odoo_service.deactive_otp_by_phone(self.phone_number)
+            self.store.deactivate(self.phone_number)
             raise ValueError(
                 {
                     "error": "otp_expired",
                     "error_description": "The OTP provided is expired",
                 }
             )
-        rec_id = self.odoo_service.search_otp_existance(self.phone_number, otp)
-        if not rec_id:
+        record = self.store.find(self.phone_number, otp)
+        if not record:
             raise ValueError(
                 {
                     "error": "otp_invalid",
                     "error_description": "The OTP provided is invalid",
                 }
             )
-        elif rec_id and not rec_id[0]["active"]:
+        elif not record.active:
             raise ValueError(
                 {
                     "error": "otp_expired",
                     "error_description": "The OTP is already used",
                 }
             )
-        self.odoo_service.deactive_otp_by_phone(self.phone_number)
-        employee_id = rec_id[0]["res_id"]
+        self.store.deactivate(self.phone_number)
+        employee_id = record.employee_id
         employee_details = self.odoo_service.search_employee_by_id(employee_id)
         employee_details.pop("id")
         employee_details["sub"] = employee_id
@@ -124,7 +111,7 @@ class OTP:
         expire_in = odoo_settings.access_token_expire * 60
         picture_url = f"{odoo_settings.odoo_url}/web/image/hr.employee.public/{employee_id}/image_512/image.jpeg"
         refresh_token = create_refresh_token({"sub": employee_id})
-        self.odoo_service.set_refresh_token(employee_id, refresh_token)
+        RefreshTokenRegistry(self.odoo_service).issue(employee_id, refresh_token)
         job_title = employee_details.get("generic_job_id", [0, "Unknown"])[1]
         return AuthSchema(
             user=UserSchema(
@@ -147,18 +134,9 @@ class OTP:
         return ["+261383363158", "+261348176051"]
 
     def send_sms(self, otp, employee_id, otp_id, lang="en"):
-        SMS_URL = os.getenv("SMS_URL")
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": os.getenv("API_KEY_SMS_REQUEST"),
-        }
-        msg = {
-            "en": f"Your OTP code is {otp}. It expires in 1 minute. Do not share this code with anyone.",
-            "fr": f"Votre code OTP est {otp}. Il expire dans 1 minute. Ne partagez pas ce code avec quelqu'un.",
-        }
         message_input = {
             "msisdn": self.phone_number,
-            "msg": msg.get(lang),
+            "msg": catalog.format("otp_sms", lang, otp=otp),
             "priority": "high",
             "client_app": "mobile_app_otp",
             "sms_id": f"{employee_id}-{otp_id}",
@@ -166,8 +144,4 @@ class OTP:
             "callback": False,
             "test": False,
         }
-        response = requests.post(
-            SMS_URL, data=json.dumps(message_input), headers=headers
-        )
-        logging.info(f"Response: {response.text}")
-        return response
+        sms_dispatcher.enqueue(message_input)
@@ -0,0 +1,253 @@
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.otp_config import settings
+from app.utils.cache import TTLCache
+from app.utils.store import SharedStore, get_shared_store
+
+# Number of OTPs kept per phone number, most recent first.
+MAX_OTPS_PER_PHONE = 5
+
+# Writes mirrored to Odoo, one at a time so that each runs after the ones
+# submitted before it: the deactivation of an OTP never precedes its creation.
+audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="otp-audit")
+
+
+@dataclass(frozen=True)
+class OTPRecord:
+    phone_number: str
+    otp: str
+    employee_id: int
+    created_at: datetime
+    active: bool = True
+
+
+class OTPStore(ABC):
+    """Where the OTPs sent to the agents are kept until they are verified."""
+
+    @abstractmethod
+    def last_created_at(self, phone_number: str) -> Optional[datetime]:
+        """Return when the last OTP of `phone_number` was created, if any."""
+
+    @abstractmethod
+    def create(self, phone_number: str, otp: str, employee_id: int) -> OTPRecord:
+        """Record a new active OTP sent to `phone_number`."""
+
+    @abstractmethod
+    def find(self, phone_number: str, otp: str) -> Optional[OTPRecord]:
+        """Return the most recent OTP of `phone_number` matching `otp`."""
+
+    @abstractmethod
+    def deactivate(self, phone_number: str) -> None:
+        """Mark every OTP of `phone_number` as used."""
+
+
+class InMemoryOTPStore(OTPStore):
+    """
+    Keep the OTPs in this process for `OTP_STORE_TTL` seconds. Only suitable when
+    a single instance serves both the send and the verify requests.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 100_000):
+        self.ttl = ttl
+        self._records = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _get(self, phone_number: str) -> List[OTPRecord]:
+        return self._records.get(phone_number, [])
+
+    def last_created_at(self, phone_number: str) -> Optional[datetime]:
+        records = self._get(phone_number)
+        return records[0].created_at if records else None
+
+    def create(self, phone_number: str, otp: str, employee_id: int) -> OTPRecord:
+        record = OTPRecord(phone_number, otp, employee_id, datetime.now(timezone.utc))
+        with self._lock:
+            records = [record] + self._get(phone_number)[: MAX_OTPS_PER_PHONE - 1]
+            self._records.set(phone_number, records)
+        return record
+
+    def find(self, phone_number: str, otp: str) -> Optional[OTPRecord]:
+        return next(
+            (record for record in self._get(phone_number) if record.otp == otp), None
+        )
+
+    def deactivate(self, phone_number: str) -> None:
+        with self._lock:
+            records = self._get(phone_number)
+            if records:
+                self._records.set(
+                    phone_number, [replace(record, active=False) for record in records]
+                )
+
+
+class SharedOTPStore(OTPStore):
+    """
+    Keep the OTPs in the store shared by every instance, so an OTP sent by one
+    instance can be verified by another.
+    """
+
+    key_prefix = "otp:"
+
+    def __init__(self, store: SharedStore, ttl: float):
+        self.store = store
+        self.ttl = ttl
+
+    def _get(self, phone_number: str) -> List[OTPRecord]:
+        value = self.store.get(self.key_prefix + phone_number)
+        if not value:
+            return []
+        return [
+            OTPRecord(
+                **{**item, "created_at": datetime.fromisoformat(item["created_at"])}
+            )
+            for item in json.loads(value)
+        ]
+
+    def _set(self, phone_number: str, records: List[OTPRecord]) -> None:
+        value = json.dumps(
+            [
+                {**asdict(record), "created_at": record.created_at.isoformat()}
+                for record in records
+            ]
+        )
+        self.store.set(self.key_prefix + phone_number, value, self.ttl)
+
+    def last_created_at(self, phone_number: str) -> Optional[datetime]:
+        records = self._get(phone_number)
+        return records[0].created_at if records else None
+
+    def create(self, phone_number: str, otp: str, employee_id: int) -> OTPRecord:
+        record = OTPRecord(phone_number, otp, employee_id, datetime.now(timezone.utc))
+        records = self._get(phone_number)[: MAX_OTPS_PER_PHONE - 1]
+        self._set(phone_number, [record] + records)
+        return record
+
+    def find(self, phone_number: str, otp: str) -> Optional[OTPRecord]:
+        return next(
+            (record for record in self._get(phone_number) if record.otp == otp), None
+        )
+
+    def deactivate(self, phone_number: str) -> None:
+        records = self._get(phone_number)
+        if records:
+            self._set(
+                phone_number, [replace(record, active=False) for record in records]
+            )
+
+
+class OdooOTPStore(OTPStore):
+    """Keep the OTPs in the Odoo `sms.otp` model."""
+
+    def __init__(self, odoo_service):
+        self.odoo_service = odoo_service
+
+    def last_created_at(self, phone_number: str) -> Optional[datetime]:
+        otp_id = self.odoo_service.search_last_otp_by_phone(phone_number)
+        if not otp_id:
+            return None
+        return datetime.strptime(otp_id[0]["create_date"], "%Y-%m-%d %H:%M:%S").replace(
+            tzinfo=timezone.utc
+        )
+
+    def create(self, phone_number: str, otp: str, employee_id: int) -> OTPRecord:
+        self.odoo_service.model_sms_otp.create(
+            {
+                "name": otp,
+                "phone_number": phone_number,
+                "res_id": employee_id,
+                "res_model": "hr.employee",
+            }
+        )
+        return OTPRecord(phone_number, otp, employee_id, datetime.now(timezone.utc))
+
+    def find(self, phone_number: str, otp: str) -> Optional[OTPRecord]:
+        rec_id = self.odoo_service.search_otp_existance(phone_number, otp)
+        if not rec_id:
+            return None
+        return OTPRecord(
+            phone_number,
+            otp,
+            rec_id[0]["res_id"],
+            datetime.now(timezone.utc),
+            rec_id[0]["active"],
+        )
+
+    def deactivate(self, phone_number: str) -> None:
+        self.odoo_service.deactive_otp_by_phone(phone_number)
+
+
+class AuditedOTPStore(OTPStore):
+    """
+    Serve the OTPs from `store` and mirror every write to Odoo `sms.otp` in the
+    background, so the OTP history stays auditable without Odoo being on the
+    login path. The writes are mirrored in the order they were made. A failed
+    mirror write is logged and never fails the login.
+    """
+
+    def __init__(self, store: OTPStore, odoo_service):
+        self.store = store
+        self.audit = OdooOTPStore(odoo_service)
+
+    def _mirror(self, method, *args) -> None:
+        future = audit_executor.submit(method, *args)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        if future.exception():
+            logging.error(f"OTP audit mirroring failed: {future.exception()}")
+
+    def last_created_at(self, phone_number: str) -> Optional[datetime]:
+        return self.store.last_created_at(phone_number)
+
+    def create(self, phone_number: str, otp: str, employee_id: int) -> OTPRecord:
+        record = self.store.create(phone_number, otp, employee_id)
+        self._mirror(self.audit.create, phone_number, otp, employee_id)
+        return record
+
+    def find(self, phone_number: str, otp: str) -> Optional[OTPRecord]:
+        return self.store.find(phone_number, otp)
+
+    def deactivate(self, phone_number: str) -> None:
+        self.store.deactivate(phone_number)
+        self._mirror(self.audit.deactivate, phone_number)
+
+
+_memory_store = None
+_memory_store_lock = threading.Lock()
+
+
+def _get_memory_store() -> InMemoryOTPStore:
+    global _memory_store
+    with _memory_store_lock:
+        if _memory_store is None:
+            _memory_store = InMemoryOTPStore(settings.otp_store_ttl)
+        return _memory_store
+
+
+def get_otp_store(odoo_service) -> OTPStore:
+    """
+    Return the OTP store selected by `OTP_STORE_BACKEND`.
+
+    Args:
+        odoo_service (OdooService): Used by the Odoo backend and the audit mirror.
+
+    Returns:
+        OTPStore: The store of the configured backend.
+    """
+    if settings.otp_store_backend == "odoo":
+        return OdooOTPStore(odoo_service)
+    if settings.otp_store_backend == "memory":
+        store = _get_memory_store()
+    else:
+        store = SharedOTPStore(get_shared_store(), settings.otp_store_ttl)
+    if settings.otp_audit_mirror:
+        return AuditedOTPStore(store, odoo_service)
+    return store
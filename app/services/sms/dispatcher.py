@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import random
+from typing import TYPE_CHECKING, List, Optional
+
+from app.core.otp_config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+# Messages that could not be delivered are logged here by id, with the last
+# digits of their recipient and the reason. The text is left out, as it holds
+# the OTP: a lost message is found here and the agent asks for a new code.
+dead_letter_logger = logging.getLogger("sms.dead_letter")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class SMSDispatcher:
+    """
+    Deliver SMS to the gateway in the background.
+
+    Messages are put on a bounded queue and sent by `concurrency` workers over a
+    pooled HTTP client. A failed delivery is retried `max_retries` times with
+    exponential backoff and full jitter. Messages that still fail, or that do not
+    fit in the queue, go to the dead-letter log.
+
+    `enqueue` may be called from any thread once `start` has run on the event
+    loop of the application.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        api_key: Optional[str] = None,
+        concurrency: int = 8,
+        queue_size: int = 1000,
+        max_retries: int = 3,
+        timeout: float = 5.0,
+        backoff: float = 0.5,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.transport = transport
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+
+    def _start_workers(self) -> None:
+        # The client and workers are only created for the first SMS: httpx
+        # takes a good part of the import time of the application.
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            headers={
+                "Content-Type": "application/json",
+                "x-api-key": self.api_key or "",
+            },
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            transport=self.transport,
+        )
+        self._transport_error = httpx.TransportError
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Wait up to `drain_timeout` seconds for queued messages, then stop."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Stopping with {self._queue.qsize()} SMS still queued")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            self._dead_letter(self._queue.get_nowait(), "dispatcher stopped")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+
+    def enqueue(self, message: dict) -> None:
+        """Queue `message` for delivery. Safe to call from any thread."""
+        if not self.running:
+            raise RuntimeError("The SMS dispatcher is not running")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._put(message)
+        else:
+            self._loop.call_soon_threadsafe(self._put, message)
+
+    async def join(self) -> None:
+        """Wait until every queued message is delivered or dead-lettered."""
+        await self._queue.join()
+
+    def _put(self, message: dict) -> None:
+        if not self._workers:
+            self._start_workers()
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._dead_letter(message, "queue full")
+
+    async def _work(self) -> None:
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                self._dead_letter(message, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message: dict) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(
+                    self.url, content=json.dumps(message)
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    logging.info(f"Response: {response.text}")
+                    return
+                error = f"HTTP {response.status_code}"
+            except self._transport_error as e:
+                error = repr(e)
+            if attempt < self.max_retries:
+                await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
+        raise RuntimeError(f"gave up after {self.max_retries + 1} attempts: {error}")
+
+    @staticmethod
+    def _dead_letter(message: dict, reason: str) -> None:
+        # The text carries the OTP code and must not reach the logs, nor the
+        # full phone number.
+        msisdn = str(message.get("msisdn") or "")
+        dead_letter_logger.error(
+            f"SMS {message.get('sms_id')} to ...{msisdn[-4:]} not delivered: {reason}"
+        )
+
+
+sms_dispatcher = SMSDispatcher(
+    url=settings.sms_url,
+    api_key=settings.sms_api_key,
+    concurrency=settings.sms_concurrency,
+    queue_size=settings.sms_queue_size,
+    max_retries=settings.sms_max_retries,
+    timeout=settings.sms_timeout,
+)
@@ -0,0 +1,123 @@
+"""
+Delta sync of the card lists for the mobile client.
+
+A list requested with a `since` token only sends the items added or changed
+since that token, the ids of the items removed, and the ids of the whole list
+in order, for the client to rebuild it. The server keeps, per list, the
+snapshots `{item id: digest}` of its last few tokens in a cache store, so any
+worker or instance can answer the next sync. The token of a snapshot is
+derived from its content and order, so an unchanged list keeps its token and a
+reordered one gets a new one.
+
+A list is one page: its scope includes `offset` and `limit`. An item reported
+removed is no longer on that page, it may have moved to another one. Two syncs
+of the same page at once may drop each other's snapshot, whose token then gets
+a full sync.
+
+Items are compared on the digest of their rendered JSON rather than on the
+Odoo `write_date`: cards also change without any write, e.g. the days left of
+a hypercare account. An unknown or expired token gets the whole list back
+with `full` set, for the client to replace its copy.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic_core import to_json
+
+from app.core import settings
+from app.schemas.global_schema import SyncSchema, TaskSchema, TaskSyncSchema
+from app.schemas.incentive_report import (
+    IncentiveReportDetailsSchema,
+    IncentiveReportDetailsSyncSchema,
+    IncentiveReportSimpleSchema,
+    IncentiveReportSyncSchema,
+)
+from app.utils.store import get_cache_store
+
+# Snapshots kept per list, older tokens get a full sync.
+SNAPSHOTS = 4
+
+
+def sync_scope(user_context: dict, path: str, params: Dict[str, Any]) -> str:
+    """Identify a list: its employee, route and query parameters but `since`."""
+    query = sorted(
+        (name, str(value)) for name, value in params.items() if name != "since"
+    )
+    return f"{user_context['sub']}:{path}:{json.dumps(query)}"
+
+
+def _digest(item: Any) -> str:
+    return hashlib.sha1(to_json(item)).hexdigest()[:16]
+
+
+def diff(
+    scope: str, items: Dict[str, Any], since: Optional[str]
+) -> Tuple[List[str], SyncSchema]:
+    """
+    Compare the items of a list with its snapshot at `since`.
+
+    Args:
+        scope (str): The list, from `sync_scope`.
+        items (Dict[str, Any]): The current items by id, in list order.
+        since (str): The token of the client, empty for a first sync.
+
+    Returns:
+        Tuple[List[str], SyncSchema]: The ids of the items to send, and the
+            sync state to send with them.
+    """
+    digests = {item_id: _digest(item) for item_id, item in items.items()}
+    token = hashlib.sha1(json.dumps(list(digests.items())).encode()).hexdigest()[:20]
+    key = f"sync:{hashlib.sha1(scope.encode()).hexdigest()}"
+    store = get_cache_store("sync")
+    stored = store.get(key)
+    snapshots = json.loads(stored) if stored else {}
+    previous = snapshots.get(since) if since else None
+    if token not in snapshots:
+        snapshots = dict(list(snapshots.items())[-(SNAPSHOTS - 1) :])
+        snapshots[token] = digests
+        store.set(key, json.dumps(snapshots), settings.sync_token_ttl)
+    if previous is None:
+        return list(digests), SyncSchema.model_construct(
+            token=token, full=True, removed=[], order=list(digests)
+        )
+    changed = [
+        item_id
+        for item_id, digest in digests.items()
+        if previous.get(item_id) != digest
+    ]
+    removed = [item_id for item_id in previous if item_id not in digests]
+    return changed, SyncSchema.model_construct(
+        token=token, full=False, removed=removed, order=list(digests)
+    )
+
+
+def sync_task(scope: str, task: TaskSchema, since: Optional[str]) -> TaskSyncSchema:
+    cards = {card.id: card for card in task.cards}
+    changed, sync = diff(scope, cards, since)
+    return TaskSyncSchema.model_construct(
+        **{**task.__dict__, "cards": [cards[card_id] for card_id in changed]},
+        sync=sync,
+    )
+
+
+def sync_report_details(
+    scope: str, details: IncentiveReportDetailsSchema, since: Optional[str]
+) -> IncentiveReportDetailsSyncSchema:
+    cards = {card.id: card for card in details.cards}
+    changed, sync = diff(scope, cards, since)
+    return IncentiveReportDetailsSyncSchema.model_construct(
+        **{**details.__dict__, "cards": [cards[card_id] for card_id in changed]},
+        sync=sync,
+    )
+
+
+def sync_reports(
+    scope: str, reports: List[IncentiveReportSimpleSchema], since: Optional[str]
+) -> IncentiveReportSyncSchema:
+    by_id = {f"incentive_report_{report.id}": report for report in reports}
+    changed, sync = diff(scope, by_id, since)
+    return IncentiveReportSyncSchema.model_construct(
+        reports=[by_id[report_id] for report_id in changed], sync=sync
+    )
@@ -0,0 +1,189 @@
+"""
+Background refresh of the hot datasets, ahead of their expiry.
+
+Each job reloads its entries of the shared cache a little before they expire, so
+requests keep finding them fresh instead of waiting on Odoo. Every worker runs
+the jobs, but a reload skips the entries another worker of the host reloaded
+recently, so Odoo still sees one query per entry and period. The per-agent jobs
+only cover the agents who made a request within `CACHE_WARMER_ACTIVE_WINDOW`.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import settings
+from app.services.activity import recently_active_agents
+from app.services.main import refresh_homepage
+from app.services.odoo.counters import TaskCounterService
+from app.services.odoo.event_catalog import refresh_event_catalog
+from app.services.odoo.service import OdooService
+
+# Share of the TTL after which an entry is reloaded, and how often per TTL the
+# jobs look for such entries.
+REFRESH_AFTER = 0.75
+CHECKS_PER_TTL = 5
+# Relative spread of the job intervals, so the workers do not run in lockstep.
+JITTER = 0.1
+
+
+@dataclass
+class JobMetrics:
+    runs: int = 0
+    refreshed: int = 0
+    failures: int = 0
+    # Seconds between when the last run was due and when it started.
+    lag: float = 0.0
+    last_duration: float = 0.0
+    last_run_at: Optional[float] = None
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    # Lists the zero-argument refreshes of one run, each returning whether it
+    # reloaded its entry.
+    refreshes: Callable[[], List[Callable[[], bool]]]
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+
+def _event_types() -> List[Callable[[], bool]]:
+    min_age = settings.reference_cache_ttl * REFRESH_AFTER
+    return [partial(OdooService().refresh_event_types, min_age)]
+
+
+def _event_catalog() -> List[Callable[[], bool]]:
+    min_age = settings.reference_cache_ttl * REFRESH_AFTER
+    return [partial(refresh_event_catalog, OdooService().odoo_client, min_age)]
+
+
+def _incentive_reports() -> List[Callable[[], bool]]:
+    min_age = settings.reference_cache_ttl * REFRESH_AFTER
+    by_job_and_company = {}
+    for context in recently_active_agents():
+        key = (context["generic_job_id"][0], context["company_id"][0])
+        by_job_and_company.setdefault(key, context)
+    return [
+        partial(OdooService(context).refresh_incentive_reports, min_age)
+        for context in by_job_and_company.values()
+    ]
+
+
+def _homepages() -> List[Callable[[], bool]]:
+    min_age = settings.homepage_cache_ttl * REFRESH_AFTER
+    return [
+        partial(refresh_homepage, context, min_age)
+        for context in recently_active_agents()
+    ]
+
+
+def _refresh_task_counters(context: dict) -> bool:
+    TaskCounterService(OdooService(context)).refresh()
+    return True
+
+
+def _task_counters() -> List[Callable[[], bool]]:
+    # The counters are cached per process, so each worker refreshes its own.
+    return [
+        partial(_refresh_task_counters, context) for context in recently_active_agents()
+    ]
+
+
+class CacheWarmer:
+    """
+    Run the refresh jobs on jittered schedules from the event loop.
+
+    The refreshes run in the thread pool, at most `concurrency` at a time across
+    every job, which caps the load the warmer puts on Odoo.
+    """
+
+    def __init__(self, jobs: List[Job], concurrency: int = 4):
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks = [asyncio.create_task(self._schedule(job)) for job in self.jobs]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _schedule(self, job: Job) -> None:
+        # Start at a random point of the interval, then keep to the schedule.
+        due = time.monotonic() + random.uniform(0, job.interval)
+        while True:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            started = time.monotonic()
+            job.metrics.lag = started - due
+            await self.run(job)
+            job.metrics.last_duration = time.monotonic() - started
+            due += job.interval * random.uniform(1 - JITTER, 1 + JITTER)
+            # A run longer than the interval is not caught up by running back
+            # to back, the next one is due an interval from now.
+            due = max(due, time.monotonic())
+
+    async def _refresh(self, job: Job, refresh: Callable[[], bool]) -> None:
+        async with self._semaphore:
+            try:
+                if await run_in_threadpool(refresh):
+                    job.metrics.refreshed += 1
+            except Exception as e:
+                job.metrics.failures += 1
+                logging.error(f"Cache warmer job {job.name} failed: {e}")
+
+    async def run(self, job: Job) -> None:
+        """Run every refresh of `job` once."""
+        try:
+            refreshes = await run_in_threadpool(job.refreshes)
+        except Exception as e:
+            job.metrics.failures += 1
+            logging.error(f"Cache warmer job {job.name} failed: {e}")
+            return
+        await asyncio.gather(*(self._refresh(job, refresh) for refresh in refreshes))
+        job.metrics.runs += 1
+        job.metrics.last_run_at = time.time()
+        logging.debug(f"Cache warmer job {job.name}: {self.metrics()[job.name]}")
+
+    def metrics(self) -> Dict[str, dict]:
+        return {job.name: vars(job.metrics).copy() for job in self.jobs}
+
+
+cache_warmer = CacheWarmer(
+    [
+        Job(
+            "event_types",
+            settings.reference_cache_ttl / CHECKS_PER_TTL,
+            _event_types,
+        ),
+        Job(
+            "event_catalog",
+            settings.reference_cache_ttl / CHECKS_PER_TTL,
+            _event_catalog,
+        ),
+        Job(
+            "incentive_reports",
+            settings.reference_cache_ttl / CHECKS_PER_TTL,
+            _incentive_reports,
+        ),
+        Job("homepages", settings.homepage_cache_ttl / CHECKS_PER_TTL, _homepages),
+        # Not shared between workers, so refreshed once per TTL without an age
+        # check.
+        Job(
+            "task_counters",
+            settings.task_counter_ttl * REFRESH_AFTER,
+            _task_counters,
+        ),
+    ],
+    concurrency=settings.cache_warmer_concurrency,
+)
@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable
+
+# Shared by the services to run independent Odoo queries side by side. Calls
+# submitted here must not submit further calls and wait for them.
+executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="odoo")
+
+
+def run_concurrently(calls: Dict[Hashable, Callable[[], Any]]) -> Dict[Hashable, Any]:
+    """
+    Run independent blocking calls concurrently and wait for all of them.
+
+    Args:
+        calls (dict): The zero-argument callables to run, by name.
+
+    Returns:
+        dict: The result of each call by name, or the exception it raised.
+    """
+    futures = {name: executor.submit(call) for name, call in calls.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = e
+    return results
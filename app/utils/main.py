@@ -3,27 +3,53 @@ import hashlib
 import logging
 import re
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
 
-import phonenumbers
-import pyotp
 from fastapi import Depends, HTTPException, status
 from fastapi.security import (
     HTTPAuthorizationCredentials,
     HTTPBearer,
     OAuth2PasswordBearer,
 )
-from jose import JWTError, jwt
-from phonenumbers import NumberParseException, geocoder
 
+from app.core.i18n import catalog
 from app.core.odoo_config import settings as odoo_settings
 from app.core.otp_config import settings as otp_settings
-from app.schemas.global_schema import FilterSchema, TextTranslationSchema
+from app.schemas.global_schema import FilterSchema
+from app.services.activity import record_activity
+from app.services.auth.claims import (
+    CLAIMS_VERSION,
+    cache_user_context,
+    compact_claims,
+    get_user_context,
+)
+from app.services.auth.revocation import revocation_denylist
+from app.utils.cache import TTLCache
+from app.utils.tokens import InvalidTokenError, get_jwt_backend
 
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 security = HTTPBearer()
 
+# Claims of the access tokens already verified, by SHA-256 of the token. Entries
+# expire with their token, so a cached token is never accepted past its `exp`.
+verified_token_cache = TTLCache(maxsize=odoo_settings.token_cache_size)
+
+
+# phonenumbers, pyotp and the JWT library are imported on first use, which keeps
+# them out of the cold start of the instances that never need them.
+
+
+@lru_cache(maxsize=None)
+def _jwt_backend():
+    return get_jwt_backend(odoo_settings.jwt_backend)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 
 def verify_access_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
@@ -32,38 +58,90 @@ def verify_access_token(credentials: HTTPAuthorizationCredentials = Depends(secu
         headers={"WWW-Authenticate": "Bearer"},
     )
     token = credentials.credentials
+    key = _token_key(token)
+    payload = verified_token_cache.get(key)
+    if payload is not None:
+        return _user_context(payload, credentials_exception)
     try:
-        payload = jwt.decode(
+        payload = _jwt_backend().decode(
             token, odoo_settings.access_token_secret, algorithms=[ALGORITHM]
         )
         user_id = payload.get("sub")
         exp = payload.get("exp")
+        now = datetime.now(tz=timezone.utc).timestamp()
 
-        if exp and datetime.now(tz=timezone.utc).timestamp() > exp:
+        if exp and now > exp:
             raise HTTPException(status_code=401, detail="Token expired")
 
         if user_id is None:
             raise credentials_exception
-        return payload
+        if exp:
+            verified_token_cache.set(key, payload, ttl=exp - now)
 
-    except JWTError as e:
+    except InvalidTokenError as e:
         logging.error(f"JWTError: {e}")
         raise credentials_exception
     except Exception as e:
         logging.error(f"Exception: {e}")
         raise credentials_exception
+    return _user_context(payload, credentials_exception)
+
+
+def verified_token_claims(token: str) -> Optional[dict]:
+    """
+    Return the claims of an access token verified earlier, still valid and not
+    revoked, without verifying it again; None for any other token.
+    """
+    payload = verified_token_cache.get(_token_key(token))
+    if payload is None or revocation_denylist.is_revoked(payload):
+        return None
+    if payload.get("cv", CLAIMS_VERSION) != CLAIMS_VERSION:
+        return None
+    return payload
+
+
+def _user_context(payload: dict, credentials_exception: HTTPException) -> dict:
+    if revocation_denylist.is_revoked(payload):
+        raise credentials_exception
+    # Full tokens carry the whole context, compact ones only `sub` and `cv`.
+    if "cv" not in payload:
+        context = dict(payload)
+        record_activity(context)
+        return context
+    if payload["cv"] != CLAIMS_VERSION:
+        raise credentials_exception
+    try:
+        context = get_user_context(payload["sub"])
+    except LookupError as e:
+        logging.error(f"Exception: {e}")
+        raise credentials_exception
+    except Exception as e:
+        # Odoo could not be reached: the token may well be valid, retry later.
+        logging.error(f"Claims of employee {payload['sub']} not loaded: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Employee details are temporarily unavailable",
+            headers={"Retry-After": "5"},
+        )
+    context["exp"] = payload.get("exp")
+    record_activity(context)
+    return context
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
-    expire = datetime.now(tz=timezone.utc) + timedelta(
-        minutes=odoo_settings.access_token_expire
-    )
-    to_encode.update({"exp": expire})
+    if odoo_settings.access_token_format == "compact" and "sub" in to_encode:
+        cache_user_context(to_encode)
+        to_encode = compact_claims(to_encode)
+    issued_at = datetime.now(tz=timezone.utc)
+    expire = issued_at + timedelta(minutes=odoo_settings.access_token_expire)
+    to_encode.update({"exp": expire, "iat": issued_at})
     logging.info(f"create_access_token : data {to_encode}")
-    return jwt.encode(to_encode, odoo_settings.access_token_secret, algorithm=ALGORITHM)
+    return _jwt_backend().encode(
+        to_encode, odoo_settings.access_token_secret, algorithm=ALGORITHM
+    )
 
 
 def create_refresh_token(data: dict):
@@ -75,7 +153,7 @@ def create_refresh_token(data: dict):
     )
     to_encode.update({"exp": expire})
     logging.info(f"create_refresh_token : data {to_encode}")
-    return jwt.encode(
+    return _jwt_backend().encode(
         to_encode, odoo_settings.refresh_token_secret, algorithm=ALGORITHM
     )
 
@@ -88,14 +166,14 @@ def verify_refresh_token(credentials: HTTPAuthorizationCredentials = Depends(sec
     )
     token = credentials.credentials
     try:
-        payload = jwt.decode(
+        payload = _jwt_backend().decode(
             token, odoo_settings.refresh_token_secret, algorithms=[ALGORITHM]
         )
         return {
             "payload": payload,
             "token": token,
         }
-    except JWTError as e:
+    except InvalidTokenError as e:
         logging.error(f"JWTError: {e}")
         raise credentials_exception
     except Exception as e:
@@ -103,32 +181,66 @@ def verify_refresh_token(credentials: HTTPAuthorizationCredentials = Depends(sec
         raise credentials_exception
 
 
-def validate_and_extract_country(phone_number: str) -> dict:
+@lru_cache(maxsize=None)
+def _allowed_country_codes() -> frozenset:
+    import phonenumbers
+
+    return frozenset(
+        phonenumbers.country_code_for_region(region.strip().upper())
+        for region in otp_settings.phone_regions.split(",")
+        if region.strip()
+    )
+
+
+@lru_cache(maxsize=4096)
+def _normalize_phone_number(phone_number: str) -> tuple:
+    import phonenumbers
+
     try:
         if "+" not in phone_number:
             phone_number = f"+{phone_number}"
         parsed_number = phonenumbers.parse(phone_number, None)
+        # Checked before validation, which loads the metadata of the region.
+        allowed_codes = _allowed_country_codes()
+        if allowed_codes and parsed_number.country_code not in allowed_codes:
+            raise ValueError(f"Invalid phone number: {phone_number}")
         if not phonenumbers.is_valid_number(parsed_number):
             raise ValueError(f"Invalid phone number: {phone_number}")
 
         formatted_number = phonenumbers.format_number(
             parsed_number, phonenumbers.PhoneNumberFormat.E164
         )
+        # Same answer as `geocoder.region_code_for_number`, without loading the
+        # geocoding data.
+        country = phonenumbers.region_code_for_number(parsed_number)
 
-        country = geocoder.region_code_for_number(parsed_number)
-
-        return {"formatted_number": formatted_number, "country": country}
-    except NumberParseException as e:
+        return formatted_number, country
+    except phonenumbers.NumberParseException as e:
         raise ValueError(f"Invalid phone number: {phone_number}. Error: {e}")
 
 
+def validate_and_extract_country(phone_number: str) -> dict:
+    """
+    Validate a phone number and return it in E.164 format with its region code.
+
+    Results are memoized, so the same number is only parsed once per process.
+    Only numbers of the regions in `PHONE_REGIONS` are accepted when it is set.
+    """
+    formatted_number, country = _normalize_phone_number(phone_number)
+    return {"formatted_number": formatted_number, "country": country}
+
+
 def generate_totp(secret: str) -> str:
+    import pyotp
+
     interval = otp_settings.otp_interval
     totp = pyotp.TOTP(secret, interval=interval)
     return totp.now()
 
 
 def validate_totp(secret: str, otp: str) -> bool:
+    import pyotp
+
     interval = otp_settings.otp_interval
     otp_valid_window = otp_settings.otp_valid_window
     totp = pyotp.TOTP(secret, interval=interval)
@@ -221,36 +333,22 @@ def get_lang_from_company(company_id: int):
     return "en" if company_id == 12 else "fr"
 
 
-def get_filter(param, value, lang):
-    filter_list = [
-        FilterSchema(
-            value="new",
-            param="day_late",
-            label=TextTranslationSchema(en="New", fr="Nouveau"),
-        ),
-        FilterSchema(
-            value="urgent",
-            param="day_late",
-            label=TextTranslationSchema(en="Urgent", fr="Urgent"),
-        ),
-        FilterSchema(
-            value="sav",
-            param="category",
-            label=TextTranslationSchema(
-                en="After sales service", fr="Service après vente"
-            ),
-        ),
-        FilterSchema(
-            value="unreachable",
-            param="category",
-            label=TextTranslationSchema(en="Unreachable", fr="Injoignable"),
-        ),
-    ]
-    return next(
-        (
-            filter
-            for filter in filter_list
-            if filter.param == param and filter.value == value
-        ),
-        None,
+FILTER_LABELS = {
+    ("day_late", "new"): "new",
+    ("day_late", "urgent"): "urgent",
+    ("category", "sav"): "after_sales_service",
+    ("category", "unreachable"): "unreachable",
+}
+
+
+@lru_cache(maxsize=None)
+def get_filter(param, value, lang=None):
+    """
+    Return the shared filter for `param`/`value`, labelled in `lang` only when given.
+    """
+    label_key = FILTER_LABELS.get((param, value))
+    if label_key is None:
+        return None
+    return FilterSchema.model_construct(
+        value=value, param=param, label=catalog.text(label_key, lang)
     )
@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+from app.core import settings
+
+Handler = Callable[[str], None]
+
+
+class PubSub(ABC):
+    """Broadcast messages to every instance of the service."""
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Send `message` to the subscribers of `channel`, this process included."""
+
+    @abstractmethod
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call `handler` with each message published on `channel`."""
+
+
+class LocalPubSub(PubSub):
+    """
+    In-process stand-in used when no `SHARED_STORE_URL` is configured. Messages
+    only reach the subscribers of this process, synchronously.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    def publish(self, channel: str, message: str) -> None:
+        for handler in list(self._handlers[channel]):
+            try:
+                handler(message)
+            except Exception as e:
+                logging.error(f"Subscriber of {channel} failed: {e}")
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers[channel].append(handler)
+
+
+class RedisPubSub(LocalPubSub):
+    """
+    Pub/sub over Redis channels. Requires the optional `redis` package.
+
+    Messages are received on a daemon thread and handed to the local
+    subscribers, so handlers must be thread-safe. A forked worker process
+    reconnects and starts its own receiving thread.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "SHARED_STORE_URL is set but the `redis` package is not installed"
+            ) from e
+        self._redis = redis
+        self.url = url
+        self._lock = threading.Lock()
+        self._connect()
+        os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._client = self._redis.Redis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._thread = None
+        for channel in list(self._handlers):
+            self._listen(channel)
+
+    def _listen(self, channel: str) -> None:
+        self._pubsub.subscribe(
+            **{channel: lambda item: LocalPubSub.publish(self, channel, item["data"])}
+        )
+        if self._thread is None:
+            self._thread = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._client.publish(channel, message)
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        with self._lock:
+            if channel not in self._handlers:
+                self._listen(channel)
+            super().subscribe(channel, handler)
+
+
+@lru_cache(maxsize=None)
+def get_pubsub() -> PubSub:
+    if settings.shared_store_url:
+        return RedisPubSub(settings.shared_store_url)
+    return LocalPubSub()
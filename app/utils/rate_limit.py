@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.otp_config import settings
+from app.utils.cache import TTLCache
+from app.utils.store import SharedStore, get_shared_store
+
+
+class RateLimiter:
+    """
+    Generic cell rate algorithm (GCRA) limiter allowing `limit` hits per
+    `period` seconds and key, in bursts of at most `limit` hits.
+
+    Each key only holds its theoretical arrival time, so a check is one lookup
+    and one write. The state lives in a bounded in-process cache, or in `store`
+    when given so every instance shares the same budget. Updates to a shared
+    store are not atomic across instances, which may let a few extra hits
+    through under concurrent bursts.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        store: Optional[SharedStore] = None,
+        key_prefix: str = "",
+        maxsize: int = 100_000,
+    ):
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.store = store
+        self.key_prefix = key_prefix
+        self._cache = TTLCache(maxsize=maxsize, ttl=period)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_string(cls, value: str, **kwargs) -> "RateLimiter":
+        """Build a limiter from a `"<limit>/<period in seconds>"` string."""
+        limit, period = value.split("/")
+        return cls(int(limit), float(period), **kwargs)
+
+    def _get(self, key: str) -> Optional[float]:
+        if self.store is None:
+            return self._cache.get(key)
+        value = self.store.get(self.key_prefix + key)
+        return float(value) if value else None
+
+    def _set(self, key: str, arrival: float, ttl: float) -> None:
+        if self.store is None:
+            self._cache.set(key, arrival, ttl=ttl)
+        else:
+            self.store.set(self.key_prefix + key, repr(arrival), ttl)
+
+    def _retry_after(self, key: str, now: float) -> Tuple[float, float]:
+        arrival = max(self._get(key) or now, now) + self.interval
+        allowed_at = arrival - self.limit * self.interval
+        return max(allowed_at - now, 0.0), arrival
+
+    def peek(self, key: str) -> float:
+        """Like `hit`, without counting the hit."""
+        with self._lock:
+            return self._retry_after(key, time.time())[0]
+
+    def hit(self, key: str) -> float:
+        """
+        Count a hit for `key`.
+
+        Args:
+            key (str): The key the limit applies to.
+
+        Returns:
+            float: 0 when the hit is allowed, else the seconds to wait before the
+                next hit is allowed.
+        """
+        with self._lock:
+            now = time.time()
+            retry_after, arrival = self._retry_after(key, now)
+            if retry_after:
+                return retry_after
+            self._set(key, arrival, arrival - now)
+            return 0.0
+
+
+def _build_limiter(value: str, name: str) -> RateLimiter:
+    store = get_shared_store() if settings.rate_limit_backend == "shared" else None
+    return RateLimiter.from_string(value, store=store, key_prefix=f"rate:{name}:")
+
+
+otp_send_phone_limiter = _build_limiter(settings.otp_send_phone_limit, "send_phone")
+otp_send_ip_limiter = _build_limiter(settings.otp_send_ip_limit, "send_ip")
+otp_verify_phone_limiter = _build_limiter(
+    settings.otp_verify_phone_limit, "verify_phone"
+)
+otp_verify_ip_limiter = _build_limiter(settings.otp_verify_ip_limit, "verify_ip")
+
+
+def get_client_ip(request: Request) -> str:
+    # Each of our `TRUSTED_PROXY_HOPS` proxies appends the address it received
+    # the request from to X-Forwarded-For, so the client is that many entries
+    # from the end. The entries before it can be forged by the client.
+    forwarded_for = request.headers.get("x-forwarded-for")
+    hops = settings.trusted_proxy_hops
+    if forwarded_for and hops > 0:
+        entries = [entry.strip() for entry in forwarded_for.split(",")]
+        return entries[-min(hops, len(entries))]
+    return request.client.host if request.client else ""
+
+
+def _phone_key(phone_number: str) -> str:
+    # Digits only, so spacing or a leading "+" does not open a new budget.
+    return "".join(filter(str.isdigit, phone_number))
+
+
+def _check(request: Request, phone_limiter, ip_limiter) -> None:
+    phone_key = _phone_key(request.query_params.get("phone_number", ""))
+    client_ip = get_client_ip(request)
+    # Both limits are checked before either is charged, so a request denied by
+    # one does not use up the budget of the other.
+    retry_after = max(phone_limiter.peek(phone_key), ip_limiter.peek(client_ip))
+    if not retry_after:
+        retry_after = phone_limiter.hit(phone_key) or ip_limiter.hit(client_ip)
+    if retry_after:
+        seconds = math.ceil(retry_after)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many requests, please retry in {seconds} seconds",
+            headers={"Retry-After": str(seconds)},
+        )
+
+
+def limit_otp_send(request: Request) -> None:
+    _check(request, otp_send_phone_limiter, otp_send_ip_limiter)
+
+
+def limit_otp_verify(request: Request) -> None:
+    _check(request, otp_verify_phone_limiter, otp_verify_ip_limiter)
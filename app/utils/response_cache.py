@@ -0,0 +1,267 @@
+"""
+Per-employee cache of the responses of read-only endpoints.
+
+`ResponseCacheMiddleware` keeps the body of the successful GET responses of the
+configured routes, keyed by employee, path and normalized query string, so a
+repeated pull-to-refresh is answered from memory without reaching the endpoint.
+Only requests whose access token was already verified by an endpoint can be
+answered from the cache, so the employee of a key is never taken from an
+unverified token.
+
+Entries are served for their route TTL, then for `stale_ttl` more seconds while
+the endpoint is called again in the background. A request `Cache-Control:
+no-cache` (or `max-age=0`) skips the cached entry and `no-store` the whole
+cache. Entries are dropped when an employee logs out and on the invalidations
+published with `invalidate_responses`.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.auth.revocation import REVOCATION_CHANNEL
+from app.utils.cache import TTLCache
+from app.utils.main import verified_token_claims
+from app.utils.pubsub import PubSub, get_pubsub
+
+INVALIDATION_CHANNEL = "cache:responses"
+# Bodies smaller than this are stored as they are.
+COMPRESS_MIN_SIZE = 1024
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    compressed: bool
+    media_type: bytes
+    stored_at: float
+    ttl: float
+
+
+def parse_routes(value: str) -> List[Tuple[str, float]]:
+    """Parse `"<path template>=<ttl>,..."` into (template, TTL in seconds) pairs."""
+    routes = []
+    for item in value.split(","):
+        if item.strip():
+            template, ttl = item.rsplit("=", 1)
+            routes.append((template.strip(), float(ttl)))
+    return routes
+
+
+def _normalize_query(query_string: bytes) -> str:
+    return urlencode(sorted(parse_qsl(query_string.decode("latin-1"), True)))
+
+
+def _cache_directives(value: Optional[str]) -> set:
+    return {
+        directive.strip().lower().replace(" ", "")
+        for directive in (value or "").split(",")
+    }
+
+
+class ResponseCacheMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: List[Tuple[str, float]],
+        stale_ttl: float = 0,
+        maxsize: int = 5000,
+        compress: bool = True,
+        pubsub: Optional[PubSub] = None,
+    ):
+        self.app = app
+        self.routes = [(compile_path(template)[0], ttl) for template, ttl in routes]
+        self.stale_ttl = stale_ttl
+        self.compress = compress
+        self.cache = TTLCache(maxsize=maxsize)
+        self._revalidating = set()
+        self._tasks = set()
+        if pubsub is not None:
+            pubsub.subscribe(REVOCATION_CHANNEL, self._receive_revocation)
+            pubsub.subscribe(INVALIDATION_CHANNEL, self._receive_invalidation)
+
+    def _route_ttl(self, path: str) -> Optional[float]:
+        for regex, ttl in self.routes:
+            if regex.match(path):
+                return ttl
+        return None
+
+    def _receive_revocation(self, message: str) -> None:
+        self.invalidate(sub=json.loads(message)["sub"])
+
+    def _receive_invalidation(self, message: str) -> None:
+        self.invalidate(**json.loads(message))
+
+    def invalidate(self, sub: Optional[str] = None, path: Optional[str] = None) -> None:
+        """Drop the entries of `sub` under the path prefix `path`, both optional."""
+        for key in self.cache.keys():
+            if (sub is None or key[0] == str(sub)) and (
+                path is None or key[1].startswith(path)
+            ):
+                self.cache.pop(key)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        ttl = self._route_ttl(scope["path"])
+        if ttl is None:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        directives = _cache_directives(headers.get("cache-control"))
+        authorization = headers.get("authorization", "")
+        if authorization[:7].lower() != "bearer " or "no-store" in directives:
+            return await self.app(scope, receive, send)
+        token = authorization[7:]
+        accepts_gzip = "gzip" in headers.get("accept-encoding", "")
+        key = self._key(scope, token)
+        if key is not None and not directives & {"no-cache", "max-age=0"}:
+            entry = self.cache.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.stored_at
+                if age < entry.ttl:
+                    return await self._send_cached(send, entry, age, accepts_gzip)
+                if age < entry.ttl + self.stale_ttl:
+                    self._revalidate(scope, token, ttl)
+                    return await self._send_cached(
+                        send, entry, age, accepts_gzip, status="STALE"
+                    )
+        await self._call_and_store(scope, receive, send, token, ttl)
+
+    def _key(self, scope: Scope, token: str) -> Optional[tuple]:
+        claims = verified_token_claims(token)
+        if claims is None:
+            return None
+        return (
+            str(claims["sub"]),
+            scope["path"],
+            _normalize_query(scope["query_string"]),
+        )
+
+    async def _send_cached(
+        self,
+        send: Send,
+        entry: CachedResponse,
+        age: float,
+        accepts_gzip: bool,
+        status: str = "HIT",
+    ) -> None:
+        body = entry.body
+        headers = [(b"content-type", entry.media_type)]
+        if entry.compressed:
+            if accepts_gzip:
+                headers.append((b"content-encoding", b"gzip"))
+            else:
+                body = gzip.decompress(body)
+        headers += [
+            (b"content-length", str(len(body)).encode()),
+            (b"cache-control", f"private, max-age={int(entry.ttl)}".encode()),
+            (b"age", str(int(age)).encode()),
+            (b"vary", b"Authorization, Accept-Encoding"),
+            (b"x-cache", status.encode()),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _call_and_store(
+        self, scope: Scope, receive: Receive, send: Send, token: str, ttl: float
+    ) -> None:
+        start: Dict[str, Message] = {}
+        chunks = []
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start["message"] = message
+                if message["status"] == 200:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"cache-control", f"private, max-age={int(ttl)}".encode()),
+                        (b"x-cache", b"MISS"),
+                    ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self._store(scope, token, ttl, start.get("message"), chunks)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _store(
+        self,
+        scope: Scope,
+        token: str,
+        ttl: float,
+        start: Optional[Message],
+        chunks: List[bytes],
+    ) -> None:
+        if start is None or start["status"] != 200:
+            return
+        headers = Headers(raw=start.get("headers", []))
+        if "set-cookie" in headers or "content-encoding" in headers:
+            return
+        # Known now even on the first request of a token, which the endpoint
+        # has just verified.
+        key = self._key(scope, token)
+        if key is None:
+            return
+        body = b"".join(chunks)
+        compressed = self.compress and len(body) >= COMPRESS_MIN_SIZE
+        if compressed:
+            body = gzip.compress(body, compresslevel=6)
+        self.cache.set(
+            key,
+            CachedResponse(
+                body=body,
+                compressed=compressed,
+                media_type=headers.get("content-type", "application/json").encode(),
+                stored_at=time.monotonic(),
+                ttl=ttl,
+            ),
+            ttl=ttl + self.stale_ttl,
+        )
+
+    def _revalidate(self, scope: Scope, token: str, ttl: float) -> None:
+        key = self._key(scope, token)
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._refresh(dict(scope), token, key, ttl))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, scope: Scope, token: str, key: tuple, ttl: float) -> None:
+        request_sent = False
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The endpoints never wait for the client to disconnect.
+            await asyncio.Event().wait()
+
+        async def send(message: Message) -> None:
+            pass
+
+        try:
+            await self._call_and_store(scope, receive, send, token, ttl)
+        except Exception as e:
+            logging.error(f"Revalidation of {scope['path']} failed: {e}")
+        finally:
+            self._revalidating.discard(key)
+
+
+def invalidate_responses(sub: Optional[str] = None, path: Optional[str] = None):
+    """
+    Drop the cached responses of employee `sub` under the path prefix `path`
+    (both optional) on every instance.
+    """
+    get_pubsub().publish(
+        INVALIDATION_CHANNEL,
+        json.dumps({"sub": None if sub is None else str(sub), "path": path}),
+    )
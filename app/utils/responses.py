@@ -0,0 +1,17 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON response rendered directly by pydantic-core.
+
+    Pydantic models, lists and dicts of models are serialized in a single pass by the
+    Rust serializer. Returning this response from a handler also makes FastAPI skip the
+    response model validation, so it must only wrap data we built ourselves.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
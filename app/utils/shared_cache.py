@@ -0,0 +1,351 @@
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from app.core import settings
+
+# Header of a cache file: wall-clock time it was written and expires at.
+HEADER = struct.Struct("<dd")
+
+# Seconds between two sweeps of the entries by a process, and age past which
+# the temporary file of an interrupted write is removed.
+SWEEP_INTERVAL = 60
+ORPHAN_AGE = 60
+
+# Background reloads of stale entries. Kept apart from the executor of the
+# services, since the loaders may run their queries on that one.
+refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class Entry(NamedTuple):
+    written_at: float
+    expires_at: float
+    value: Any
+
+
+class SharedMemoryCache:
+    """
+    Cache shared by every worker process of the host, kept as memory-mapped
+    files in `directory` (a tmpfs such as /dev/shm, i.e. RAM).
+
+    Each entry is one file holding a small header and the JSON value. A worker
+    decodes an entry once per version of its file and then serves its decoded
+    copy, checking with a `stat` that the file has not been replaced. On a miss
+    or expiry a single writer per host, elected with `flock`, runs the loader and
+    replaces the file atomically; the other workers wait for it and read the
+    result. A reference dataset thus costs one Odoo fetch per host and TTL, not
+    one per worker.
+
+    Past its expiry an entry stays usable for `stale_ttl` seconds: it is served
+    while one worker reloads it in the background (stale-while-revalidate).
+
+    The directory is RAM, so entries past their stale window are swept, with
+    their lock files, at most every `SWEEP_INTERVAL` seconds after a write, and
+    beyond `max_entries` the entries closest to their expiry are dropped.
+
+    When `directory` cannot be written, the cache is local to the process.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 300,
+        stale_ttl: float = 0,
+        max_entries: int = 10000,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._decoded: Dict[str, Tuple[tuple, Entry]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        # Writer locks of the keys when the cache is local to the process.
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._swept_at = time.time()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.shared = os.access(directory, os.W_OK)
+        except OSError:
+            self.shared = False
+        if not self.shared:
+            logging.warning(f"{directory} is not writable, caching per process")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json"
+        )
+
+    def read(self, key: str) -> Optional[Entry]:
+        """Return the entry of `key`, expired or not, or None if there is none."""
+        if not self.shared:
+            decoded = self._decoded.get(key)
+            return decoded[1] if decoded else None
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        decoded = self._decoded.get(key)
+        if decoded is not None and decoded[0] == signature:
+            return decoded[1]
+        try:
+            with open(path, "rb") as cache_file, mmap.mmap(
+                cache_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                written_at, expires_at = HEADER.unpack_from(mapped, 0)
+                value = json.loads(mapped[HEADER.size :])
+        except (OSError, ValueError, struct.error) as e:
+            logging.error(f"Unreadable shared cache entry {key}: {e}")
+            return None
+        entry = Entry(written_at, expires_at, value)
+        with self._lock:
+            self._decoded[key] = (signature, entry)
+        return entry
+
+    def write(self, key: str, value: Any, ttl: Optional[float] = None) -> Entry:
+        now = time.time()
+        entry = Entry(now, now + (self.ttl if ttl is None else ttl), value)
+        if not self.shared:
+            with self._lock:
+                self._decoded[key] = ((), entry)
+        else:
+            path = self._path(key)
+            temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "wb") as cache_file:
+                cache_file.write(HEADER.pack(entry.written_at, entry.expires_at))
+                cache_file.write(json.dumps(value).encode())
+            # Readers holding the previous file keep a consistent view of it.
+            os.replace(temporary_path, path)
+        if now - self._swept_at > SWEEP_INTERVAL:
+            self._swept_at = now
+            refresh_executor.submit(self._sweep_safely)
+        return entry
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._decoded.pop(key, None)
+        if self.shared:
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def writer_lock(self, key: str, blocking: bool = True):
+        """
+        Hold the host-wide writer lock of `key`.
+
+        Yields:
+            bool: Whether the lock was acquired, always True when `blocking`.
+        """
+        if not self.shared:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            if not key_lock.acquire(blocking=blocking):
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                key_lock.release()
+            return
+        with open(self._path(key) + ".lock", "a") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def sweep(self) -> int:
+        """
+        Remove the entries past their stale window, then the ones closest to
+        their expiry beyond `max_entries`.
+
+        A lock file is only removed when no worker holds it. A worker that
+        opened it just before may still take it while another creates a new
+        one: both then load the entry, which costs a duplicate load, not a
+        wrong value.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        now = time.time()
+        if not self.shared:
+            with self._lock:
+                live = sorted(
+                    (entry.expires_at, key)
+                    for key, (_, entry) in self._decoded.items()
+                    if entry.expires_at + self.stale_ttl > now
+                )
+                kept = {key for _, key in live[-self.max_entries :]}
+                removed = [key for key in self._decoded if key not in kept]
+                for key in removed:
+                    del self._decoded[key]
+                for key in [key for key in self._key_locks if key not in kept]:
+                    if not self._key_locks[key].locked():
+                        del self._key_locks[key]
+            return len(removed)
+        entries, orphans = [], []
+        with os.scandir(self.directory) as scan:
+            for file in scan:
+                try:
+                    if file.name.endswith(".json"):
+                        with open(file.path, "rb") as cache_file:
+                            _, expires_at = HEADER.unpack(cache_file.read(HEADER.size))
+                        entries.append((expires_at, file.path))
+                    elif file.name.endswith(".tmp"):
+                        if file.stat().st_mtime + ORPHAN_AGE < now:
+                            orphans.append(file.path)
+                    elif file.name.endswith(".json.lock"):
+                        if not os.path.exists(file.path[: -len(".lock")]):
+                            orphans.append(file.path)
+                except (OSError, struct.error):
+                    continue
+        entries.sort()
+        live = [
+            path for expires_at, path in entries if expires_at + self.stale_ttl > now
+        ]
+        kept = set(live[-self.max_entries :])
+        removed = [path for _, path in entries if path not in kept]
+        for path in removed:
+            self._unlink(path)
+            self._unlink_lock(path + ".lock")
+        for path in orphans:
+            if path.endswith(".lock"):
+                self._unlink_lock(path)
+            else:
+                self._unlink(path)
+        with self._lock:
+            for key in [
+                key
+                for key, (_, entry) in self._decoded.items()
+                if entry.expires_at + self.stale_ttl <= now
+            ]:
+                del self._decoded[key]
+        return len(removed)
+
+    def _sweep_safely(self) -> None:
+        try:
+            removed = self.sweep()
+        except Exception as e:
+            logging.error(f"Sweep of {self.directory} failed: {e}")
+            return
+        if removed:
+            logging.info(f"Swept {removed} entries from {self.directory}")
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def _unlink_lock(cls, path: str) -> None:
+        try:
+            lock_file = open(path, "a")
+        except OSError:
+            return
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            cls._unlink(path)
+
+    def refresh(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        min_age: float = 0,
+    ) -> bool:
+        """
+        Reload `key` unless another worker is already doing it or its entry was
+        written less than `min_age` seconds ago.
+
+        Returns:
+            bool: Whether the loader ran.
+        """
+        with self.writer_lock(key, blocking=False) as acquired:
+            if not acquired:
+                return False
+            entry = self.read(key)
+            if entry is not None and time.time() - entry.written_at < min_age:
+                return False
+            self.write(key, loader(), ttl)
+            return True
+
+    def revalidate(
+        self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None
+    ) -> None:
+        """Reload `key` in the background, unless this process already is."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.refresh(key, loader, ttl)
+            except Exception as e:
+                logging.error(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        refresh_executor.submit(refresh)
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Return the value of `key`, loading it with `loader` when it is missing.
+        The value must be JSON-serializable.
+
+        An expired entry is still returned for `stale_ttl` seconds (the cache
+        default when None) while it is reloaded in the background, so readers
+        only wait on the loader when there is no usable entry at all.
+        """
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        entry = self.read(key)
+        now = time.time()
+        if entry is not None and entry.expires_at > now:
+            return entry.value
+        if entry is not None and entry.expires_at + stale_ttl > now:
+            self.revalidate(key, loader, ttl)
+            return entry.value
+        with self.writer_lock(key):
+            # Another worker may have refreshed it while we waited for the lock.
+            entry = self.read(key)
+            if entry is not None and entry.expires_at > time.time():
+                return entry.value
+            return self.write(key, loader(), ttl).value
+
+
+reference_cache = SharedMemoryCache(
+    settings.shared_cache_dir,
+    settings.reference_cache_ttl,
+    settings.reference_cache_stale_ttl,
+    settings.shared_cache_max_entries,
+)
@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+from app.core import settings
+from app.utils.cache import TTLCache
+
+
+class SharedStore(ABC):
+    """Key-value store shared by every instance of the service."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the value of `key`, or None when it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove `key` if it exists."""
+
+
+class LocalSharedStore(SharedStore):
+    """
+    In-process stand-in for a shared store, used locally and when no
+    `SHARED_STORE_URL` is configured. Values are only visible to this process.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+
+class RedisSharedStore(SharedStore):
+    """Shared store backed by Redis. Requires the optional `redis` package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "SHARED_STORE_URL is set but the `redis` package is not installed"
+            ) from e
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def get_shared_store() -> SharedStore:
+    if settings.shared_store_url:
+        return RedisSharedStore(settings.shared_store_url)
+    return LocalSharedStore()
+
+
+@lru_cache(maxsize=None)
+def get_cache_store(name: str, maxsize: int = 100_000) -> SharedStore:
+    """
+    Store for data that can be rebuilt, kept apart from the OTPs, refresh
+    tokens and rate limits of `get_shared_store` so that filling it never
+    evicts them: its own bounded store per `name` when local. Redis is shared,
+    the keys being namespaced by their callers.
+    """
+    if settings.shared_store_url:
+        return get_shared_store()
+    return LocalSharedStore(maxsize=maxsize)
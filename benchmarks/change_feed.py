@@ -0,0 +1,79 @@
+"""
+Keeping the agents' account lists current: re-querying them versus the feed.
+
+Every interval some accounts change in Odoo. "re-query" reads the whole list of
+every agent again, as the caches do when they expire; "change feed" reads the
+accounts written since its watermark. The Odoo cost is estimated from the calls
+and rows of each approach, with `CALL_MS` per call and `ROW_US` per row.
+
+Run with `python -m benchmarks.change_feed`.
+"""
+
+import random
+
+from app.services.odoo.changes import FEED_FIELDS, ChangeFeed
+
+from .common import print_table
+from .fake_odoo import FakeOdoo
+
+AGENTS = 100
+ACCOUNTS = 5000
+CALL_MS = 5.0
+ROW_US = 20.0
+
+
+def _populate(odoo: FakeOdoo) -> None:
+    for index in range(ACCOUNTS):
+        odoo.tick()
+        odoo.create(
+            "payg.account",
+            {
+                "account_ext_id": f"ACC{index:05d}",
+                "responsible_agent_employee_id": [index % AGENTS + 1, "Agent"],
+                "account_segmentation_id": [4, "Slow payer"],
+                "account_status": "disabled",
+                "nb_days_overdue": index % 40,
+            },
+        )
+
+
+def _requery(odoo: FakeOdoo) -> None:
+    for employee_id in range(1, AGENTS + 1):
+        odoo.search_records(
+            "payg.account",
+            [
+                ["account_segmentation_id", "in", [4]],
+                ["responsible_agent_employee_id", "=", employee_id],
+            ],
+            FEED_FIELDS["payg.account"],
+        )
+
+
+def _cost(odoo: FakeOdoo) -> float:
+    return odoo.calls * CALL_MS + odoo.rows * ROW_US / 1000
+
+
+def main() -> None:
+    rows = []
+    for changed in (10, 100, 1000):
+        odoo = FakeOdoo()
+        _populate(odoo)
+        feed = ChangeFeed(odoo, {"payg.account": FEED_FIELDS["payg.account"]})
+        feed.watermark("payg.account")
+        odoo.tick()
+        for record_id in random.sample(range(1, ACCOUNTS + 1), changed):
+            odoo.write("payg.account", record_id, {"nb_days_overdue": 1})
+        approaches = {"re-query": lambda: _requery(odoo), "change feed": feed.poll_all}
+        for name, run in approaches.items():
+            odoo.calls = odoo.rows = 0
+            run()
+            rows.append([changed, name, odoo.calls, odoo.rows, f"{_cost(odoo):.0f}"])
+    print(f"{AGENTS} agents, {ACCOUNTS} accounts\n")
+    print_table(
+        ["changed accounts", "approach", "Odoo calls", "rows read", "est. Odoo ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
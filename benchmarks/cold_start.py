@@ -0,0 +1,87 @@
+"""
+Cold-start time and memory of an instance.
+
+Each run starts a fresh interpreter, imports `app.main` and serves the first
+`/openapi.json` request, reporting the import time, the first docs request and
+the peak RSS. "eager imports" also imports the modules now loaded on first use
+(phonenumbers with its geocoder, python-jose, pyotp, httpx), as the app did
+before. "prebuilt openapi" serves the document written by
+`python -m app.cli openapi`.
+
+Run with `python -m benchmarks.cold_start`.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from .common import print_table
+
+EAGER_IMPORTS = "import phonenumbers.geocoder, jose.jwt, pyotp, httpx"
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+{extra}
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+served = time.perf_counter()
+client.get("/openapi.json")
+done = time.perf_counter()
+print(json.dumps({{
+    "import": (imported - start) * 1000,
+    "openapi": (done - served) * 1000,
+    "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def _run(extra: str = "", env: dict = None, repeat: int = 5) -> dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(extra=extra)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, **(env or {})},
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main() -> None:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as document:
+        path = document.name
+    subprocess.run(
+        [sys.executable, "-m", "app.cli", "openapi", path],
+        check=True,
+        capture_output=True,
+    )
+    scenarios = {
+        "eager imports": _run(EAGER_IMPORTS),
+        "lazy imports": _run(),
+        "lazy imports, prebuilt openapi": _run(env={"OPENAPI_FILE": path}),
+    }
+    os.unlink(path)
+    print_table(
+        ["scenario", "import (ms)", "first /openapi.json (ms)", "peak RSS (MB)"],
+        [
+            [
+                name,
+                f"{result['import']:.0f}",
+                f"{result['openapi']:.0f}",
+                f"{result['rss']:.0f}",
+            ]
+            for name, result in scenarios.items()
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import statistics
+import time
+from typing import Callable, List, Sequence
+
+
+def measure(func: Callable, number: int = 200, repeat: int = 5) -> float:
+    """
+    Measure the median duration of a call.
+
+    Args:
+        func (Callable): The zero-argument callable to measure.
+        number (int): The number of calls per run.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The median duration of a single call, in microseconds.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings) * 1_000_000
+
+
+def print_table(headers: Sequence[str], rows: List[Sequence]) -> None:
+    """Print benchmark results as an aligned plain-text table."""
+    cells = [[str(cell) for cell in row] for row in [headers, *rows]]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,134 @@
+import operator
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda value, values: value in values,
+    "not in": lambda value, values: value not in values,
+}
+
+
+def _field_value(value):
+    # Many2one fields compare on their id, as in Odoo domains.
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return value[0]
+    return value
+
+
+class FakeOdoo:
+    """
+    In-memory stand-in for `OdooAPI` serving `search_records` and
+    `count_records` over plain dict records.
+
+    Domains are evaluated like Odoo does, prefix `|`, `&` and `!` operators
+    included, and records with `active` False are left out unless the domain
+    filters on `active`. `write` stamps `write_date` from `now`, which tests
+    can move, and `unlink` deletes records.
+    Each call sleeps `latency` seconds plus `row_latency` per record returned,
+    to simulate the round-trip and the transfer of the rows.
+    """
+
+    def __init__(self, latency: float = 0.0, row_latency: float = 0.0):
+        self.latency = latency
+        self.row_latency = row_latency
+        self.now = datetime(2024, 1, 1)
+        self.records: Dict[str, Dict[int, dict]] = defaultdict(dict)
+        self._last_ids: Dict[str, int] = defaultdict(int)
+        self.calls = 0
+        self.rows = 0
+
+    def _stamp(self) -> str:
+        return self.now.strftime("%Y-%m-%d %H:%M:%S")
+
+    def tick(self, seconds: float = 1) -> None:
+        self.now += timedelta(seconds=seconds)
+
+    def create(self, model: str, values: dict) -> int:
+        self._last_ids[model] += 1
+        record_id = self._last_ids[model]
+        self.records[model][record_id] = {
+            **values,
+            "id": record_id,
+            "write_date": self._stamp(),
+        }
+        return record_id
+
+    def write(self, model: str, record_id: int, values: dict) -> None:
+        self.records[model][record_id].update(values, write_date=self._stamp())
+
+    def unlink(self, model: str, record_id: int) -> None:
+        del self.records[model][record_id]
+
+    def _match(self, record: dict, domain: list) -> bool:
+        if record.get("active") is False and not any(
+            isinstance(item, (list, tuple)) and item[0] == "active" for item in domain
+        ):
+            return False
+
+        def evaluate(position: int):
+            item = domain[position]
+            if item == "!":
+                value, position = evaluate(position + 1)
+                return not value, position
+            if item in ("|", "&"):
+                left, position = evaluate(position + 1)
+                right, position = evaluate(position)
+                return (left or right) if item == "|" else (left and right), position
+            field, op, value = item
+            # Records are active unless archived.
+            field_value = record.get(field, True if field == "active" else None)
+            return OPERATORS[op](_field_value(field_value), value), position + 1
+
+        position = 0
+        while position < len(domain):
+            value, position = evaluate(position)
+            if not value:
+                return False
+        return True
+
+    def _sort(self, records: List[dict], order: Optional[str]) -> List[dict]:
+        for term in reversed((order or "id asc").split(",")):
+            field, _, direction = term.strip().partition(" ")
+            records.sort(
+                key=lambda record: _field_value(record.get(field)),
+                reverse=direction.strip().lower() == "desc",
+            )
+        return records
+
+    def _simulate(self, rows: int) -> None:
+        self.calls += 1
+        self.rows += rows
+        delay = self.latency + self.row_latency * rows
+        if delay:
+            time.sleep(delay)
+
+    def search_records(
+        self, model, domain, fields=False, offset=0, limit=False, order=False
+    ):
+        records = self._sort(
+            [r for r in self.records[model].values() if self._match(r, domain)],
+            order,
+        )
+        records = records[offset:]
+        if limit not in (False, -1, None):
+            records = records[:limit]
+        if fields:
+            records = [
+                {field: record.get(field) for field in fields} for record in records
+            ]
+        else:
+            records = [dict(record) for record in records]
+        self._simulate(len(records))
+        return records
+
+    def count_records(self, model, domain):
+        self._simulate(0)
+        return sum(self._match(r, domain) for r in self.records[model].values())
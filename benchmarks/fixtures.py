@@ -0,0 +1,144 @@
+import time
+from datetime import datetime, timedelta
+
+from app.core import settings
+from app.services.odoo.event_catalog import EventCatalog
+from app.services.odoo.service import OdooService
+
+CATEGORIES = [
+    {"code": "sales", "name": "Sales", "color": "#F2BA11", "icon": "sales-icon"},
+    {"code": "payment", "name": "Payment", "color": "#AA54CC", "icon": "payment-icon"},
+    {"code": "penalty", "name": "Penalty", "color": "#39B54A", "icon": "penalty-icon"},
+]
+
+USER_CONTEXT = {
+    "sub": "42",
+    "name": "Jane Doe",
+    "mobile_phone": "+261340000000",
+    "can_use_application_agent": True,
+    "generic_job_id": [3, "Sales Agent"],
+    "company_id": [1, "Baobab+ Madagascar"],
+    "currency_id": [2, "MGA"],
+}
+
+
+class FakeModel:
+    """
+    Stand-in for `Models` serving canned records, optionally after a simulated
+    Odoo round-trip `latency` in seconds.
+    """
+
+    def __init__(self, records: list, latency: float = 0.0):
+        self.records = records
+        self.latency = latency
+
+    def search(self, domain, fields=False, offset=0, limit=80, order="id asc"):
+        if self.latency:
+            time.sleep(self.latency)
+        if limit in (False, -1):
+            return list(self.records[offset:])
+        return list(self.records[offset : offset + limit])
+
+    def search_count(self, domain) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return len(self.records)
+
+    def model_method(self, method_name, params):
+        limit = params.get("limit", -1)
+        return self.search([], offset=params.get("offset", 0), limit=limit), len(
+            self.records
+        )
+
+
+def make_event_details(count: int) -> list:
+    """Build rows shaped like `incentive.event.get_event_details`."""
+    today = datetime.now().date()
+    return [
+        {
+            "event_id": index,
+            "event_date": (today - timedelta(days=index % 7)).isoformat(),
+            "value": float((index % 9 - 2) * 500),
+            "client_id": {"id": 1000 + index, "name": f"Client {index}"},
+            "event_category": CATEGORIES[index % len(CATEGORIES)],
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def make_accounts(count: int) -> list:
+    """Build `payg.account` rows shaped like `PaygAccountSchema`."""
+    now = datetime.now()
+    return [
+        {
+            "id": index,
+            "account_ext_id": f"ACC{index:05d}",
+            "create_date": (now - timedelta(days=index)).strftime("%Y-%m-%d %H:%M:%S"),
+            "registration_date": (now - timedelta(days=index % 75)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+            "client_id": [2000 + index, f"Client {index}"],
+            "nb_days_overdue": index % 40,
+            "account_status": "disabled",
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def make_reports(count: int) -> list:
+    """Build `incentive.report` rows shaped like `IncentiveReportSchema`."""
+    monday = datetime.now().date() - timedelta(days=datetime.now().weekday())
+    reports = []
+    for index in range(count):
+        start = monday - timedelta(weeks=index)
+        reports.append(
+            {
+                "id": 100 + index,
+                "name": f"Week {index}",
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=6)).isoformat(),
+                "generic_job_id": USER_CONTEXT["generic_job_id"],
+                "status": "in_progress" if index == 0 else "done",
+            }
+        )
+    return reports
+
+
+def make_event_catalog() -> EventCatalog:
+    """Build the catalog of the categories in `CATEGORIES`, one event type each."""
+    return EventCatalog(
+        {
+            "categories": [
+                {"id": index, **category}
+                for index, category in enumerate(CATEGORIES, start=1)
+            ],
+            "types": [
+                {"id": index, "name": category["name"], "category_id": index}
+                for index, category in enumerate(CATEGORIES, start=1)
+            ],
+        }
+    )
+
+
+def make_employee() -> dict:
+    """Build the `hr.employee` row of the employee in `USER_CONTEXT`."""
+    employee = {key: value for key, value in USER_CONTEXT.items() if key != "sub"}
+    employee["id"] = int(USER_CONTEXT["sub"])
+    return employee
+
+
+def make_service(
+    size: int = 100, lang: str = None, latency: float = 0.0
+) -> OdooService:
+    """Build an `OdooService` whose models are served from in-memory fixtures."""
+    service = OdooService(dict(USER_CONTEXT), lang=lang)
+    service.model_hr_employee = FakeModel([make_employee()], latency)
+    service.model_incentive_event = FakeModel(make_event_details(size), latency)
+    service.model_payg_account = FakeModel(make_accounts(size), latency)
+    service.model_incentive_report = FakeModel(make_reports(8), latency)
+    event_catalog = make_event_catalog()
+    service.event_catalog = lambda: event_catalog
+    service.score_fields = lambda: ["nb_days_overdue", "registration_date"]
+    worklist = service._rank_slow_payers(settings.slow_payer_worklist_size)
+    service.slow_payer_worklist = lambda: worklist
+    return service
@@ -0,0 +1,69 @@
+"""
+Slow-payer list of an agent: Odoo versus the local account replica.
+
+"odoo" runs the query against `FakeOdoo` with `CALL_MS` of round-trip, as
+`OdooAPI` would; "replica" answers it from a synced `AccountReplica`. Both
+return the same page, the replica also counts the whole list.
+
+Run with `python -m benchmarks.replica`.
+"""
+
+import os
+import tempfile
+
+from app.services.odoo.replica import AccountReplica
+
+from .common import measure, print_table
+from .fake_odoo import FakeOdoo
+
+AGENTS = 100
+CALL_MS = 5.0
+FIELDS = ["id", "account_ext_id", "client_id", "nb_days_overdue"]
+
+
+def _populate(odoo: FakeOdoo, accounts: int) -> None:
+    for index in range(accounts):
+        odoo.tick()
+        odoo.create(
+            "payg.account",
+            {
+                "account_ext_id": f"ACC{index:06d}",
+                "client_id": [index + 1, f"Client {index}"],
+                "responsible_agent_employee_id": [index % AGENTS + 1, "Agent"],
+                "account_segmentation_id": [4, "Slow payer"],
+                "account_status": "disabled",
+                "nb_days_overdue": index % 40,
+            },
+        )
+
+
+def main() -> None:
+    rows = []
+    for accounts in (10_000, 50_000):
+        odoo = FakeOdoo()
+        _populate(odoo, accounts)
+        with tempfile.TemporaryDirectory() as directory:
+            replica = AccountReplica(os.path.join(directory, "replica.sqlite3"), odoo)
+            while not replica.is_fresh():
+                replica.sync()
+            domain = [
+                ["account_segmentation_id", "in", [4]],
+                ["responsible_agent_employee_id", "=", 1],
+            ]
+            odoo_us = measure(
+                lambda: odoo.search_records(
+                    "payg.account", domain, FIELDS, 0, 10, "nb_days_overdue desc"
+                ),
+                number=5,
+            )
+            replica_us = measure(
+                lambda: replica.search(1, [4], 0, 10, "nb_days_overdue desc", FIELDS)
+            )
+        rows.append([accounts, "odoo", f"{odoo_us / 1000 + CALL_MS:.2f}"])
+        rows.append([accounts, "replica", f"{replica_us / 1000:.2f}"])
+    print(f"{AGENTS} agents, page of 10 slow payers\n")
+    print_table(["accounts", "source", "ms per query"], rows)
+
+
+if __name__ == "__main__":
+    main()
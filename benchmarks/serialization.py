@@ -0,0 +1,124 @@
+"""
+Serialization cost per endpoint, before and after `PydanticJSONResponse`.
+
+"before" replays what FastAPI does when a handler returns a model and declares a
+response model: validate the object tree against the response field, encode it to
+JSON-able primitives, then `json.dumps` it. "after" is the trusted path used by the
+handlers, which renders the already-built models with pydantic-core in one pass.
+
+Run with `python -m benchmarks.serialization`.
+"""
+
+import asyncio
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.global_schema import TaskSchema
+from app.schemas.incentive_report import (
+    IncentiveReportDetailsSchema,
+    IncentiveReportSimpleSchema,
+)
+from app.schemas.screen import SummarySimpleSchema
+from app.utils.responses import PydanticJSONResponse
+
+from .common import measure, print_table
+from .fixtures import make_service
+
+
+def _legacy_render(loop, field, content) -> bytes:
+    encoded = loop.run_until_complete(
+        serialize_response(field=field, response_content=content, is_coroutine=True)
+    )
+    return JSONResponse(encoded).body
+
+
+def _endpoints(size: int):
+    service = make_service(size)
+    single_language = make_service(size, lang="fr")
+    return [
+        (
+            "/employee/report/{id}/details",
+            IncentiveReportDetailsSchema,
+            service.fetch_bonuses_details_by_report(report_id=100, limit=size),
+        ),
+        (
+            "/employee/tasks/slow-payers",
+            TaskSchema,
+            service.get_slower_payer_client_service(offset=0, limit=size),
+        ),
+        (
+            "/employee/tasks/hypercare",
+            TaskSchema,
+            service.get_hypercare_at_risk_service(offset=0, limit=size),
+        ),
+        (
+            "/employee/report/{id}/details?lang=fr",
+            IncentiveReportDetailsSchema,
+            single_language.fetch_bonuses_details_by_report(report_id=100, limit=size),
+        ),
+        (
+            "/employee/tasks/slow-payers?lang=fr",
+            TaskSchema,
+            single_language.get_slower_payer_client_service(offset=0, limit=size),
+        ),
+        (
+            "/employee/tasks/hypercare?lang=fr",
+            TaskSchema,
+            single_language.get_hypercare_at_risk_service(offset=0, limit=size),
+        ),
+        (
+            "/employee/report/{id}/details?view=collapsed",
+            IncentiveReportDetailsSchema,
+            service.fetch_bonuses_details_by_report(
+                report_id=100, limit=size, view="collapsed"
+            ),
+        ),
+        (
+            "/employee/tasks/slow-payers?view=collapsed",
+            TaskSchema,
+            service.get_slower_payer_client_service(
+                offset=0, limit=size, view="collapsed"
+            ),
+        ),
+        (
+            "/employee/report/{id}/summary",
+            SummarySimpleSchema,
+            service.fetch_bonuses_summary_by_report(report_id=100),
+        ),
+        (
+            "/employee/report",
+            List[IncentiveReportSimpleSchema],
+            service.search_validate_report_by_employee(),
+        ),
+    ]
+
+
+def main(size: int = 100) -> None:
+    rows = []
+    loop = asyncio.new_event_loop()
+    for path, response_model, content in _endpoints(size):
+        field = create_model_field(
+            name="Response", type_=response_model, mode="serialization"
+        )
+        before = measure(lambda: _legacy_render(loop, field, content), number=50)
+        after = measure(lambda: PydanticJSONResponse(content).body, number=50)
+        payload = len(PydanticJSONResponse(content).body)
+        rows.append(
+            (
+                path,
+                payload,
+                f"{before:.1f}",
+                f"{after:.1f}",
+                f"x{before / after:.1f}",
+            )
+        )
+    loop.close()
+    print(f"Serialization per response ({size} cards)\n")
+    print_table(["endpoint", "bytes", "before (us)", "after (us)", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cost of sending the OTP SMS, inline versus through the dispatch queue.
+
+"inline" posts each SMS and waits for the gateway, as `/otp/send` used to.
+"enqueue" is what the endpoint now pays per SMS. The drain rows time how long
+the dispatcher takes to deliver a batch against a gateway with latency and
+failures, at different concurrency levels.
+
+Run with `python -m benchmarks.sms`.
+"""
+
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.services.sms.dispatcher import SMSDispatcher
+
+from .common import print_table
+from .sms_gateway import FakeSMSGateway
+
+URL = "http://sms-gateway.local/sms/send"
+LATENCY = 0.05
+
+
+def _message(index: int) -> dict:
+    return {"msisdn": "+261340000000", "msg": "OTP", "sms_id": f"42-{index}"}
+
+
+async def _inline(count: int) -> float:
+    gateway = FakeSMSGateway(latency=LATENCY)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(gateway)) as client:
+        start = time.perf_counter()
+        for index in range(count):
+            await client.post(URL, json=_message(index))
+        return (time.perf_counter() - start) / count
+
+
+async def _dispatch(count: int, concurrency: int, failure_rate: float):
+    gateway = FakeSMSGateway(latency=LATENCY, failure_rate=failure_rate)
+    dispatcher = SMSDispatcher(
+        URL,
+        concurrency=concurrency,
+        backoff=0.01,
+        transport=httpx.ASGITransport(gateway),
+    )
+    await dispatcher.start()
+    start = time.perf_counter()
+    for index in range(count):
+        dispatcher.enqueue(_message(index))
+    enqueued = (time.perf_counter() - start) / count
+    await dispatcher.join()
+    drained = time.perf_counter() - start
+    await dispatcher.stop()
+    return enqueued, drained, len(gateway.received), gateway.requests
+
+
+async def main(count: int = 100) -> None:
+    logging.getLogger("sms.dead_letter").setLevel(logging.CRITICAL)
+    inline = await _inline(20)
+    rows = [["inline post", f"{inline * 1_000_000:.0f}", "", "", ""]]
+    for concurrency in (1, 8, 32):
+        for failure_rate in (0.0, 0.2):
+            enqueued, drained, delivered, requests = await _dispatch(
+                count, concurrency, failure_rate
+            )
+            rows.append(
+                [
+                    f"queue c={concurrency} fail={failure_rate:.0%}",
+                    f"{enqueued * 1_000_000:.1f}",
+                    f"{drained:.2f}",
+                    f"{delivered}/{count}",
+                    requests,
+                ]
+            )
+    print(f"Gateway latency {LATENCY * 1000:.0f} ms, batches of {count} SMS\n")
+    print_table(
+        ["mode", "per SMS on request (us)", "drain (s)", "delivered", "requests"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
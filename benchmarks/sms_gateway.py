@@ -0,0 +1,56 @@
+"""
+Local stand-in for the SMS gateway behind `SMS_URL`.
+
+`FakeSMSGateway` is an ASGI app answering like the gateway after a simulated
+`latency`, and failing a `failure_rate` share of the requests with a 503. Plug it
+into the dispatcher with `httpx.ASGITransport`, or serve it over HTTP with
+`python -m benchmarks.sms_gateway [port]` and point `SMS_URL` at it.
+"""
+
+import asyncio
+import json
+import random
+import sys
+
+
+class FakeSMSGateway:
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.received = []
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            event = await receive()
+            body += event.get("body", b"")
+            more_body = event.get("more_body", False)
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            status, payload = 503, {"error": "unavailable"}
+        else:
+            message = json.loads(body)
+            self.received.append(message)
+            status, payload = 200, {"status": "queued", "sms_id": message["sms_id"]}
+        content = json.dumps(payload).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    uvicorn.run(FakeSMSGateway(latency=0.2), port=port)
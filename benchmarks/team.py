@@ -0,0 +1,95 @@
+"""
+Hypercare lists of a supervisor's team: one request per agent versus the team
+endpoint.
+
+"per agent" builds the list of each agent with their own service, as a
+supervisor calling `/employee/tasks/hypercare` with each agent's token would;
+"team" builds all of them with `get_team_tasks_service`, which reads the
+accounts in two Odoo calls whatever the team size: its ranking query reads
+every hypercare account of the team, on the id and agent only, so its rows
+grow with the team. Odoo is `FakeOdoo` with `CALL_MS` of round-trip per call
+and `ROW_MS` per row read.
+
+Run with `python -m benchmarks.team`.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from app.core import settings
+from app.services.odoo.counters import TASK_HYPERCARE
+from app.services.odoo.models import Models
+from app.services.odoo.service import OdooService
+
+from .common import print_table
+from .fake_odoo import FakeOdoo
+from .fixtures import USER_CONTEXT
+
+ACCOUNTS_PER_AGENT = 50
+CALL_MS = 5.0
+ROW_MS = 0.01
+
+
+def _populate(odoo: FakeOdoo, agents: int) -> None:
+    segmentation = [int(settings.odoo_account_segmentation_hypercare.split(",")[0]), ""]
+    now = datetime.now()
+    for agent in range(agents):
+        employee_id = odoo.create(
+            "hr.employee",
+            {"name": f"Agent {agent}", "parent_id": [int(USER_CONTEXT["sub"]), ""]},
+        )
+        for index in range(ACCOUNTS_PER_AGENT):
+            registration_date = now - timedelta(days=index % 75)
+            odoo.create(
+                "payg.account",
+                {
+                    "account_ext_id": f"ACC{employee_id}-{index}",
+                    "create_date": registration_date.strftime("%Y-%m-%d %H:%M:%S"),
+                    "registration_date": registration_date.strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    "client_id": [index + 1, f"Client {index}"],
+                    "nb_days_overdue": 0,
+                    "account_status": "disabled",
+                    "account_segmentation_id": segmentation,
+                    "responsible_agent_employee_id": [employee_id, ""],
+                },
+            )
+
+
+def _service(odoo: FakeOdoo, user_context: dict) -> OdooService:
+    service = OdooService(user_context)
+    service.model_hr_employee = Models(client=odoo, model_name="hr.employee")
+    service.model_payg_account = Models(client=odoo, model_name="payg.account")
+    return service
+
+
+def _per_agent(odoo: FakeOdoo, employee_ids: list) -> None:
+    for employee_id in employee_ids:
+        service = _service(odoo, {**USER_CONTEXT, "sub": str(employee_id)})
+        service.get_hypercare_at_risk_service(offset=0, limit=10)
+
+
+def _team(odoo: FakeOdoo, employee_ids: list) -> None:
+    _service(odoo, dict(USER_CONTEXT)).get_team_tasks_service(
+        employee_ids, TASK_HYPERCARE, offset=0, limit=10
+    )
+
+
+def main() -> None:
+    rows = []
+    for agents in (5, 20, 50):
+        for name, run in (("per agent", _per_agent), ("team", _team)):
+            odoo = FakeOdoo(latency=CALL_MS / 1000, row_latency=ROW_MS / 1000)
+            _populate(odoo, agents)
+            odoo.calls = odoo.rows = 0
+            start = time.perf_counter()
+            run(odoo, list(range(1, agents + 1)))
+            elapsed = (time.perf_counter() - start) * 1000
+            rows.append([agents, name, odoo.calls, odoo.rows, f"{elapsed:.0f}"])
+    print(f"{ACCOUNTS_PER_AGENT} hypercare accounts per agent, 10 per page\n")
+    print_table(["agents", "approach", "Odoo calls", "rows read", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
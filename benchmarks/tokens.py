@@ -0,0 +1,67 @@
+"""
+Cost of verifying an access token per JWT backend, and with the verified-token
+cache.
+
+The token carries the employee claims the API puts in it at login. The
+"verify_access_token" rows run the FastAPI dependency itself; "cold" clears the
+cache before each call, "cached" is a repeat call from the same app session.
+
+Run with `python -m benchmarks.tokens`.
+"""
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.odoo_config import settings
+from app.utils import main as auth
+from app.utils.tokens import JWT_BACKENDS, get_jwt_backend
+
+from .common import measure, print_table
+from .fixtures import make_employee
+
+
+def _claims() -> dict:
+    claims = make_employee()
+    claims["sub"] = str(claims.pop("id"))
+    return claims
+
+
+def main() -> None:
+    secret = settings.access_token_secret
+    rows = []
+    for name in JWT_BACKENDS:
+        backend = get_jwt_backend(name)
+        token = backend.encode(
+            {**_claims(), "exp": 4102444800}, secret, algorithm=auth.ALGORITHM
+        )
+        encode = measure(
+            lambda: backend.encode(_claims(), secret, algorithm=auth.ALGORITHM)
+        )
+        decode = measure(
+            lambda: backend.decode(token, secret, algorithms=[auth.ALGORITHM])
+        )
+        rows.append([f"{name} encode", f"{encode:.1f}"])
+        rows.append([f"{name} decode", f"{decode:.1f}"])
+
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=auth.create_access_token(_claims())
+    )
+
+    def cold():
+        auth.verified_token_cache.clear()
+        auth.verify_access_token(credentials)
+
+    rows.append(
+        [f"verify_access_token cold ({settings.jwt_backend})", f"{measure(cold):.1f}"]
+    )
+    rows.append(
+        [
+            "verify_access_token cached",
+            f"{measure(lambda: auth.verify_access_token(credentials)):.1f}",
+        ]
+    )
+    print(f"Token size: {len(credentials.credentials)} bytes\n")
+    print_table(["operation", "median (us)"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Paging through the slow-payer worklist of an agent: ranking the portfolio on
+each request versus the cached top-k.
+
+"re-rank" scores and sorts the whole portfolio before slicing the page, "top-k"
+slices the `SLOW_PAYER_WORKLIST_SIZE` accounts cached in a `SharedMemoryCache`,
+after the one-off cost of building them, reported as "build top-k".
+
+Run with `python -m benchmarks.worklist`.
+"""
+
+import tempfile
+from datetime import datetime
+
+from app.core import settings
+from app.services.odoo.priority import build_worklist, score_accounts
+from app.utils.shared_cache import SharedMemoryCache
+
+from .common import measure, print_table
+from .fixtures import make_accounts
+
+FIELDS = ["nb_days_overdue", "registration_date"]
+PAGE = 20
+
+
+def main() -> None:
+    k = settings.slow_payer_worklist_size
+    rows = []
+    for size in (1000, 5000, 20000):
+        accounts = make_accounts(size)
+        now = datetime.now()
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SharedMemoryCache(directory, ttl=300)
+
+            def rerank():
+                scores = score_accounts(accounts, FIELDS, now)
+                ranked = sorted(range(len(accounts)), key=lambda i: -scores[i])
+                return [accounts[i] for i in ranked[PAGE : 2 * PAGE]]
+
+            def build():
+                return build_worklist(accounts, FIELDS, k, now)
+
+            def top_k():
+                return cache.get_or_load("worklist", build)["accounts"][PAGE : 2 * PAGE]
+
+            rerank_us = measure(rerank, number=5)
+            build_us = measure(build, number=5)
+            top_k_us = measure(top_k)
+        rows.append([size, "re-rank", f"{rerank_us / 1000:.2f}"])
+        rows.append([size, "build top-k", f"{build_us / 1000:.2f}"])
+        rows.append([size, "top-k", f"{top_k_us / 1000:.3f}"])
+    print(f"Page of {PAGE} slow payers, top {k} cached\n")
+    print_table(["accounts", "approach", "ms per request"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import pytest
+
+from app.services import invalidation
+from app.services.odoo.changes import EPOCH, ChangeFeed, MemoryWatermarkStore
+from app.utils.store import get_cache_store
+from benchmarks.fake_odoo import FakeOdoo
+
+FIELDS = ["id", "write_date", "responsible_agent_employee_id"]
+
+
+def _feed(odoo, watermarks=None, **options):
+    options = {"batch_size": 10, "max_batches": 2, "lookback": 5, **options}
+    feed = ChangeFeed(odoo, {"payg.account": FIELDS}, watermarks, **options)
+    published = []
+    feed.subscribe("payg.account", lambda event: published.append(event.record_id))
+    return feed, published
+
+
+def test_resume_within_a_second():
+    odoo = FakeOdoo()
+    for _ in range(50):
+        odoo.create("payg.account", {})
+    feed, published = _feed(odoo, initial=EPOCH)
+    for _ in range(3):
+        feed.poll("payg.account")
+    assert published == list(range(1, 51))
+    assert feed.watermark("payg.account") == ("2024-01-01 00:00:00", 50)
+    assert feed.caught_up("payg.account")
+
+
+def test_resume_from_persisted_watermark():
+    odoo = FakeOdoo()
+    watermarks = MemoryWatermarkStore()
+    for _ in range(5):
+        odoo.create("payg.account", {})
+    feed, _ = _feed(odoo, watermarks, initial=EPOCH)
+    feed.poll("payg.account")
+    odoo.tick(60)
+    odoo.create("payg.account", {})
+    restarted, published = _feed(odoo, watermarks, lookback=0)
+    restarted.poll("payg.account")
+    assert published == [6]
+
+
+def test_late_commit_within_lookback():
+    odoo = FakeOdoo()
+    odoo.create("payg.account", {})
+    odoo.tick(3)
+    odoo.create("payg.account", {})
+    feed, published = _feed(odoo, initial=EPOCH)
+    feed.poll("payg.account")
+    # Stamped before the watermark, committed after the last poll.
+    late = odoo.create("payg.account", {})
+    odoo.records["payg.account"][late]["write_date"] = "2024-01-01 00:00:01"
+    feed.poll("payg.account")
+    feed.poll("payg.account")
+    assert published == [1, 2, late]
+
+
+def test_archived_records_are_changes():
+    odoo = FakeOdoo()
+    odoo.create("payg.account", {})
+    feed, published = _feed(odoo)
+    odoo.tick()
+    odoo.write("payg.account", 1, {"active": False})
+    feed.poll("payg.account")
+    assert published == [1]
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    get_cache_store.cache_clear()
+    employee_ids = []
+    monkeypatch.setattr(invalidation, "_agent_tasks_changed", employee_ids.append)
+    yield employee_ids
+    get_cache_store.cache_clear()
+
+
+def test_reassignment_invalidates_both_agents(invalidated):
+    odoo = FakeOdoo()
+    odoo.create("payg.account", {"responsible_agent_employee_id": [1, "Agent"]})
+    feed, _ = _feed(odoo, initial=EPOCH)
+    invalidation.subscribe_cache_invalidation(feed)
+    feed.poll("payg.account")
+    assert invalidated == [1]
+    for agent, expected in (([2, "Agent"], [2, 1]), (False, [2])):
+        invalidated.clear()
+        odoo.tick(10)
+        odoo.write("payg.account", 1, {"responsible_agent_employee_id": agent})
+        feed.poll("payg.account")
+        assert sorted(invalidated) == sorted(expected)
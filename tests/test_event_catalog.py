@@ -0,0 +1,40 @@
+from app.services.odoo.event_catalog import EventCatalog
+
+PAYLOAD = {
+    "categories": [
+        {"id": -1, "code": "sales", "name": "Sales", "color": "", "icon": ""}
+    ],
+    "types": [],
+}
+
+
+def test_embedded_category_keeps_its_values():
+    catalog = EventCatalog(PAYLOAD)
+    category = catalog.category(
+        {"code": "sales", "name": "Ventes", "color": "#f00", "icon": "cart"}
+    )
+    assert (category.id, category.name, category.color, category.icon) == (
+        -1,
+        "Ventes",
+        "#f00",
+        "cart",
+    )
+    assert not catalog.stale
+
+
+def test_category_by_reference():
+    catalog = EventCatalog(PAYLOAD)
+    assert catalog.category("sales").name == "Sales"
+    assert catalog.category(-1).code == "sales"
+    assert catalog.category(5) is None
+    assert catalog.category(False) is None
+
+
+def test_unknown_embedded_category():
+    catalog = EventCatalog(PAYLOAD)
+    category = catalog.category(
+        {"code": "kyc", "name": "KYC", "color": "#0f0", "icon": "id"}
+    )
+    assert category.color == "#0f0"
+    assert catalog.category("kyc") == category
+    assert catalog.stale
@@ -0,0 +1,49 @@
+from app.services.odoo.replica import AccountReplica
+from benchmarks.fake_odoo import FakeOdoo
+
+
+def _account(index: int) -> dict:
+    return {
+        "account_ext_id": f"ACC{index}",
+        "client_id": [index, f"Client {index}"],
+        "responsible_agent_employee_id": [1, "Agent"],
+        "account_segmentation_id": [4, "Slow payer"],
+        "account_status": "disabled",
+        "nb_days_overdue": index,
+    }
+
+
+def test_sync_resumes_from_stored_watermark(tmp_path):
+    odoo = FakeOdoo()
+    for index in range(20):
+        odoo.create("payg.account", _account(index))
+    path = str(tmp_path / "replica.sqlite3")
+    first, second = AccountReplica(path, odoo), AccountReplica(path, odoo)
+    first.sync()
+    odoo.tick(120)
+    odoo.create("payg.account", _account(20))
+    second.sync()
+    odoo.tick(120)
+    odoo.create("payg.account", _account(21))
+    odoo.rows = 0
+    first.sync()
+    # The new account, and the one synced by `second` read again by the
+    # look-back, rather than every account since the first sync.
+    assert odoo.rows == 3
+    assert first.count(1, [4]) == 22
+
+
+def test_archived_and_deleted_accounts(tmp_path):
+    odoo = FakeOdoo()
+    for index in range(5):
+        odoo.create("payg.account", _account(index))
+    replica = AccountReplica(str(tmp_path / "replica.sqlite3"), odoo)
+    replica.sync()
+    odoo.tick()
+    odoo.write("payg.account", 1, {"active": False})
+    odoo.unlink("payg.account", 2)
+    replica.reconcile_interval = 0
+    replica.sync()
+    assert replica.count(1, [4]) == 3
+    records, total = replica.search(1, [4], 0, 10, "id asc", ["id"])
+    assert [record["id"] for record in records] == [3, 4, 5]
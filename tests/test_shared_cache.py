@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+from app.utils.shared_cache import SharedMemoryCache
+
+
+def test_get_or_load_per_process():
+    cache = SharedMemoryCache("/proc/baobab-cache")
+    assert not cache.shared
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(value=cache.get_or_load("key", lambda: 1)),
+        daemon=True,
+    )
+    thread.start()
+    thread.join(timeout=5)
+    assert result == {"value": 1}
+    assert cache.get_or_load("key", lambda: 2) == 1
+
+
+def test_writer_lock_per_process():
+    cache = SharedMemoryCache("/proc/baobab-cache")
+    with cache.writer_lock("key"):
+        with cache.writer_lock("key", blocking=False) as acquired:
+            assert not acquired
+        with cache.writer_lock("other", blocking=False) as acquired:
+            assert acquired
+        assert not cache.refresh("key", lambda: 1)
+    assert cache.refresh("key", lambda: 1)
+
+
+def test_sweep_expired(tmp_path):
+    cache = SharedMemoryCache(str(tmp_path), ttl=60, stale_ttl=10)
+    cache.get_or_load("expired", lambda: 1, ttl=-20)
+    cache.get_or_load("stale", lambda: 2, ttl=-5)
+    cache.get_or_load("fresh", lambda: 3)
+    assert cache.sweep() == 1
+    assert cache.read("expired") is None
+    assert cache.read("stale").value == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(cache._path(key)) + suffix
+        for key in ("stale", "fresh")
+        for suffix in ("", ".lock")
+    )
+
+
+def test_sweep_max_entries(tmp_path):
+    cache = SharedMemoryCache(str(tmp_path), ttl=60, max_entries=2)
+    for index in range(4):
+        cache.write(f"key{index}", index, ttl=60 + index)
+    assert cache.sweep() == 2
+    assert [cache.read(f"key{index}") is not None for index in range(4)] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_sweep_per_process():
+    cache = SharedMemoryCache("/proc/baobab-cache", stale_ttl=0, max_entries=1)
+    cache.write("expired", 1, ttl=-1)
+    cache.write("first", 2, ttl=60)
+    cache.write("second", 3, ttl=120)
+    assert cache.sweep() == 2
+    assert cache.read("second").value == 3
+    assert cache.read("first") is None
+
+
+def test_sweep_after_write(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.utils.shared_cache.SWEEP_INTERVAL", 0)
+    cache = SharedMemoryCache(str(tmp_path), stale_ttl=0)
+    cache.write("expired", 1, ttl=-1)
+    time.sleep(0.01)
+    cache.write("fresh", 2)
+    deadline = time.time() + 5
+    while cache.read("expired") is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.read("expired") is None
@@ -0,0 +1,29 @@
+from app.services.sync import diff
+from app.utils.store import get_cache_store
+
+
+def setup_function():
+    get_cache_store.cache_clear()
+
+
+def test_unchanged_list_keeps_its_token():
+    items = {"a": {"v": 1}, "b": {"v": 2}}
+    changed, first = diff("scope", items, None)
+    assert (changed, first.full, first.order) == (["a", "b"], True, ["a", "b"])
+    changed, second = diff("scope", items, first.token)
+    assert (changed, second.full, second.token) == ([], False, first.token)
+
+
+def test_reordered_list_sends_its_order():
+    _, first = diff("scope", {"a": {"v": 1}, "b": {"v": 2}}, None)
+    changed, second = diff("scope", {"b": {"v": 2}, "a": {"v": 1}}, first.token)
+    assert changed == []
+    assert second.token != first.token
+    assert second.order == ["b", "a"]
+
+
+def test_changed_and_removed_items():
+    _, first = diff("scope", {"a": {"v": 1}, "b": {"v": 2}}, None)
+    changed, second = diff("scope", {"a": {"v": 3}, "c": {"v": 4}}, first.token)
+    assert changed == ["a", "c"]
+    assert (second.removed, second.order) == (["b"], ["a", "c"])